@@ -0,0 +1,132 @@
+# assets.py
+# The game's sounds and images, listed in MANIFEST. An AssetLoader loads them either on the calling thread
+# (load()) or on a background thread while main.py shows its loading screen (start(), done(), finish()).
+# Decoding (mp3, wav, png) and scaling happen on the worker. Converting images to the display's pixel
+# format needs the display, so finish() does that on the thread that calls it.
+# Nothing is loaded on import, which needs neither a display nor the mixer.
+import time
+import threading
+import pygame
+import settings
+import audio
+
+PLAYER_IMAGE_SIZE = (settings.PLAYER_RADIUS * 2, settings.PLAYER_RADIUS * 2)
+
+# --- Manifest ---
+# name: (kind, path, options). "sounds" entries have a list of paths and load as a list.
+# The background music is not in here, music.MusicPlayer streams it.
+MANIFEST = {
+    "standard_shot": ("sound", audio.SINGLE_SHOT_SOUND, {}),
+    "nova_shot": ("sound", audio.NOVA_SHOT_SOUND, {}),
+    "triple_shot": ("sound", audio.TRIPLE_SHOT_SOUND, {}),
+    "boomerang_shot": ("sound", audio.BOOMERANG_SHOT_SOUND, {}),
+    "bouncing_shot": ("sound", audio.BOUNCING_SHOT, {}),
+    "pickup": ("sound", audio.PICKUP_SOUND, {}),
+    "enemy_hit": ("sounds", audio.ENEMY_HIT_SOUNDS, {}),
+    "player_death": ("sound", audio.PLAYER_DEATH_SOUND, {}),
+    "select_archetype": ("sound", audio.SELECT_ARCHETYPE_SOUND, {}),
+    "standard_player_image": ("image", settings.IMAGE_PLAYER_PATH, {"size": PLAYER_IMAGE_SIZE}),
+    "triple_shot_player_image": ("image", settings.IMAGE_PLAYER_TRIPLE_SHOT_PATH, {"size": PLAYER_IMAGE_SIZE}),
+    "nova_burst_player_image": ("image", settings.IMAGE_PLAYER_NOVA_BURST_PATH, {"size": PLAYER_IMAGE_SIZE}),
+    "bouncing_shot_player_image": ("image", settings.IMAGE_PLAYER_BOUNCING_SHOT_PATH, {"size": PLAYER_IMAGE_SIZE}),
+    "background": ("image", settings.IMAGE_BACKGROUND_PATH, {}),
+}
+
+# Sounds the simulation plays (Simulation._play_sound), the rest are used by main.py
+GAME_SOUNDS = ("standard_shot", "nova_shot", "triple_shot", "boomerang_shot", "bouncing_shot",
+               "pickup", "enemy_hit", "player_death")
+
+
+# --- Loading ---
+def load_sound(path, volume=None):
+    sound = pygame.mixer.Sound(path)
+    if volume is not None:
+        sound.set_volume(volume)
+    return sound
+
+
+def load_image(path, size=None):
+    """Loads and optionally smoothscales an image, still in the file's pixel format."""
+    image = pygame.image.load(path)
+    if size:
+        image = pygame.transform.smoothscale(image, size)
+    return image
+
+
+def convert_image(image):
+    # Per-pixel alpha is kept if the file has it
+    if image.get_alpha() is not None:
+        return image.convert_alpha()
+    return image.convert()
+
+
+def _load_entry(kind, path, options):
+    if kind == "sound":
+        return load_sound(path, **options)
+    if kind == "sounds":
+        return [load_sound(sound_path, **options) for sound_path in path]
+    if kind == "image":
+        return load_image(path, **options)
+    raise ValueError(f"Unknown asset kind {kind!r}")
+
+
+class AssetLoader:
+    def __init__(self, manifest=MANIFEST):
+        self.manifest = manifest
+        self.assets = {} # name: loaded asset, None if it failed
+        self.errors = {} # name: error message
+        self.load_times = {} # name: seconds spent loading it
+        self.loaded_count = 0
+        self.thread = None
+
+    def _load_all(self):
+        for name, (kind, path, options) in self.manifest.items():
+            start = time.perf_counter()
+            try:
+                self.assets[name] = _load_entry(kind, path, options)
+            except (pygame.error, FileNotFoundError, ValueError) as e:
+                self.assets[name] = None
+                self.errors[name] = f"{path}: {e}"
+            self.load_times[name] = time.perf_counter() - start
+            self.loaded_count += 1
+
+    def _finish_loading(self):
+        # On the calling thread: images to the display format, then report what failed
+        for name, (kind, path, options) in self.manifest.items():
+            if kind == "image" and self.assets.get(name) is not None:
+                self.assets[name] = convert_image(self.assets[name])
+        for name, message in self.errors.items():
+            print(f"Error loading asset {name} ({message})")
+        return self.assets
+
+    def load(self):
+        """Loads everything on this thread and returns {name: asset}. Needs a display and the mixer."""
+        self._load_all()
+        return self._finish_loading()
+
+    # --- Background Loading ---
+    def start(self):
+        """Starts loading on a worker thread, poll done() (or wait()) and call finish() once it is."""
+        self.thread = threading.Thread(target=self._load_all, name="asset-loader", daemon=True)
+        self.thread.start()
+
+    def done(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def wait(self, timeout):
+        """Blocks until the worker is done or timeout seconds pass. Returns done()."""
+        self.thread.join(timeout)
+        return self.done()
+
+    def progress(self):
+        """Fraction of the manifest loaded so far, 0 to 1."""
+        return self.loaded_count / len(self.manifest) if self.manifest else 1.0
+
+    def finish(self):
+        """Waits for the worker and returns {name: asset}. Call from the thread that owns the display."""
+        self.thread.join()
+        return self._finish_loading()
+
+    def slowest(self, count=3):
+        """(name, seconds) of the assets that took longest to load."""
+        return sorted(self.load_times.items(), key=lambda item: item[1], reverse=True)[:count]
@@ -0,0 +1,73 @@
+# background.py
+# The tiled world background, composited into one off-screen surface. The cache holds the tiles the
+# camera can see (plus settings.BACKGROUND_CACHE_MARGIN_TILES on each side) and is drawn with a single
+# sub-rect blit per frame. It is only rebuilt when the view reaches a tile outside the cached block.
+import math
+import pygame
+import settings
+
+
+class BackgroundCache:
+    def __init__(self, tile_image, tiles_x, tiles_y, view_size, margin_tiles=settings.BACKGROUND_CACHE_MARGIN_TILES):
+        self.tile_image = tile_image
+        self.tile_width, self.tile_height = tile_image.get_size()
+        self.tiles_x = tiles_x
+        self.tiles_y = tiles_y
+        self.view_size = tuple(view_size)
+        self.margin_tiles = margin_tiles
+        # A view can straddle one more tile than fits in it, the cache never needs more than the world has
+        self.cols = min(tiles_x, math.ceil(self.view_size[0] / self.tile_width) + 1 + 2 * margin_tiles)
+        self.rows = min(tiles_y, math.ceil(self.view_size[1] / self.tile_height) + 1 + 2 * margin_tiles)
+        # Same pixel format (and per-pixel alpha, if any) as the tile, so the final blit looks the same
+        self.surface = pygame.Surface((self.cols * self.tile_width, self.rows * self.tile_height),
+                                      tile_image.get_flags() & pygame.SRCALPHA, tile_image)
+        self.first_col = None # Top-left tile of the cached block, None until the first build
+        self.first_row = None
+        self.rebuilds = 0
+
+    def matches(self, tile_image, tiles_x, tiles_y, view_size):
+        """False if the cache was built for a different tile, world or view size and must be replaced."""
+        return (tile_image is self.tile_image and tiles_x == self.tiles_x and tiles_y == self.tiles_y
+                and tuple(view_size) == self.view_size)
+
+    def _rebuild(self, first_col, first_row):
+        self.first_col = first_col
+        self.first_row = first_row
+        self.rebuilds += 1
+        cache = self.surface
+        cache.fill((0, 0, 0, 0))
+        # Tiles do not overlap, so copy them in unblended: max(0, pixel) keeps every channel including alpha
+        blit_sequence = [(self.tile_image, (col * self.tile_width, row * self.tile_height), None, pygame.BLEND_RGBA_MAX)
+                         for row in range(self.rows) for col in range(self.cols)]
+        cache.blits(blit_sequence, doreturn=False)
+
+    def draw(self, surface, camera_offset):
+        tile_width = self.tile_width
+        tile_height = self.tile_height
+        view_width, view_height = self.view_size
+        # World pixel shown in the top-left screen pixel
+        origin_x = math.floor(camera_offset.x)
+        origin_y = math.floor(camera_offset.y)
+        # Visible part of the world, in world pixels
+        left = max(origin_x, 0)
+        top = max(origin_y, 0)
+        right = min(origin_x + view_width, self.tiles_x * tile_width)
+        bottom = min(origin_y + view_height, self.tiles_y * tile_height)
+        if left >= right or top >= bottom:
+            return # Camera is entirely outside the world
+
+        start_col = left // tile_width
+        end_col = (right - 1) // tile_width
+        start_row = top // tile_height
+        end_row = (bottom - 1) // tile_height
+        first_col = self.first_col
+        first_row = self.first_row
+        if (first_col is None or start_col < first_col or end_col >= first_col + self.cols
+                or start_row < first_row or end_row >= first_row + self.rows):
+            # Centre the new block on the view as far as the world edges allow
+            first_col = max(0, min(start_col - self.margin_tiles, self.tiles_x - self.cols))
+            first_row = max(0, min(start_row - self.margin_tiles, self.tiles_y - self.rows))
+            self._rebuild(first_col, first_row)
+
+        area = pygame.Rect(left - first_col * tile_width, top - first_row * tile_height, right - left, bottom - top)
+        surface.blit(self.surface, (left - origin_x, top - origin_y), area)
@@ -0,0 +1,415 @@
+# batch.py
+# Runs many headless sessions on all CPU cores for balance and load sweeps. Every session has its own
+# seed, archetype, store policy and settings overrides, and every finished session is written straight
+# away as one row of a results table. A .parquet output is a columnar Parquet file (needs pyarrow); anything
+# else, and .parquet without pyarrow installed, is written as CSV instead.
+#   python batch.py --seeds 100 --archetypes standard nova_burst --policies first priority \
+#       --grid ENEMY_SPAWN_INTERVAL=1.0,1.5 --grid archetype.nova_burst.shoot_cooldown_modifier=1.4,1.6 \
+#       --output results.csv
+# Override keys are a settings.py name (MAX_ENEMIES), archetype.<id>.<key> for a PLAYER_ARCHETYPES entry
+# or store.<id>.<key> for a MASTER_STORE_ITEMS entry. They are applied in the worker before the Simulation
+# is created, so values other modules copied at import time (default arguments) keep their defaults.
+# The player is moved by a scripted movement policy (kiting by default, "still" stands like main.py
+# --headless), and the session ends on game over or after --ticks.
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+from array import array
+import pygame
+import settings
+import simulation
+import assets
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+RESULT_COLUMNS = ["ticks", "survival_seconds", "game_over", "kills", "level", "peak_enemies", "peak_projectiles",
+                  "peak_pickups", "tick_p50_ms", "tick_p99_ms", "tick_max_ms", "wall_seconds"]
+PARQUET_ROW_GROUP_SIZE = 1000 # Rows buffered before the Parquet writer flushes them as one row group
+PROGRESS_INTERVAL = 2.0 # Seconds between progress lines
+
+
+# --- Settings Overrides ---
+def parse_value(text):
+    # Numbers, booleans and JSON lists as such, anything else stays a string
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _override_target(key):
+    """(dict, name) that the override key writes to. Settings are written through the module's __dict__."""
+    parts = key.split(".")
+    target = None
+    if len(parts) == 1:
+        target = vars(settings)
+    elif len(parts) == 3 and parts[0] == "archetype":
+        target = simulation.find_archetype(parts[1])
+    elif len(parts) == 3 and parts[0] == "store":
+        target = next((item for item in simulation.MASTER_STORE_ITEMS if item["id"] == parts[1]), None)
+    if target is None or parts[-1] not in target:
+        raise ValueError(f"Unknown override {key!r}")
+    return target, parts[-1]
+
+
+def apply_overrides(overrides):
+    """Applies {key: value} and returns what restore_overrides() needs to undo it."""
+    saved = []
+    for key, value in overrides.items():
+        target, name = _override_target(key)
+        saved.append((target, name, target[name]))
+        target[name] = value
+    return saved
+
+
+def restore_overrides(saved):
+    for target, name, value in reversed(saved):
+        target[name] = value
+
+
+# --- Store Policies ---
+# Each picks one of sim.displayed_store_items (never empty when called), or None to leave without buying.
+# rng is the session's own policy stream, so a policy never disturbs the simulation's random streams.
+STORE_PRIORITY = ("faster_shots", "standard_shot_upgrade", "orbital_weapon", "boomerang_weapon", "max_health",
+                  "pickup_radius", "player_speed", "heal_fully")
+
+
+def policy_first(sim, rng):
+    return sim.displayed_store_items[0] # What main.py --headless does
+
+
+def policy_random(sim, rng):
+    return rng.choice(sim.displayed_store_items)
+
+
+def policy_priority(sim, rng):
+    # Heal when below half health, otherwise the first offer in STORE_PRIORITY order
+    offers = {item["id"]: item for item in sim.displayed_store_items}
+    if "heal_fully" in offers and sim.current_player_health * 2 < sim.max_player_health:
+        return offers["heal_fully"]
+    for item_id in STORE_PRIORITY:
+        if item_id in offers:
+            return offers[item_id]
+    return sim.displayed_store_items[0]
+
+
+STORE_POLICIES = {"first": policy_first, "random": policy_random, "priority": policy_priority}
+
+
+# --- Movement Policies ---
+# Each returns the movement bitmask for the next tick (see simulation.INPUT_UP etc.). rng is the session's
+# own movement stream and state a dict the policy keeps between ticks of one session.
+KITE_THREAT_RANGE = 220 # Enemies closer than this push the kiting player away
+KITE_THREATS = 8 # Nearest enemies taken into account
+KITE_STRAFE_FLIP_CHANCE = 0.01 # Per tick, so the player does not circle the same way forever
+WALL_MARGIN = 150 # Distance from the world edge where the player steers back towards the middle
+INPUT_THRESHOLD = 0.38 # About cos(67.5 degrees), so a direction maps to the nearest of the 8 key combinations
+
+
+def input_from_direction(direction):
+    move_input = 0
+    if direction.length_squared() == 0:
+        return move_input
+    direction = direction.normalize()
+    if direction.y < -INPUT_THRESHOLD:
+        move_input |= simulation.INPUT_UP
+    if direction.y > INPUT_THRESHOLD:
+        move_input |= simulation.INPUT_DOWN
+    if direction.x < -INPUT_THRESHOLD:
+        move_input |= simulation.INPUT_LEFT
+    if direction.x > INPUT_THRESHOLD:
+        move_input |= simulation.INPUT_RIGHT
+    return move_input
+
+
+def _away_from_walls(sim):
+    # Points back towards the middle of the world near its edges, zero elsewhere or without world bounds
+    push = pygame.Vector2()
+    world_bounds = sim.world_bounds
+    if not world_bounds:
+        return push
+    pos = sim.player_pos
+    if pos.x < WALL_MARGIN:
+        push.x += 1
+    elif pos.x > world_bounds[0] - WALL_MARGIN:
+        push.x -= 1
+    if pos.y < WALL_MARGIN:
+        push.y += 1
+    elif pos.y > world_bounds[1] - WALL_MARGIN:
+        push.y -= 1
+    return push
+
+
+def movement_still(sim, rng, state):
+    return 0 # What main.py --headless does
+
+
+def movement_kite(sim, rng, state):
+    # Backs away from the nearby enemies while strafing around them, and walks to the nearest pickup
+    # when nothing is close
+    pos = sim.player_pos
+    if rng.random() < KITE_STRAFE_FLIP_CHANCE or "strafe" not in state:
+        state["strafe"] = rng.choice((-1, 1))
+    direction = pygame.Vector2()
+    threats = sim.find_targets(pos, k=KITE_THREATS, max_range=KITE_THREAT_RANGE) if sim.enemies else []
+    for enemy in threats:
+        offset = pos - enemy.pos
+        distance_sq = offset.length_squared()
+        if distance_sq > 0:
+            direction += offset / distance_sq # Closer enemies push harder
+    if direction.length_squared() > 0:
+        direction.normalize_ip()
+        direction += direction.rotate(90 * state["strafe"]) * 0.5
+    elif sim.pickup_particles:
+        nearest_pickup = min(sim.pickup_particles, key=lambda pickup: pos.distance_squared_to(pickup.pos))
+        direction = nearest_pickup.pos - pos
+    direction += _away_from_walls(sim) * 2
+    return input_from_direction(direction)
+
+
+MOVEMENT_POLICIES = {"still": movement_still, "kite": movement_kite}
+
+
+# --- Sessions ---
+def _split_assignment(text, many=False):
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise ValueError(f"Expected KEY=VALUE, got {text!r}")
+    _override_target(key) # Fail before any worker starts
+    if many:
+        return key, [parse_value(part) for part in value.split(",")]
+    return key, parse_value(value)
+
+
+def make_sessions(args, tile_size):
+    """One session dict per combination of overrides, archetype, movement, store policy and seed."""
+    fixed = {key: value for key, value in (_split_assignment(text) for text in args.set)}
+    grid_keys = []
+    grid_values = []
+    for text in args.grid:
+        key, values = _split_assignment(text, many=True)
+        grid_keys.append(key)
+        grid_values.append(values)
+    sessions = []
+    for combination in itertools.product(*grid_values):
+        overrides = dict(fixed)
+        overrides.update(zip(grid_keys, combination))
+        for archetype_id, movement, policy in itertools.product(args.archetypes, args.movements, args.policies):
+            for seed in range(args.first_seed, args.first_seed + args.seeds):
+                sessions.append({"run": len(sessions), "seed": seed, "archetype": archetype_id, "movement": movement,
+                                 "policy": policy, "overrides": overrides, "ticks": args.ticks, "tile_size": tile_size})
+    return sessions
+
+
+def _percentile_ms(sorted_ns, pct):
+    if not sorted_ns:
+        return 0.0
+    return sorted_ns[min(len(sorted_ns) - 1, int(len(sorted_ns) * pct / 100))] / 1e6
+
+
+def run_session(session):
+    """Plays one session headless and returns its result row."""
+    saved = apply_overrides(session["overrides"])
+    try:
+        sim = simulation.Simulation(tile_size=session["tile_size"], verbose=False, seed=session["seed"])
+        sim.select_archetype(simulation.find_archetype(session["archetype"]))
+        choose_item = STORE_POLICIES[session["policy"]]
+        policy_rng = random.Random(f"{session['seed']}:policy")
+        choose_move = MOVEMENT_POLICIES[session["movement"]]
+        movement_rng = random.Random(f"{session['seed']}:movement")
+        movement_state = {}
+        tick_ns = array("q")
+        peak_enemies = peak_projectiles = peak_pickups = 0
+        start = time.perf_counter()
+        for _ in range(session["ticks"]):
+            if sim.game_over_active:
+                break
+            if sim.store_active:
+                item = choose_item(sim, policy_rng) if sim.displayed_store_items else None
+                if item:
+                    sim.purchase_store_item(item)
+                else:
+                    sim.close_store()
+            move_input = choose_move(sim, movement_rng, movement_state)
+            tick_start = time.perf_counter_ns()
+            sim.step(move_input)
+            tick_ns.append(time.perf_counter_ns() - tick_start)
+            peak_enemies = max(peak_enemies, len(sim.enemies))
+            peak_projectiles = max(peak_projectiles, len(sim.particles) + len(sim.boomerang_projectiles))
+            peak_pickups = max(peak_pickups, len(sim.pickup_particles))
+        wall_seconds = time.perf_counter() - start
+    finally:
+        restore_overrides(saved)
+
+    sorted_ns = sorted(tick_ns)
+    row = {"run": session["run"], "seed": session["seed"], "archetype": session["archetype"],
+           "movement": session["movement"], "policy": session["policy"]}
+    row.update(session["overrides"])
+    row.update({
+        "ticks": len(tick_ns),
+        "survival_seconds": round(sim.total_game_time_seconds, 3),
+        "game_over": sim.game_over_active,
+        "kills": sim.kill_count,
+        "level": sim.player_level,
+        "peak_enemies": peak_enemies,
+        "peak_projectiles": peak_projectiles,
+        "peak_pickups": peak_pickups,
+        "tick_p50_ms": round(_percentile_ms(sorted_ns, 50), 4),
+        "tick_p99_ms": round(_percentile_ms(sorted_ns, 99), 4),
+        "tick_max_ms": round(sorted_ns[-1] / 1e6 if sorted_ns else 0.0, 4),
+        "wall_seconds": round(wall_seconds, 3),
+    })
+    return row
+
+
+def _init_worker():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+# --- Results Files ---
+class CsvResultsWriter:
+    def __init__(self, path, columns):
+        self.path = path
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.file.flush() # Finished runs survive an interrupted sweep
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultsWriter:
+    def __init__(self, path, columns):
+        if pyarrow is None:
+            raise RuntimeError("Writing Parquet requires pyarrow (pip install pyarrow), or use a .csv output")
+        self.path = path
+        self.columns = columns
+        self.rows = []
+        self.writer = None # Created with the schema of the first row group
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = pyarrow.table({column: [row.get(column) for row in self.rows] for column in self.columns})
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+        self.rows.clear()
+
+    def close(self):
+        self._flush()
+        if self.writer:
+            self.writer.close()
+
+
+def open_results(path, columns):
+    if path.endswith(".parquet"):
+        if pyarrow is not None:
+            return ParquetResultsWriter(path, columns)
+        # CSV fallback, next to where the Parquet file would have gone
+        path = path[:-len(".parquet")] + ".csv"
+        print(f"pyarrow is not installed (pip install pyarrow), writing CSV to {path} instead")
+    return CsvResultsWriter(path, columns)
+
+
+# --- Sweep ---
+def background_tile_size():
+    # The world size comes from the background tile, as in main.py --headless
+    try:
+        return assets.load_image(settings.IMAGE_BACKGROUND_PATH).get_size()
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Error loading background image {settings.IMAGE_BACKGROUND_PATH}: {e}, running without world bounds")
+        return (0, 0)
+
+
+def run_sweep(sessions, output_path, workers):
+    """Runs the sessions on workers processes (in this process if workers is 1) and writes one row per session."""
+    columns = ["run", "seed", "archetype", "movement", "policy"]
+    for session in sessions:
+        for key in session["overrides"]:
+            if key not in columns:
+                columns.append(key)
+    columns += RESULT_COLUMNS
+    results = open_results(output_path, columns)
+    start = time.perf_counter()
+    next_progress = start + PROGRESS_INTERVAL
+    completed = 0
+    game_overs = 0
+    pool = None
+    try:
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, initializer=_init_worker)
+            rows = pool.imap_unordered(run_session, sessions)
+        else:
+            _init_worker()
+            rows = map(run_session, sessions)
+        for row in rows:
+            results.write(row)
+            completed += 1
+            game_overs += row["game_over"]
+            now = time.perf_counter()
+            if now >= next_progress:
+                next_progress = now + PROGRESS_INTERVAL
+                rate = completed / (now - start)
+                print(f"{completed}/{len(sessions)} runs, {rate:.1f} runs/s, "
+                      f"about {(len(sessions) - completed) / rate:.0f} s left")
+    finally:
+        if pool:
+            pool.terminate()
+        results.close()
+    elapsed = time.perf_counter() - start
+    print(f"Ran {completed} sessions in {elapsed:.1f} s on {workers} worker(s), {game_overs} ended in game over. "
+          f"Results in {results.path}")
+
+
+def parse_args(argv=None):
+    archetype_ids = [archetype["id"] for archetype in simulation.PLAYER_ARCHETYPES]
+    parser = argparse.ArgumentParser(description="Headless balance and load sweeps on a process pool.")
+    parser.add_argument("--seeds", type=int, default=10, help="sessions per combination, with consecutive seeds")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first session of each combination")
+    parser.add_argument("--archetypes", nargs="+", choices=archetype_ids, default=archetype_ids)
+    parser.add_argument("--movements", nargs="+", choices=sorted(MOVEMENT_POLICIES), default=["kite"],
+                        help="scripted player movement")
+    parser.add_argument("--policies", nargs="+", choices=sorted(STORE_POLICIES), default=["first"],
+                        help="automated store choices")
+    parser.add_argument("--ticks", type=int, default=settings.SIMULATION_TICK_RATE * 600,
+                        help="tick limit per session (default 10 minutes of game time)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override applied to every session, e.g. MAX_ENEMIES=80")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2",
+                        help="override swept over every listed value, combined with the other --grid keys")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--output", default="batch_results.csv", help="results file, .csv or .parquet")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        sessions = make_sessions(args, background_tile_size())
+    except ValueError as e:
+        raise SystemExit(f"batch.py: {e}")
+    print(f"{len(sessions)} sessions on {args.workers} worker(s), up to {args.ticks} ticks each")
+    run_sweep(sessions, args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_enemy_lod.py
+# Tick time of a large horde spread far beyond the screen, with and without the off-screen enemy level of
+# detail (settings.USE_ENEMY_LOD, see lod.py). Also prints the largest distance an on-screen enemy moved in
+# one tick: it stays the same with LOD on, so no enemy pops when it walks into view.
+# Run from the project root: python -m benchmarks.bench_enemy_lod [--counts 500 2000] [--spread 6000]
+import time
+import random
+import argparse
+import pygame
+import settings
+import simulation
+import lod
+from entities import EnemyTriangle, SquareEnemy, HexagonEnemy
+
+ENEMY_COUNTS = [250, 1000, 2500, 5000]
+TICKS = 120
+SEED = 1234
+MOVE_INPUT = simulation.INPUT_RIGHT # The player keeps running, so the horde trails behind it
+
+
+def make_sim(count, spread, rng):
+    sim = simulation.Simulation(verbose=False, seed=SEED)
+    sim.select_archetype(simulation.find_archetype("standard"))
+    sim.current_player_health = sim.max_player_health = 10**9 # Nothing ends the run early
+    sim.max_enemies = 0 # No spawns, only the horde below
+    screen_dims = (sim.screen_width, sim.screen_height)
+    center = sim.player_pos
+    for i in range(count):
+        pos = pygame.Vector2(center.x + rng.uniform(-spread, spread) / 2, center.y + rng.uniform(-spread, spread) / 2)
+        kind = i % 3
+        if kind == 0:
+            enemy = EnemyTriangle(screen_dims, sim.camera_offset, rng=rng)
+            enemy.pos = pos # Triangles spawn on a screen edge, move them into the horde
+        elif kind == 1:
+            enemy = SquareEnemy(pos, *screen_dims, rng=rng)
+        else:
+            enemy = HexagonEnemy(pos, *screen_dims, rng=rng)
+        sim.add_enemy(enemy)
+    return sim
+
+
+def run(count, spread, use_lod):
+    """(ms per tick, fraction of enemies near the view, largest on-screen move in one tick in pixels)."""
+    settings.USE_ENEMY_LOD = use_lod
+    sim = make_sim(count, spread, random.Random(SEED))
+    screen_size = (sim.screen_width, sim.screen_height)
+    elapsed = 0.0
+    near_total = 0
+    max_visible_step = 0.0
+    for _ in range(TICKS):
+        before = [(enemy, pygame.Vector2(enemy.pos)) for enemy in sim.enemies]
+        start = time.perf_counter()
+        sim.step(MOVE_INPUT)
+        elapsed += time.perf_counter() - start
+        # Moves are measured for enemies that end the tick inside the screen, i.e. what the player sees
+        visible = lod.view_bounds(sim.camera_offset, screen_size, margin=0)
+        alive = set(sim.enemies)
+        for enemy, old_pos in before:
+            if enemy in alive and visible[0] <= enemy.pos.x <= visible[2] and visible[1] <= enemy.pos.y <= visible[3]:
+                max_visible_step = max(max_visible_step, enemy.pos.distance_to(old_pos))
+        near_total += len(lod.near_enemies(sim.enemies, lod.view_bounds(sim.camera_offset, screen_size)))
+    return elapsed / TICKS * 1000, near_total / TICKS / max(1, len(sim.enemies)), max_visible_step
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Off-screen enemy level of detail.")
+    parser.add_argument("--counts", type=int, nargs="+", default=ENEMY_COUNTS, help="horde sizes")
+    parser.add_argument("--spread", type=float, default=6000, help="side in pixels of the square the horde starts in")
+    args = parser.parse_args()
+
+    use_lod_setting = settings.USE_ENEMY_LOD
+    frame_budget_ms = 1000 / settings.FPS
+    print(f"{'enemies':>8} {'full ms':>9} {'LOD ms':>9} {'speedup':>8} {'near':>6} {'full step':>10} {'LOD step':>9}"
+          f"   (frame budget {frame_budget_ms:.1f} ms)")
+    for count in args.counts:
+        full_ms, _, full_step = run(count, args.spread, use_lod=False)
+        lod_ms, near_fraction, lod_step = run(count, args.spread, use_lod=True)
+        print(f"{count:>8} {full_ms:>9.2f} {lod_ms:>9.2f} {full_ms / lod_ms:>7.1f}x {near_fraction:>6.0%}"
+              f" {full_step:>10.2f} {lod_step:>9.2f}")
+    settings.USE_ENEMY_LOD = use_lod_setting
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench_enemy_store.py
+# Seek-the-player step: per-object enemy.update() vs the NumPy EnemyStore.seek().
+# Run from the project root: python -m benchmarks.bench_enemy_store
+import random
+import time
+import pygame
+import settings
+import enemy_store
+from entities import EnemyTriangle, SquareEnemy, HexagonEnemy
+
+ENEMY_COUNTS = [100, 1000, 5000, 10000, 20000]
+TICKS = 30
+SEED = 1234
+
+
+def make_horde(count, rng):
+    # Every random draw comes from rng, so the global random module is left alone
+    camera = pygame.Vector2(0, 0)
+    screen_dims = (settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)
+    horde = []
+    for i in range(count):
+        pos = (rng.uniform(0, settings.SCREEN_WIDTH), rng.uniform(0, settings.SCREEN_HEIGHT))
+        kind = i % 3
+        if kind == 0:
+            horde.append(EnemyTriangle(screen_dims, camera, rng=rng))
+        elif kind == 1:
+            horde.append(SquareEnemy(pos, *screen_dims, rng=rng))
+        else:
+            horde.append(HexagonEnemy(pos, *screen_dims, rng=rng))
+    return horde
+
+
+def main():
+    if not enemy_store.numpy_available():
+        print("NumPy is not installed, nothing to compare.")
+        return
+    target = pygame.Vector2(settings.SCREEN_WIDTH / 2, settings.SCREEN_HEIGHT / 2)
+    dt = 1 / settings.FPS
+    frame_budget_ms = 1000 / settings.FPS
+    print(f"{'enemies':>8} {'object ms':>10} {'numpy ms':>10} {'speedup':>8}   (frame budget {frame_budget_ms:.1f} ms)")
+    for count in ENEMY_COUNTS:
+        # Both paths move the same horde, built from a fresh stream for every count
+        horde = make_horde(count, random.Random(SEED))
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            for enemy in horde:
+                enemy.update(target, dt)
+        object_ms = (time.perf_counter() - start) / TICKS * 1000
+
+        store = enemy_store.EnemyStore()
+        for enemy in make_horde(count, random.Random(SEED)):
+            store.add(enemy)
+        start = time.perf_counter()
+        for _ in range(TICKS):
+            store.seek(target, dt)
+        numpy_ms = (time.perf_counter() - start) / TICKS * 1000
+
+        print(f"{count:>8} {object_ms:>10.3f} {numpy_ms:>10.3f} {object_ms / numpy_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench_memory.py
+# Bytes per entity for every enemy, projectile and pickup class, including their Vector2s, dicts and sets.
+# Only uses the constructors, so it can be run on an older checkout to compare before and after.
+# Run from the project root: python -m benchmarks.bench_memory [--count 10000]
+import gc
+import random
+import argparse
+import tracemalloc
+import pygame
+import settings
+from entities import (Particle, EnemyTriangle, SquareEnemy, HexagonEnemy, PickupParticle,
+                      BouncingParticle, BoomerangProjectile)
+
+
+def make_factories(rng):
+    camera = pygame.Vector2(0, 0)
+    screen_dims = (settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)
+    start = pygame.Vector2(100, 100)
+    target = pygame.Vector2(200, 150)
+    return {
+        "EnemyTriangle": lambda: EnemyTriangle(screen_dims, camera, rng=rng),
+        "SquareEnemy": lambda: SquareEnemy((rng.uniform(0, 500), rng.uniform(0, 500)), *screen_dims, rng=rng),
+        "HexagonEnemy": lambda: HexagonEnemy((rng.uniform(0, 500), rng.uniform(0, 500)), *screen_dims, rng=rng),
+        "Particle": lambda: Particle(start, target),
+        "BouncingParticle": lambda: BouncingParticle(start, target),
+        "BoomerangProjectile": lambda: BoomerangProjectile(start, target),
+        "PickupParticle": lambda: PickupParticle((rng.uniform(0, 500), rng.uniform(0, 500))),
+    }
+
+
+def bytes_per_entity(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Leave out the list holding them
+    list_bytes = entities.__sizeof__()
+    del entities
+    return (after - before - list_bytes) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory per entity.")
+    parser.add_argument("--count", type=int, default=10000, help="entities to create per class")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'class':<20} {'bytes/entity':>13} {'MB per ' + str(args.count):>14}")
+    for name, factory in make_factories(random.Random(1234)).items():
+        per_entity = bytes_per_entity(factory, args.count)
+        results[name] = per_entity
+        print(f"{name:<20} {per_entity:>13.0f} {per_entity * args.count / 2**20:>14.2f}")
+
+    # A horde in the same mix the spawner uses: 40% triangles, 35% squares, 25% hexagons
+    horde_bytes = args.count * (0.40 * results["EnemyTriangle"] + 0.35 * results["SquareEnemy"] + 0.25 * results["HexagonEnemy"])
+    print(f"{args.count} enemy horde: {horde_bytes / 2**20:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench_music.py
+# Startup time and memory of the background music: decoded into a pygame.mixer.Sound (the old way)
+# vs streamed with pygame.mixer.music (music.MusicPlayer).
+# Resident memory is read from /proc/self/statm, so the RSS column is only filled in on Linux.
+# Run from the project root: python -m benchmarks.bench_music [--runs 3]
+import os
+import time
+import argparse
+import pygame
+import audio
+import music
+
+
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure(start_music):
+    """(milliseconds, resident bytes added) to get the music going. The music object is kept alive while measuring."""
+    before = resident_bytes()
+    start = time.perf_counter()
+    keep_alive = start_music()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    after = resident_bytes()
+    added = after - before if before is not None and after is not None else None
+    return elapsed_ms, added, keep_alive
+
+
+def decoded_sound():
+    sound = pygame.mixer.Sound(audio.BACKGROUND_MUSIC_STAGE_1)
+    sound.play(loops=-1)
+    return sound
+
+
+def streamed_music():
+    player = music.MusicPlayer()
+    player.play(audio.BACKGROUND_MUSIC_STAGE_1)
+    return player
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background music: decoded Sound vs streamed.")
+    parser.add_argument("--runs", type=int, default=3, help="measurements per method, the fastest is shown")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init()
+    frequency, sample_format, channels = pygame.mixer.get_init()
+    print(f"{'method':<16} {'start ms':>9} {'RSS added MB':>13} {'PCM MB':>8}")
+    for name, start_music in (("decoded Sound", decoded_sound), ("streamed", streamed_music)):
+        best_ms = None
+        rss_added = None
+        pcm_bytes = 0
+        for _ in range(args.runs):
+            elapsed_ms, added, keep_alive = measure(start_music)
+            if best_ms is None or elapsed_ms < best_ms:
+                best_ms = elapsed_ms
+            rss_added = added if rss_added is None else min(rss_added, added)
+            if isinstance(keep_alive, pygame.mixer.Sound):
+                # Decoded size: every sample of every channel, in the mixer's format
+                pcm_bytes = keep_alive.get_length() * frequency * channels * abs(sample_format) // 8
+            keep_alive.stop()
+            del keep_alive
+        rss_text = f"{rss_added / 2**20:.1f}" if rss_added is not None else "n/a"
+        print(f"{name:<16} {best_ms:>9.1f} {rss_text:>13} {pcm_bytes / 2**20:>8.1f}")
+    pygame.mixer.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench_separation.py
+# Frame time of enemy-enemy separation against enemy count, brute force vs spatial hash.
+# Run from the project root: python -m benchmarks.bench_separation
+import random
+import time
+import pygame
+import settings
+import spatial
+
+ENEMY_COUNTS = [50, 100, 250, 500, 1000, 2500, 5000]
+BRUTE_FORCE_LIMIT = 1000 # The O(n^2) loop takes seconds per tick beyond this
+TICKS = 20
+COLLISION_RADII = [20 * 0.75, 18 * 0.75, settings.HEXAGON_ENEMY_RADIUS] # Triangle, square, hexagon
+
+
+class BenchEnemy:
+    # Only what the separation step reads and writes
+    def __init__(self, pos, collision_radius):
+        self.pos = pygame.Vector2(pos)
+        self.collision_radius = collision_radius
+
+
+def make_horde(count, rng):
+    # Enemies crowd around the player, so keep the density roughly constant as the horde grows
+    side = max(settings.SCREEN_HEIGHT, int((count * 900) ** 0.5))
+    return [BenchEnemy((rng.uniform(0, side), rng.uniform(0, side)), rng.choice(COLLISION_RADII))
+            for _ in range(count)]
+
+
+def resolve_bruteforce(enemies):
+    # The original nested loop from main.py
+    for i, enemy1 in enumerate(enemies):
+        for j in range(i + 1, len(enemies)):
+            spatial._separate_pair(enemy1, enemies[j])
+
+
+def time_ticks(step, enemies):
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        step(enemies)
+    return (time.perf_counter() - start) / TICKS * 1000
+
+
+def main():
+    rng = random.Random(1234)
+    grid = spatial.SpatialHash()
+    frame_budget_ms = 1000 / settings.FPS
+    print(f"{'enemies':>8} {'brute ms':>10} {'hash ms':>10} {'speedup':>8}   (frame budget {frame_budget_ms:.1f} ms)")
+    for count in ENEMY_COUNTS:
+        hash_ms = time_ticks(lambda e: spatial.resolve_enemy_overlaps(e, grid), make_horde(count, rng))
+        if count <= BRUTE_FORCE_LIMIT:
+            brute_ms = time_ticks(resolve_bruteforce, make_horde(count, rng))
+            print(f"{count:>8} {brute_ms:>10.2f} {hash_ms:>10.2f} {brute_ms / hash_ms:>7.1f}x")
+        else:
+            print(f"{count:>8} {'-':>10} {hash_ms:>10.2f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
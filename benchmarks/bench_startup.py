@@ -0,0 +1,48 @@
+# bench_startup.py
+# Cold start of the game: import, first frame (the loading screen) and time-to-interactive (the first frame
+# of the character select screen), each run in a fresh process with main.py --startup-report.
+# Run from the project root: python -m benchmarks.bench_startup [--runs 5]
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+MARK_PATTERN = re.compile(r"(\w+) (\d+) ms")
+
+
+def run_once():
+    """{mark: ms} from one game start, plus "process" for the whole run including interpreter start and exit."""
+    env = dict(os.environ)
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "main.py", "--startup-report"], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    process_ms = (time.perf_counter() - start) * 1000
+    marks = {}
+    for line in output.splitlines():
+        if line.startswith("Startup:"):
+            marks = {name: int(ms) for name, ms in MARK_PATTERN.findall(line)}
+        elif line.startswith("Slowest assets:"):
+            print(f"  {line}")
+    marks["process"] = process_ms
+    return marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="game starts to measure")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'mark':<12} {'min ms':>8} {'median ms':>10} {'max ms':>8}")
+    for name in runs[0]:
+        samples = [marks[name] for marks in runs]
+        print(f"{name:<12} {min(samples):>8.0f} {statistics.median(samples):>10.0f} {max(samples):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench_targeting.py
+# Cost of aiming for one tick against enemy count: a linear scan per query (the old min(enemies, key=...))
+# vs targeting.py's queries on the enemy hit grid. The game builds that grid for collisions every tick
+# anyway, so building it is not timed. Shows one nearest-enemy query (what the current weapons do),
+# several queries from different points and a k-nearest query for multi-target weapons.
+# Run from the project root: python -m benchmarks.bench_targeting
+import time
+import heapq
+import random
+import pygame
+import settings
+import spatial
+import targeting
+
+ENEMY_COUNTS = [50, 250, 1000, 5000]
+TICKS = 50
+QUERIES = [("1 nearest", 1, 1), ("8 nearest", 8, 1), ("k=8 nearest", 1, 8)] # (name, queries per tick, k)
+
+
+class BenchEnemy:
+    # Only what targeting and the hit grid read
+    def __init__(self, entity_id, pos):
+        self.entity_id = entity_id
+        self.pos = pygame.Vector2(pos)
+
+
+def make_horde(count, rng):
+    # Enemies crowd around the player, so keep the density roughly constant as the horde grows
+    side = max(settings.SCREEN_HEIGHT, int((count * 900) ** 0.5))
+    return [BenchEnemy(i, (rng.uniform(-side / 2, side / 2), rng.uniform(-side / 2, side / 2))) for i in range(count)]
+
+
+def scan_tick(enemies, query_points, k):
+    for pos in query_points:
+        if k == 1:
+            min(enemies, key=lambda e: (e.pos - pos).length_squared())
+        else:
+            heapq.nsmallest(k, enemies, key=lambda e: (e.pos - pos).length_squared())
+
+
+def grid_tick(grid, enemies, query_points, k):
+    for pos in query_points:
+        targeting.k_nearest(grid, enemies, pos, k)
+
+
+def time_ticks(tick):
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        tick()
+    return (time.perf_counter() - start) / TICKS * 1000
+
+
+def main():
+    rng = random.Random(1234)
+    grid = spatial.SpatialHash(cell_size=2 * settings.HEXAGON_ENEMY_RADIUS) # Like Simulation.enemy_hit_grid
+    print(f"{'enemies':>8} {'queries':<13} {'scan ms':>9} {'grid ms':>9} {'speedup':>8}")
+    for count in ENEMY_COUNTS:
+        enemies = make_horde(count, rng)
+        grid.rebuild(enemies)
+        for name, query_count, k in QUERIES:
+            # The player and points around it, e.g. where a multi-target weapon's shots are
+            query_points = [pygame.Vector2(rng.uniform(-100, 100), rng.uniform(-100, 100)) for _ in range(query_count)]
+            scan_ms = time_ticks(lambda: scan_tick(enemies, query_points, k))
+            grid_ms = time_ticks(lambda: grid_tick(grid, enemies, query_points, k))
+            print(f"{count:>8} {name:<13} {scan_ms:>9.3f} {grid_ms:>9.3f} {scan_ms / grid_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
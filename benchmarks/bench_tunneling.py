@@ -0,0 +1,100 @@
+# bench_tunneling.py
+# Hit rate of projectiles fired straight at a small EnemyTriangle at several tick lengths, testing only
+# the end position of every tick (the old collision) vs the swept test over the whole move
+# (spatial.swept_hits). Every shot's path passes within hit range, so the swept column must read 100%.
+# Also prints the narrow-phase cost per projectile-enemy pair of each test.
+# Run from the project root: python -m benchmarks.bench_tunneling [--shots 2000]
+import time
+import random
+import argparse
+import pygame
+import settings
+import spatial
+from entities import Particle, BouncingParticle, BoomerangProjectile, EnemyTriangle
+
+TICK_LENGTHS = [("60 Hz", 1 / 60), ("30 Hz", 1 / 30), ("20 Hz", 1 / 20), ("100 ms hitch", 0.1), ("250 ms hitch", 0.25)]
+PROJECTILES = [("standard", Particle), ("bouncing", BouncingParticle), ("boomerang", BoomerangProjectile)]
+SHOT_DISTANCE = 200 # From the muzzle to the enemy, before the boomerang turns back
+# A camera rectangle large enough that bouncing shots never reach its edges
+CAMERA_OFFSET = pygame.Vector2(-2000, -2000)
+CAMERA_SIZE = (4000, 4000)
+SEED = 1234
+
+
+def fire(projectile_class, start, target):
+    return projectile_class(start, target)
+
+
+def advance(projectile, dt):
+    if isinstance(projectile, BoomerangProjectile):
+        projectile.update(dt, None)
+    elif isinstance(projectile, BouncingParticle):
+        projectile.update(dt, CAMERA_SIZE[0], CAMERA_SIZE[1], CAMERA_OFFSET)
+    else:
+        projectile.update(dt)
+
+
+def shot_hits(projectile_class, enemy, dt, rng):
+    """(end position test hit, swept test hit) for one shot whose path passes the enemy within hit range."""
+    probe = fire(projectile_class, (0, 0), (1, 0))
+    hit_range = probe.radius + enemy.hit_radius
+    # Random miss distance across the whole hit range, and a random muzzle distance so the ticks land at
+    # every phase relative to the enemy
+    offset = rng.uniform(-0.99, 0.99) * hit_range
+    start = pygame.Vector2(enemy.pos.x - SHOT_DISTANCE - rng.uniform(0, probe.speed * dt), enemy.pos.y + offset)
+    projectile = fire(projectile_class, start, start + pygame.Vector2(1, 0))
+    point_hit = swept_hit = False
+    while projectile.pos.x < enemy.pos.x + hit_range:
+        advance(projectile, dt)
+        if (projectile.pos - enemy.pos).length_squared() < hit_range ** 2:
+            point_hit = True
+        if spatial.swept_hits(projectile.prev_pos, projectile.pos, projectile.radius, (enemy,)):
+            swept_hit = True
+    return point_hit, swept_hit
+
+
+def test_cost_ns(enemy, rng, shots=1000, candidates=10, repeats=20):
+    """ns per projectile-enemy pair in the narrow phase: end position only vs swept."""
+    moves = [(pygame.Vector2(rng.uniform(-50, 50), rng.uniform(-50, 50)),
+              pygame.Vector2(rng.uniform(-50, 50), rng.uniform(-50, 50))) for _ in range(shots)]
+    nearby = [enemy] * candidates # What the broad phase hands each projectile
+    radius = 4
+    tests = shots * candidates * repeats
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        for prev_pos, pos in moves:
+            for other in nearby:
+                (pos - other.pos).length_squared() < (radius + other.hit_radius) ** 2
+    point_ns = (time.perf_counter_ns() - start) / tests
+    start = time.perf_counter_ns()
+    for _ in range(repeats):
+        for prev_pos, pos in moves:
+            spatial.swept_hits(prev_pos, pos, radius, nearby)
+    swept_ns = (time.perf_counter_ns() - start) / tests
+    return point_ns, swept_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Projectile tunneling, end position vs swept collision.")
+    parser.add_argument("--shots", type=int, default=2000, help="shots per projectile type and tick length")
+    args = parser.parse_args()
+
+    rng = random.Random(SEED)
+    enemy = EnemyTriangle((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), pygame.Vector2(), rng=rng)
+    enemy.pos = pygame.Vector2(0, 0)
+    print(f"{'projectile':<11} {'speed':>6} {'tick':<13} {'end pos hits':>13} {'swept hits':>11}")
+    for name, projectile_class in PROJECTILES:
+        speed = fire(projectile_class, (0, 0), (1, 0)).speed
+        for tick_name, dt in TICK_LENGTHS:
+            point_hits = swept_hits = 0
+            for _ in range(args.shots):
+                point_hit, swept_hit = shot_hits(projectile_class, enemy, dt, rng)
+                point_hits += point_hit
+                swept_hits += swept_hit
+            print(f"{name:<11} {speed:>6.0f} {tick_name:<13} {point_hits / args.shots:>13.1%} {swept_hits / args.shots:>11.1%}")
+    point_ns, swept_ns = test_cost_ns(enemy, rng)
+    print(f"Narrow phase per projectile-enemy pair: end position {point_ns:.0f} ns, swept {swept_ns:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
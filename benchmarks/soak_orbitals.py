@@ -0,0 +1,70 @@
+# soak_orbitals.py
+# Long headless session with several Orbital Guards in a dense horde, checking that the per-enemy hit
+# cooldowns stay bounded. Every few minutes of game time it prints the cooldown entries held by all
+# orbitals (and their expiry queues), how many entries a dict that never forgets dead enemies would hold by
+# then (the old OrbitalWeapon.last_hit_times), and the process's resident memory (Linux only).
+# Run from the project root: python -m benchmarks.soak_orbitals [--minutes 60] [--orbitals 4]
+import os
+import time
+import argparse
+import settings
+import simulation
+
+REPORT_MINUTES = 5
+SEED = 1234
+
+
+def resident_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orbital weapon hit cooldown soak test.")
+    parser.add_argument("--minutes", type=float, default=60, help="game time to simulate")
+    parser.add_argument("--orbitals", type=int, default=4, help="Orbital Guards bought at the start")
+    parser.add_argument("--max-enemies", type=int, default=300, help="horde size cap")
+    args = parser.parse_args()
+
+    settings.INITIAL_PLAYER_HEALTH = 10**9 # The session must not end early
+    sim = simulation.Simulation(verbose=False, seed=SEED)
+    sim.select_archetype(simulation.find_archetype("nova_burst"))
+    orbital_item = next(item for item in simulation.MASTER_STORE_ITEMS if item["id"] == "orbital_weapon")
+    for _ in range(args.orbitals):
+        sim.purchase_store_item(orbital_item)
+    # What the old dict would hold: every enemy an orbital ever hit, per orbital
+    ever_hit = [set() for _ in sim.active_orbital_weapons]
+    for orbital, hit_ids in zip(sim.active_orbital_weapons, ever_hit):
+        track_hit = orbital.hit_cooldowns.hit
+
+        def hit(target_id, now, track_hit=track_hit, hit_ids=hit_ids):
+            hit_ids.add(target_id)
+            track_hit(target_id, now)
+        orbital.hit_cooldowns.hit = hit
+
+    total_ticks = int(args.minutes * 60 * settings.SIMULATION_TICK_RATE)
+    report_ticks = REPORT_MINUTES * 60 * settings.SIMULATION_TICK_RATE
+    print(f"{'minute':>6} {'enemies':>8} {'kills':>7} {'cooldowns':>10} {'queued':>7} {'old dict':>9} {'RSS MB':>7}")
+    start = time.perf_counter()
+    for tick in range(1, total_ticks + 1):
+        if sim.store_active:
+            sim.close_store() # Keep the same loadout for the whole session
+        sim.max_enemies = args.max_enemies
+        sim.enemy_spawn_interval = 0.1
+        sim.step(0)
+        if tick % report_ticks == 0 or tick == total_ticks:
+            orbitals = sim.active_orbital_weapons
+            tracked = sum(len(orbital.hit_cooldowns) for orbital in orbitals)
+            queued = sum(len(orbital.hit_cooldowns.queue) for orbital in orbitals)
+            rss = resident_mb()
+            rss_text = f"{rss:.1f}" if rss is not None else "n/a"
+            print(f"{tick / settings.SIMULATION_TICK_RATE / 60:>6.0f} {len(sim.enemies):>8} {sim.kill_count:>7} "
+                  f"{tracked:>10} {queued:>7} {sum(map(len, ever_hit)):>9} {rss_text:>7}")
+    print(f"Simulated {args.minutes:g} minutes in {time.perf_counter() - start:.0f} s")
+
+
+if __name__ == "__main__":
+    main()
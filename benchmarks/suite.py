@@ -0,0 +1,341 @@
+# suite.py
+# Per-subsystem microbenchmarks on the real entity classes and draw functions, run headless.
+# Every case is timed per iteration at several entity counts and the percentiles are written to JSON,
+# so two result files from before and after a change can be compared case by case.
+# Run from the project root: python -m benchmarks.suite [--cases separation hud_text] [--output results.json]
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import pygame
+import settings
+import spatial
+import simulation
+import trail
+import main as game # Draw functions and loaded assets, no side effects on import
+from entities import (Particle, EnemyTriangle, SquareEnemy, HexagonEnemy, PickupParticle,
+                      BouncingParticle, BoomerangProjectile)
+
+RESULTS_VERSION = 1
+DEFAULT_ITERATIONS = 100
+WARMUP_ITERATIONS = 5
+PERCENTILES = (50, 90, 99)
+SEED = 1234
+
+
+# --- Helpers ---
+def percentile(sorted_values, pct):
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def make_sim(archetype_id="standard"):
+    sim = simulation.Simulation(tile_size=(game.TILE_WIDTH, game.TILE_HEIGHT), verbose=False, seed=SEED)
+    sim.select_archetype(simulation.find_archetype(archetype_id))
+    return sim
+
+
+def horde_side(count):
+    # Enemies crowd around the player, so keep the density roughly constant as the horde grows
+    return max(settings.SCREEN_HEIGHT, int((count * 900) ** 0.5))
+
+
+def make_horde(count, center, rng):
+    """A mix of all three enemy types scattered around center."""
+    camera = pygame.Vector2(center) - pygame.Vector2(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT) / 2
+    screen_dims = (settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)
+    half_side = horde_side(count) / 2
+    horde = []
+    for i in range(count):
+        pos = pygame.Vector2(center.x + rng.uniform(-half_side, half_side), center.y + rng.uniform(-half_side, half_side))
+        kind = i % 3
+        if kind == 0:
+            enemy = EnemyTriangle(screen_dims, camera, rng=rng)
+            enemy.pos = pos # Triangles spawn on a screen edge, move them into the crowd
+        elif kind == 1:
+            enemy = SquareEnemy(pos, *screen_dims, rng=rng)
+        else:
+            enemy = HexagonEnemy(pos, *screen_dims, rng=rng)
+        horde.append(enemy)
+    return horde
+
+
+# --- Cases ---
+# Each case takes (count, rng) and returns (prepare, run). prepare() restores the state before
+# every iteration and is not timed (None if nothing needs restoring), run() is the timed work.
+
+def case_enemy_update(count, rng):
+    target = pygame.Vector2(0, 0)
+    horde = make_horde(count, target, rng)
+    dt = simulation.FIXED_DT
+
+    def run():
+        for enemy in horde:
+            enemy.update(target, dt)
+    return None, run
+
+
+def case_separation(count, rng):
+    horde = make_horde(count, pygame.Vector2(0, 0), rng)
+    start_positions = [enemy.pos.copy() for enemy in horde]
+    grid = spatial.SpatialHash()
+    separation_rng = random.Random(SEED)
+
+    def prepare():
+        # Separation pushes the crowd apart, start every iteration from the same overlaps
+        for enemy, pos in zip(horde, start_positions):
+            enemy.pos = pos.copy()
+
+    def run():
+        spatial.resolve_enemy_overlaps(horde, grid, separation_rng)
+    return prepare, run
+
+
+def case_projectile_collision(count, rng):
+    # count enemies against count projectiles (standard, bouncing and boomerang), all around the player
+    sim = make_sim()
+    center = sim.player_pos
+    side = horde_side(count)
+    seed = rng.random()
+
+    def prepare():
+        prepare_rng = random.Random(seed) # Same layout every iteration
+        sim.enemies[:] = make_horde(count, center, prepare_rng)
+        sim.pickup_particles.clear()
+        sim.particles.clear()
+        sim.boomerang_projectiles.clear()
+        for i in range(count):
+            pos = pygame.Vector2(center.x + prepare_rng.uniform(-side / 2, side / 2),
+                                 center.y + prepare_rng.uniform(-side / 2, side / 2))
+            target = pos + pygame.Vector2(0, -1)
+            kind = i % 4
+            if kind == 0:
+                sim.boomerang_projectiles.append(BoomerangProjectile(pos, target))
+            elif kind == 1:
+                sim.particles.append(BouncingParticle(pos, target))
+            else:
+                sim.particles.append(Particle(pos, target))
+
+    def run():
+        sim._collide_weapons_with_enemies(sim.total_game_time_seconds)
+    return prepare, run
+
+
+def case_pickup_collection(count, rng):
+    sim = make_sim()
+    sim.max_pickups_for_full_bar = float("inf") # Never open the store
+    center = sim.player_pos
+    half_side = horde_side(count) / 2
+    pickups = []
+    for _ in range(count):
+        pos = (center.x + rng.uniform(-half_side, half_side), center.y + rng.uniform(-half_side, half_side))
+        pickups.append(PickupParticle(pos))
+
+    def prepare():
+        sim.pickup_particles[:] = pickups
+        sim.pickup_grid.rebuild(pickups)
+
+    def run():
+        sim._collect_pickups()
+    return prepare, run
+
+
+def case_tile_background(count, rng):
+    # count is ignored, the number of visible tiles only depends on the screen and tile size
+    surface = pygame.display.get_surface()
+    world_w = settings.WORLD_TILES_X * max(game.TILE_WIDTH, 1)
+    world_h = settings.WORLD_TILES_Y * max(game.TILE_HEIGHT, 1)
+    camera = pygame.Vector2(0, 0)
+
+    def run():
+        # Pan diagonally so tile boundaries keep crossing the screen
+        camera.x = (camera.x + 7.3) % max(world_w - surface.get_width(), 1)
+        camera.y = (camera.y + 4.1) % max(world_h - surface.get_height(), 1)
+        game.draw_tiled_background(surface, camera)
+    return None, run
+
+
+def case_enemy_draw(count, rng):
+    surface = pygame.display.get_surface()
+    sim = make_sim()
+    # Keep the horde on screen so every enemy is actually drawn
+    half_w = settings.SCREEN_WIDTH / 2
+    half_h = settings.SCREEN_HEIGHT / 2
+    sim.enemies[:] = make_horde(count, sim.player_pos, rng)
+    for enemy in sim.enemies:
+        enemy.pos.update(sim.player_pos.x + rng.uniform(-half_w, half_w), sim.player_pos.y + rng.uniform(-half_h, half_h))
+        if hasattr(enemy, "take_damage") and rng.random() < 0.3:
+            enemy.take_damage()
+
+    def run():
+        game.draw_enemies(surface, sim)
+    return None, run
+
+
+def case_projectile_draw(count, rng):
+    # count on-screen objects, half pickups and half projectiles of every kind
+    surface = pygame.display.get_surface()
+    sim = make_sim()
+    half_w = settings.SCREEN_WIDTH / 2
+    half_h = settings.SCREEN_HEIGHT / 2
+    for i in range(count):
+        pos = pygame.Vector2(sim.player_pos.x + rng.uniform(-half_w, half_w), sim.player_pos.y + rng.uniform(-half_h, half_h))
+        kind = i % 8
+        if kind < 3:
+            sim.pickup_particles.append(PickupParticle(pos))
+        elif kind == 3:
+            sim.pickup_particles.append(PickupParticle(pos, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH,
+                                                       height=settings.SPECIAL_PICKUP_HEIGHT, value=settings.SPECIAL_PICKUP_VALUE))
+        elif kind == 4:
+            sim.boomerang_projectiles.append(BoomerangProjectile(pos, pos + pygame.Vector2(0, -1)))
+        elif kind == 5:
+            sim.particles.append(BouncingParticle(pos, pos + pygame.Vector2(0, -1)))
+        else:
+            sim.particles.append(Particle(pos, pos + pygame.Vector2(0, -1), color=settings.LIGHT_SKY_BLUE))
+
+    def run():
+        projectile_sprites = game._projectile_sprites()
+        projectile_sprites.draw_pickups(surface, sim.pickup_particles, sim.camera_offset)
+        projectile_sprites.draw_particles(surface, sim.particles, sim.camera_offset)
+        projectile_sprites.draw_particles(surface, sim.boomerang_projectiles, sim.camera_offset)
+    return None, run
+
+
+def case_trail(count, rng):
+    # count is the trail length (settings.MAX_TRAIL_LENGTH in the game)
+    surface = pygame.display.get_surface()
+    sim = make_sim()
+    sim.player_trail_positions = trail.TrailBuffer(count)
+    for i in range(count):
+        sim.player_trail_positions.append(sim.player_pos + pygame.Vector2(-i * 4, i * 2))
+
+    def run():
+        game.draw_player_trail(surface, sim)
+    return None, run
+
+
+def case_hud_text(count, rng):
+    # count is ignored, the HUD always has the same elements
+    surface = pygame.display.get_surface()
+    sim = make_sim()
+
+    def run():
+        # Advance like a running game so the timer and kill counter text change now and then
+        sim.total_game_time_seconds += simulation.FIXED_DT
+        sim.kill_count += 1 if rng.random() < 0.05 else 0
+        game.draw_hud(surface, sim)
+    return None, run
+
+
+# name: (case function, default counts, whether the count changes the work)
+CASES = {
+    "enemy_update": (case_enemy_update, [100, 1000, 5000], True),
+    "separation": (case_separation, [100, 1000, 5000], True),
+    "projectile_collision": (case_projectile_collision, [100, 500, 2000], True),
+    "pickup_collection": (case_pickup_collection, [100, 1000, 5000], True),
+    "enemy_draw": (case_enemy_draw, [100, 1000, 5000], True),
+    "projectile_draw": (case_projectile_draw, [500, 2000], True),
+    "tile_background": (case_tile_background, [1], False),
+    "trail": (case_trail, [settings.MAX_TRAIL_LENGTH, 30], True),
+    "hud_text": (case_hud_text, [1], False),
+}
+
+
+# --- Runner ---
+def time_case(prepare, run, iterations):
+    for _ in range(WARMUP_ITERATIONS):
+        if prepare:
+            prepare()
+        run()
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(iterations):
+        if prepare:
+            prepare()
+        start = perf_counter_ns()
+        run()
+        samples.append((perf_counter_ns() - start) / 1e6)
+    return samples
+
+
+def summarize(name, count, samples):
+    ordered = sorted(samples)
+    result = {
+        "case": name,
+        "count": count,
+        "iterations": len(samples),
+        "mean_ms": sum(samples) / len(samples),
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = percentile(ordered, pct)
+    return result
+
+
+def setup_display():
+    # Draw cases use the real assets and fonts, which need a (dummy) display for convert()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    pygame.mixer.init()
+    pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    game.load_assets()
+    game.load_background()
+    game.load_fonts()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-subsystem microbenchmarks.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES),
+                        help="cases to run (default: all)")
+    parser.add_argument("--counts", nargs="+", type=int, default=None,
+                        help="entity counts, overriding each case's defaults")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="timed iterations per count")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_display()
+
+    results = []
+    frame_budget_ms = 1000 / settings.FPS
+    print(f"{'case':<22} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}   (frame budget {frame_budget_ms:.1f} ms)")
+    for name in args.cases:
+        case, default_counts, scales = CASES[name]
+        counts = args.counts if args.counts and scales else default_counts
+        for count in counts:
+            prepare, run = case(count, random.Random(f"{SEED}:{name}:{count}"))
+            result = summarize(name, count if scales else None, time_case(prepare, run, args.iterations))
+            results.append(result)
+            print(f"{name:<22} {count if scales else '-':>6} {result['mean_ms']:>9.3f} {result['p50_ms']:>9.3f} "
+                  f"{result['p90_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
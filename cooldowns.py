@@ -0,0 +1,42 @@
+# cooldowns.py
+# Per-target hit cooldowns, e.g. an orbital weapon hitting each enemy at most once every few seconds, that
+# only remember targets still on cooldown. Targets are keyed by a stable id (enemies' entity_id, which is
+# never reused, unlike id() of a dead enemy).
+# Every hit is queued with its time. The cooldown is the same for every entry, so entries expire in the
+# order they were queued and expire() only ever pops from the front of the queue. forget() drops a target
+# straight away, e.g. when the enemy dies; its queue entry is skipped when it comes up.
+from collections import deque
+
+
+class HitCooldowns:
+    def __init__(self, cooldown):
+        self.cooldown = cooldown # Seconds
+        self.last_hits = {} # target id: time of its last hit, only while on cooldown
+        self.queue = deque() # (time of the hit, target id), oldest first
+
+    def __len__(self):
+        return len(self.last_hits)
+
+    def ready(self, target_id, now):
+        last_hit = self.last_hits.get(target_id)
+        return last_hit is None or now - last_hit > self.cooldown
+
+    def hit(self, target_id, now):
+        self.last_hits[target_id] = now
+        self.queue.append((now, target_id))
+
+    def forget(self, target_id):
+        self.last_hits.pop(target_id, None)
+
+    def expire(self, now):
+        """Drops every target whose cooldown is over."""
+        queue = self.queue
+        last_hits = self.last_hits
+        while queue and now - queue[0][0] > self.cooldown:
+            hit_time, target_id = queue.popleft()
+            if last_hits.get(target_id) == hit_time: # Not hit again or forgotten since
+                del last_hits[target_id]
+
+    def clear(self):
+        self.last_hits.clear()
+        self.queue.clear()
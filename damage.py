@@ -0,0 +1,39 @@
+# damage.py
+# Per-tick buffer of weapon hits on enemies. The collision passes only record hits. The simulation then
+# resolves the whole tick at once (Simulation._resolve_damage): it applies each enemy's damage, drops the
+# pickups of the killed enemies and removes them all from the enemy list in one pass.
+# record() keeps track of the damage still to be applied, so it can tell the moment a hit dooms an enemy.
+# A doomed enemy is listed in kills exactly once, however many more hits it takes in the same tick.
+
+
+class DamageBuffer:
+    def __init__(self):
+        self.pending = {} # enemy: damage recorded this tick, not applied yet
+        self.kills = [] # Doomed enemies, in the order they were doomed (drops are rolled in this order)
+        self.hit_sound = False # Whether a hit this tick plays the enemy hit sound
+
+    def __bool__(self):
+        return bool(self.pending)
+
+    def record(self, enemy, amount, hit_sound=False):
+        """Records amount of damage on enemy. True if this hit dooms it."""
+        pending = self.pending
+        already_doomed = enemy in pending and self.doomed(enemy)
+        pending[enemy] = pending.get(enemy, 0) + amount
+        if already_doomed or not self.doomed(enemy):
+            self.hit_sound |= hit_sound
+            return False
+        self.hit_sound = True # A kill always plays it
+        self.kills.append(enemy)
+        return True
+
+    def doomed(self, enemy):
+        # Enemies without health die to any hit
+        if not hasattr(enemy, "take_damage"):
+            return enemy in self.pending
+        return enemy.health - self.pending.get(enemy, 0) <= 0
+
+    def clear(self):
+        self.pending.clear()
+        self.kills.clear()
+        self.hit_sound = False
@@ -0,0 +1,147 @@
+# enemy_store.py
+# Optional structure-of-arrays backend for enemies. Positions, speeds, health and type ids live
+# in contiguous NumPy arrays so the seek-the-player step runs as one vectorized call, while the
+# enemy objects become thin views over their slot (used for drawing and collision code).
+# Needs NumPy; the game falls back to the per-object path when it isn't installed.
+import pygame
+from entities import EnemyTriangle, SquareEnemy, HexagonEnemy
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ENEMY_TYPE_IDS = {EnemyTriangle: 0, SquareEnemy: 1, HexagonEnemy: 2}
+
+
+def numpy_available():
+    return numpy is not None
+
+
+class _StoredEnemyView:
+    # Mixed in front of an enemy class while the enemy lives in a store.
+    # Attribute reads and writes go straight to the store's arrays.
+    # No slots of its own, so swapping __class__ between an enemy class and its view keeps the layout.
+    __slots__ = ()
+
+    @property
+    def pos(self):
+        x, y = self._store.positions[self._slot]
+        return pygame.Vector2(float(x), float(y))
+
+    @pos.setter
+    def pos(self, value):
+        self._store.positions[self._slot] = (value[0], value[1])
+
+    @property
+    def speed(self):
+        return float(self._store.speeds[self._slot])
+
+    @speed.setter
+    def speed(self, value):
+        self._store.speeds[self._slot] = value
+
+    @property
+    def health(self):
+        return float(self._store.health[self._slot])
+
+    @health.setter
+    def health(self, value):
+        self._store.health[self._slot] = value
+
+
+_view_classes = {} # enemy class: stored view subclass
+
+
+def _view_class_for(enemy_class):
+    view_class = _view_classes.get(enemy_class)
+    if view_class is None:
+        view_class = type("Stored" + enemy_class.__name__, (_StoredEnemyView, enemy_class), {"__slots__": ()})
+        _view_classes[enemy_class] = view_class
+    return view_class
+
+
+class EnemyStore:
+    def __init__(self, capacity=256):
+        if numpy is None:
+            raise RuntimeError("EnemyStore requires NumPy")
+        self.count = 0
+        self.positions = numpy.zeros((capacity, 2), dtype=numpy.float64)
+        self.speeds = numpy.zeros(capacity, dtype=numpy.float64)
+        self.health = numpy.zeros(capacity, dtype=numpy.float64)
+        self.type_ids = numpy.zeros(capacity, dtype=numpy.int8)
+        self.views = [] # views[slot] is the enemy object bound to that slot
+
+    def _grow(self):
+        capacity = len(self.speeds) * 2
+        self.positions = numpy.resize(self.positions, (capacity, 2))
+        self.speeds = numpy.resize(self.speeds, capacity)
+        self.health = numpy.resize(self.health, capacity)
+        self.type_ids = numpy.resize(self.type_ids, capacity)
+
+    def add(self, enemy):
+        """Moves the enemy's state into the arrays and turns the enemy into a view over its slot."""
+        if self.count == len(self.speeds):
+            self._grow()
+        slot = self.count
+        enemy_class = type(enemy)
+        self.positions[slot] = (enemy.pos.x, enemy.pos.y)
+        self.speeds[slot] = enemy.speed
+        self.health[slot] = getattr(enemy, "health", 1) # Triangles die in one hit
+        self.type_ids[slot] = ENEMY_TYPE_IDS[enemy_class]
+
+        # The view properties shadow the enemy's own pos/speed/health slots from here on
+        enemy._store = self
+        enemy._slot = slot
+        enemy.__class__ = _view_class_for(enemy_class)
+        self.views.append(enemy)
+        self.count += 1
+        return enemy
+
+    def remove(self, enemy):
+        """Frees the enemy's slot by moving the last enemy into it."""
+        if getattr(enemy, "_store", None) is not self:
+            return
+        slot = enemy._slot
+        last = self.count - 1
+        # Copy the state back so the object stays usable after it leaves the store
+        pos = enemy.pos
+        speed = enemy.speed
+        health = enemy.health
+        if slot != last:
+            self.positions[slot] = self.positions[last]
+            self.speeds[slot] = self.speeds[last]
+            self.health[slot] = self.health[last]
+            self.type_ids[slot] = self.type_ids[last]
+            moved = self.views[last]
+            moved._slot = slot
+            self.views[slot] = moved
+        self.views.pop()
+        self.count = last
+
+        enemy_class = type(enemy).__mro__[2] # Skip the view class and the mixin
+        enemy.__class__ = enemy_class
+        del enemy._store
+        del enemy._slot
+        enemy.pos = pos
+        enemy.speed = speed
+        if enemy_class is not EnemyTriangle:
+            enemy.health = health
+
+    def clear(self):
+        for enemy in self.views[::-1]:
+            self.remove(enemy)
+
+    def seek(self, target_pos, dt):
+        """Moves every enemy towards target_pos at its own speed in one vectorized step."""
+        count = self.count
+        if count == 0:
+            return
+        positions = self.positions[:count]
+        # The same operations in the same order as enemy.update() with Vector2 (also float64), so both paths
+        # round identically and a replay gives the same state hashes with or without the store
+        delta = numpy.array((target_pos[0], target_pos[1])) - positions
+        distance = numpy.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+        # Enemies already on the target stay put (same as the per-object length_squared() > 0 check)
+        direction = numpy.divide(delta, distance[:, None], out=numpy.zeros_like(delta), where=distance[:, None] > 0)
+        positions += direction * self.speeds[:count, None] * dt
@@ -0,0 +1,456 @@
+# entities.py
+# Game entity classes: projectiles, enemies, orbital weapons and pickups.
+# Kept free of display setup so they can be imported without opening a window.
+# Every class declares __slots__ so the thousands of live enemies, projectiles and pickups carry no
+# per-instance __dict__. Values that never differ between instances are class attributes.
+import pygame
+import random
+import math # For hexagon drawing
+import itertools
+import settings
+import cooldowns
+
+# Enemies get a stable id that is never reused (id() of a dead enemy can be), e.g. for per-enemy hit cooldowns
+_entity_ids = itertools.count(1)
+
+# --- Particle shoot Setup ---
+class Particle:
+    __slots__ = ("pos", "prev_pos", "direction", "radius", "color", "speed")
+
+    # Constructor arguments are the ones of reset(), which also re-initialises pooled particles (see pool.py)
+    def __init__(self, *args, **kwargs):
+        # The vectors are created once and updated in place by every reset()
+        self.pos = pygame.Vector2()
+        self.prev_pos = pygame.Vector2() # Position before the last update, collisions test the move in between
+        self.direction = pygame.Vector2()
+        self.reset(*args, **kwargs)
+
+    def reset(self, start_pos, target_pos, color=settings.WHITE, speed=250, radius=4):
+        # start_pos may be a Vector2 or a tuple/list
+        self.pos.update(start_pos)
+        self.prev_pos.update(start_pos)
+        self.radius = radius
+        self.color = color
+        self.speed = speed
+        # Calculate direction towards the target's position at the moment of firing
+        direction = self.direction
+        direction.update(target_pos)
+        direction -= self.pos
+        if direction.length_squared() > 0:
+            direction.normalize_ip()
+        else:
+            direction.update(0, -1) # Default upwards if target is at start_pos
+
+    def update(self, dt, screen_width=None, screen_height=None, camera_offset=None, world_bounds=None):
+        self.prev_pos.update(self.pos)
+        self.pos += self.direction * self.speed * dt
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.pos - camera_offset
+        pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
+
+    def is_alive(self, screen_width, screen_height, camera_offset, world_bounds=None):
+        # For standard particles, alive means on-screen (relative to camera)
+        screen_pos = self.pos - camera_offset
+        on_screen = not (screen_pos.x < -self.radius or screen_pos.x > screen_width + self.radius or
+                         screen_pos.y < -self.radius or screen_pos.y > screen_height + self.radius)
+        return on_screen
+
+# --- Enemy Triangle Setup ---
+class EnemyTriangle:
+    __slots__ = ("entity_id", "pos", "speed", "lod_owed", "_store", "_slot") # _store/_slot are set by enemy_store.EnemyStore
+    height = 20  # Length from tip to middle of base
+    base_width = 15  # Full width of the base
+    color = settings.OLIVE_DRAB
+    collision_radius = height * 0.75 # Radius for enemy-enemy collision
+    hit_radius = height * 0.5 # Approx radius for triangle tip area, used by projectiles
+    player_hit_radius = height * 0.4 # pos is the tip, so use a smaller radius against the player
+
+    def __init__(self, screen_dims, camera_world_tl_pos, rng=random):
+        # rng is anything with the random module's interface, e.g. a seeded random.Random
+        self.entity_id = next(_entity_ids)
+        self.speed = rng.uniform(70, 110)  # Pixels per second
+
+        # Spawn on a random edge, with the tip (self.pos) starting off-screen
+        edge = rng.choice(["top", "bottom", "left", "right"])
+        margin = self.height # Ensure it spawns fully off-screen
+        world_x, world_y = 0, 0 # Initialize for robustness
+
+        if edge == "top":
+            world_x = camera_world_tl_pos.x + rng.uniform(0, screen_dims[0])
+            world_y = camera_world_tl_pos.y - margin
+        elif edge == "bottom":
+            world_x = camera_world_tl_pos.x + rng.uniform(0, screen_dims[0])
+            world_y = camera_world_tl_pos.y + screen_dims[1] + margin
+        elif edge == "left":
+            world_x = camera_world_tl_pos.x - margin
+            world_y = camera_world_tl_pos.y + rng.uniform(0, screen_dims[1])
+        else:  # right
+            world_x = camera_world_tl_pos.x + screen_dims[0] + margin
+            world_y = camera_world_tl_pos.y + rng.uniform(0, screen_dims[1])
+        self.pos = pygame.Vector2(world_x, world_y)
+        self.lod_owed = 0 # Off-screen ticks skipped, see lod.py
+
+    def update(self, target_pos, dt): # target_pos is player's world_pos
+        # Move towards the target_pos
+        if (target_pos - self.pos).length_squared() > 0:  # Avoid division by zero if already at target
+            direction = (target_pos - self.pos).normalize()
+            self.pos += direction * self.speed * dt
+
+    #def draw(self, surface, target_pos):
+        # Calculate direction vector towards target for orientation
+    def draw(self, surface, target_world_pos, camera_offset): # target_world_pos is player's world_pos
+        direction_to_target = pygame.Vector2(0, -1) # Default if on top of target (e.g., point "up")
+        if (target_world_pos - self.pos).length_squared() > 0:
+            direction_to_target = (target_world_pos - self.pos).normalize()
+
+        # p1 is the tip of the triangle, which is self.pos
+        p1_world = self.pos
+
+        # Calculate center of the base (behind the tip)
+        base_center_world = self.pos - direction_to_target * self.height
+        # Calculate perpendicular vector for the base spread
+        perp_vector = pygame.Vector2(-direction_to_target.y, direction_to_target.x)
+        p2_world = base_center_world + perp_vector * (self.base_width / 2)
+        p3_world = base_center_world - perp_vector * (self.base_width / 2)
+
+        p1_screen = p1_world - camera_offset
+        p2_screen = p2_world - camera_offset
+        p3_screen = p3_world - camera_offset
+
+        pygame.draw.polygon(surface, self.color, [p1_screen, p2_screen, p3_screen])
+
+# --- Enemy Square Setup ---
+class SquareEnemy:
+    __slots__ = ("entity_id", "pos", "speed", "health", "lod_owed", "_store", "_slot") # _store/_slot are set by enemy_store.EnemyStore
+    size = 18
+    initial_color = settings.STEEL_BLUE
+    damaged_color = settings.GREY
+    max_health = 2 # Store max health for potential future use (e.g. health bars)
+    collision_radius = size * 0.75 # Radius for enemy-enemy collision (a bit larger than half diagonal)
+    hit_radius = size * 0.707 # Approx half diagonal, used by projectiles
+    player_hit_radius = size * 0.5
+
+    def __init__(self, pos, screen_width, screen_height, speed=None, rng=random):
+        self.entity_id = next(_entity_ids)
+        self.pos = pygame.Vector2(pos)
+        if speed is None:
+            self.speed = rng.uniform(60, 100)
+        else:
+            self.speed = speed
+        self.health = self.max_health
+        self.lod_owed = 0 # Off-screen ticks skipped, see lod.py
+
+    def update(self, target_pos, dt):
+        if (target_pos - self.pos).length_squared() > 0:
+            direction = (target_pos - self.pos).normalize()
+            self.pos += direction * self.speed * dt
+
+    @property
+    def color(self):
+        # Grey once damaged
+        return self.damaged_color if self.health < self.max_health else self.initial_color
+
+    def draw(self, surface, camera_offset):
+        screen_pos_x = self.pos.x - camera_offset.x - self.size / 2
+        screen_pos_y = self.pos.y - camera_offset.y - self.size / 2
+        rect = pygame.Rect(screen_pos_x,
+                           screen_pos_y,
+                           self.size, self.size)
+        pygame.draw.rect(surface, self.color, rect)
+
+
+    def take_damage(self, damage_amount=1): # Add damage_amount parameter
+        self.health -= damage_amount
+        if self.health <= 0:
+            return True # Destroyed
+        return False # Still alive
+
+
+# --- Enemy Hexagon Setup ---
+class HexagonEnemy:
+    __slots__ = ("entity_id", "pos", "speed", "health", "lod_owed", "_store", "_slot") # _store/_slot are set by enemy_store.EnemyStore
+    radius_stat = settings.HEXAGON_ENEMY_RADIUS # Distance from center to vertex
+    max_health = settings.HEXAGON_ENEMY_HEALTH
+    initial_color = settings.ORANGE_RED
+    damaged_color = settings.GREY # Same damaged color as square for consistency
+    collision_radius = radius_stat # For enemy-enemy collision, use full radius
+    hit_radius = radius_stat # Hexagon radius (center to vertex), used by projectiles
+    player_hit_radius = radius_stat * 0.85 # Slightly reduced for player collision
+
+    def __init__(self, pos, screen_width, screen_height, speed=None, rng=random):
+        self.entity_id = next(_entity_ids)
+        self.pos = pygame.Vector2(pos)
+        if speed is None:
+            self.speed = rng.uniform(settings.HEXAGON_ENEMY_SPEED_MIN, settings.HEXAGON_ENEMY_SPEED_MAX)
+        else:
+            self.speed = speed
+        self.health = self.max_health
+        self.lod_owed = 0 # Off-screen ticks skipped, see lod.py
+
+    def update(self, target_pos, dt):
+        if (target_pos - self.pos).length_squared() > 0:
+            direction = (target_pos - self.pos).normalize()
+            self.pos += direction * self.speed * dt
+
+    @property
+    def color(self):
+        # Grey once damaged
+        return self.damaged_color if self.health < self.max_health else self.initial_color
+
+    def draw(self, surface, camera_offset):
+        points = []
+        center_screen_x = self.pos.x - camera_offset.x
+        center_screen_y = self.pos.y - camera_offset.y
+
+        for i in range(6):
+            # Angle for a point-up hexagon (first point at top)
+            angle_rad = math.radians(60 * i - 90)
+            x = center_screen_x + self.radius_stat * math.cos(angle_rad)
+            y = center_screen_y + self.radius_stat * math.sin(angle_rad)
+            points.append((x, y))
+        pygame.draw.polygon(surface, self.color, points)
+
+    def take_damage(self, damage_amount=1): # Add damage_amount parameter
+        self.health -= damage_amount
+        if self.health <= 0:
+            return True # Destroyed
+        return False # Still alive
+
+    
+# --- Orbital Weapon Setup ---
+class OrbitalWeapon:
+    __slots__ = ("player_pos_ref", "orbit_distance", "rotation_speed", "current_angle", "color", "radius",
+                 "damage", "pos", "hit_cooldowns", "hit_cooldown")
+
+    def __init__(self, player_pos_ref, orbit_distance=settings.ORBITAL_WEAPON_ORBIT_DISTANCE, 
+                 rotation_speed=settings.ORBITAL_WEAPON_ROTATION_SPEED, 
+                 color=settings.ORBITAL_WEAPON_COLOR, radius=settings.ORBITAL_WEAPON_RADIUS,
+                 damage=settings.ORBITAL_WEAPON_DAMAGE):
+        self.player_pos_ref = player_pos_ref # Reference to the player's position vector
+        self.orbit_distance = orbit_distance
+        self.rotation_speed = rotation_speed  # Degrees per second
+        self.current_angle = 0  # Degrees
+        self.color = color
+        self.radius = radius
+        self.damage = damage
+        self.pos = pygame.Vector2(0, 0) # Will be updated relative to player
+        self.hit_cooldown = settings.ORBITAL_WEAPON_HIT_COOLDOWN # Seconds
+        self.hit_cooldowns = cooldowns.HitCooldowns(self.hit_cooldown) # Enemies hit recently, by entity_id
+
+    def update(self, dt):
+        self.current_angle = (self.current_angle + self.rotation_speed * dt) % 360
+        rad_angle = math.radians(self.current_angle)
+        
+        # Calculate position relative to the player's current position
+        offset_x = self.orbit_distance * math.cos(rad_angle)
+        offset_y = self.orbit_distance * math.sin(rad_angle)
+        self.pos.update(self.player_pos_ref.x + offset_x, self.player_pos_ref.y + offset_y)
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.pos - camera_offset
+        pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
+
+# --- Pickup Particle Setup ---
+class PickupParticle:
+    __slots__ = ("pos", "width", "height", "color", "value")
+
+    def __init__(self, *args, **kwargs):
+        self.pos = pygame.Vector2()
+        self.reset(*args, **kwargs)
+
+    def reset(self, pos, color=settings.GOLD, width=settings.PICKUP_PARTICLE_WIDTH, height=settings.PICKUP_PARTICLE_HEIGHT, value=1):
+        self.pos.update(pos) # Position where it's dropped
+        self.width = width
+        self.height = height
+        self.color = color
+        self.value = value # How much this pickup is worth
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.pos - camera_offset
+        # For pygame.draw.ellipse, pos is the top-left of the bounding rect
+        ellipse_rect = pygame.Rect(screen_pos.x - self.width / 2,
+                                   screen_pos.y - self.height / 2,
+                                   self.width, self.height)
+        pygame.draw.ellipse(surface, self.color, ellipse_rect)
+
+# --- Bouncing Particle Setup ---
+class BouncingParticle(Particle):
+    __slots__ = ("lifetime", "age", "bounces_left")
+
+    def reset(self, start_pos, target_pos, color=settings.BOUNCING_PARTICLE_COLOR,
+              speed=settings.BOUNCING_PARTICLE_SPEED, radius=settings.BOUNCING_PARTICLE_RADIUS,
+              lifetime=settings.BOUNCING_PARTICLE_LIFETIME, max_bounces=settings.BOUNCING_PARTICLE_MAX_BOUNCES):
+        super().reset(start_pos, target_pos, color, speed, radius) # Uses its own default color
+        self.lifetime = lifetime
+        self.age = 0.0
+        self.bounces_left = max_bounces
+        # self.bounce_sound = pygame.mixer.Sound("audio/bounce_effect.wav") # Optional: specific bounce sound
+
+    def update(self, dt, screen_width, screen_height, camera_offset, world_bounds=None):
+        self.age += dt
+        self.prev_pos.update(self.pos)
+        if not self.is_alive(screen_width, screen_height, camera_offset, world_bounds): # Check before moving
+             return
+
+        self.pos += self.direction * self.speed * dt
+
+        # Determine bounce boundaries
+        bounce_off_world = settings.BOUNCING_PARTICLE_USE_WORLD_BOUNDS and world_bounds is not None
+        
+        min_x_bound, max_x_bound, min_y_bound, max_y_bound = 0,0,0,0
+
+        if bounce_off_world:
+            min_x_bound = 0 # World map starts at 0,0
+            max_x_bound = world_bounds[0]
+            min_y_bound = 0
+            max_y_bound = world_bounds[1]
+        else: # Bounce off visible screen edges (converted to world coordinates)
+            min_x_bound = camera_offset.x
+            max_x_bound = camera_offset.x + screen_width
+            min_y_bound = camera_offset.y
+            max_y_bound = camera_offset.y + screen_height
+        
+        # Effective collision points for the particle's center based on its radius
+        eff_min_x = min_x_bound + self.radius
+        eff_max_x = max_x_bound - self.radius
+        eff_min_y = min_y_bound + self.radius
+        eff_max_y = max_y_bound - self.radius
+
+        bounced_this_frame = False
+        # Where the move first crossed an edge, as a fraction of the move (see _contact_time)
+        contact_time = 1.0
+        if self.pos.x <= eff_min_x or self.pos.x >= eff_max_x:
+            contact_time = min(contact_time, self._contact_time(self.prev_pos.x, self.pos.x, eff_min_x, eff_max_x))
+        if self.pos.y <= eff_min_y or self.pos.y >= eff_max_y:
+            contact_time = min(contact_time, self._contact_time(self.prev_pos.y, self.pos.y, eff_min_y, eff_max_y))
+        contact_point = self.prev_pos.lerp(self.pos, contact_time)
+
+        # Horizontal bounce
+        if self.pos.x <= eff_min_x:
+            self.pos.x = eff_min_x + (eff_min_x - self.pos.x) # Reflect position past boundary
+            self.direction.x *= -1
+            bounced_this_frame = True
+        elif self.pos.x >= eff_max_x:
+            self.pos.x = eff_max_x - (self.pos.x - eff_max_x) # Reflect position past boundary
+            self.direction.x *= -1
+            bounced_this_frame = True
+
+        # Vertical bounce
+        if self.pos.y <= eff_min_y:
+            self.pos.y = eff_min_y + (eff_min_y - self.pos.y) # Reflect position past boundary
+            self.direction.y *= -1
+            bounced_this_frame = True
+        elif self.pos.y >= eff_max_y:
+            self.pos.y = eff_max_y - (self.pos.y - eff_max_y) # Reflect position past boundary
+            self.direction.y *= -1
+            bounced_this_frame = True
+        
+        if bounced_this_frame:
+            self.bounces_left -= 1
+            # The swept hit test runs from prev_pos to pos, so start it at the wall instead of cutting through it
+            self.prev_pos.update(contact_point)
+            # if self.bounce_sound: self.bounce_sound.play()
+
+    @staticmethod
+    def _contact_time(start, end, min_bound, max_bound):
+        # Fraction of the move from start to end at which one coordinate reaches the bound it went past
+        bound = min_bound if end <= min_bound else max_bound
+        if end == start:
+            return 0.0
+        return max(0.0, min(1.0, (bound - start) / (end - start)))
+
+    def bounce_off_object(self, object_center_pos, object_radius):
+        """Handles the reflection of the particle's direction off a circular object."""
+        # Normal vector from object center to particle center
+        collision_normal = self.pos - object_center_pos
+        if collision_normal.length_squared() > 0:
+            collision_normal.normalize_ip()
+            
+            # Reflect direction: D_new = D_old - 2 * (D_old.dot(N)) * N
+            reflection_component = 2 * self.direction.dot(collision_normal) * collision_normal
+            self.direction -= reflection_component
+            self.direction.normalize_ip() # Ensure it's still a unit vector
+
+            # Nudge particle slightly away from the object to prevent immediate re-collision
+            # Place it just outside the combined radii plus a small epsilon
+            collision_normal *= object_radius + self.radius + 0.1
+            self.pos.update(object_center_pos) # In place, anything holding the pos vector keeps seeing it
+            self.pos += collision_normal
+            self.prev_pos.update(self.pos) # The rest of this tick's move was reflected, don't test the old path
+
+    def is_alive(self, screen_width, screen_height, camera_offset, world_bounds=None):
+        return self.age < self.lifetime and self.bounces_left >= 0
+
+# --- Boomerang Projectile Setup ---
+class BoomerangProjectile(Particle):
+    __slots__ = ("max_speed", "current_speed", "lifetime", "age", "damage", "state", "hit_enemies_this_pass")
+
+    def __init__(self, *args, **kwargs):
+        self.hit_enemies_this_pass = set() # entity_ids of enemies hit in current pass, cleared by reset()
+        super().__init__(*args, **kwargs)
+
+    def reset(self, start_pos, initial_target_pos,
+              color=settings.BOOMERANG_PROJECTILE_COLOR, # Uses default from settings
+              max_speed=settings.BOOMERANG_PROJECTILE_SPEED, # Max speed
+              radius=settings.BOOMERANG_PROJECTILE_RADIUS, # Uses default from settings
+              lifetime=settings.BOOMERANG_PROJECTILE_LIFETIME, # Uses default from settings
+              damage=settings.BOOMERANG_PROJECTILE_DAMAGE): # Uses default from settings
+        # The 'speed' parameter for Particle's reset is used to set initial direction correctly.
+        # The actual movement speed will be self.current_speed.
+        super().reset(start_pos, initial_target_pos, color, max_speed, radius)
+        self.max_speed = max_speed
+        self.current_speed = max_speed # Starts at max speed
+        self.lifetime = lifetime # Overall lifetime
+        self.age = 0.0
+        self.damage = damage
+        self.state = "outbound"  # "outbound", "slowing", "returning"
+        self.hit_enemies_this_pass.clear()
+        # self.initial_target_pos is not needed for turning anymore
+        # self.turn_distance_threshold_sq is not needed
+
+    def update(self, dt, player_pos_not_used_for_simple_return, world_bounds=None): # player_pos might be needed for smarter return
+        self.age += dt
+        self.prev_pos.update(self.pos)
+        if not self.is_alive(0,0,None,None): # Basic lifetime check
+            return
+
+        if self.state == "outbound":
+            if self.age >= settings.BOOMERANG_TURN_DELAY:
+                self.state = "slowing"
+            # If direction was zero (e.g. spawned on target), set a default direction
+            if self.direction.length_squared() == 0:
+                self.direction.update(0, -1) # Default upwards
+            self.pos += self.direction * self.current_speed * dt
+
+        elif self.state == "slowing":
+            # Decelerate
+            # Calculate deceleration needed to reach 0 speed in SLOWING_DURATION
+            if settings.BOOMERANG_SLOWING_DURATION > 0:
+                deceleration = self.max_speed / settings.BOOMERANG_SLOWING_DURATION
+                self.current_speed -= deceleration * dt
+            
+            if self.current_speed <= 0:
+                self.current_speed = 0
+                self.state = "returning"
+                self.direction *= -1  # Reverse direction
+                self.hit_enemies_this_pass.clear() # Allow hitting enemies again for the return trip
+            self.pos += self.direction * self.current_speed * dt
+
+        elif self.state == "returning":
+            # Accelerate
+            self.current_speed += settings.BOOMERANG_RETURN_ACCELERATION * dt
+            self.current_speed = min(self.current_speed, self.max_speed) # Cap at max speed
+            self.pos += self.direction * self.current_speed * dt
+
+    def draw(self, surface, camera_offset):
+        # Could add a slight rotation or different visual for boomerang
+        super().draw(surface, camera_offset)
+
+    def is_alive(self, screen_width_unused, screen_height_unused, camera_offset_unused, world_bounds_unused):
+        return self.age < self.lifetime
+
+    def on_hit_enemy(self):
+        # Boomerangs are not destroyed on hit, they continue until lifetime ends.
+        # Logic to prevent multi-hits per pass is handled with self.hit_enemies_this_pass
+        pass
@@ -0,0 +1,46 @@
+# lod.py
+# Level of detail for enemies far outside the camera. Enemies within ENEMY_LOD_MARGIN pixels of the view
+# rectangle are "near" and get the full update every tick. The others are "far":
+# - they move only every ENEMY_LOD_TICK_INTERVAL ticks, by all the time they skipped in one larger step
+# - they are left out of enemy-enemy separation
+# Each enemy's phase comes from its entity_id, so a far crowd spreads its moves over the interval instead
+# of all moving on the same tick.
+# An enemy that comes near first catches up on the ticks it still owes. The margin is far wider than a
+# catch-up step (speed * interval * dt, a few pixels), so that happens off-screen and nothing pops into view.
+import settings
+
+
+def view_bounds(camera_offset, screen_size, margin=settings.ENEMY_LOD_MARGIN):
+    """(left, top, right, bottom) in world coordinates of the view rectangle grown by margin on every side."""
+    return (camera_offset.x - margin, camera_offset.y - margin,
+            camera_offset.x + screen_size[0] + margin, camera_offset.y + screen_size[1] + margin)
+
+
+def near_enemies(enemies, bounds):
+    """The enemies inside bounds, in list order."""
+    left, top, right, bottom = bounds
+    near = []
+    for enemy in enemies:
+        pos = enemy.pos
+        if left <= pos.x <= right and top <= pos.y <= bottom:
+            near.append(enemy)
+    return near
+
+
+def update_enemies(enemies, target_pos, dt, tick, bounds, interval=settings.ENEMY_LOD_TICK_INTERVAL):
+    """Moves every enemy towards target_pos, far ones at the reduced rate. Returns the near enemies."""
+    left, top, right, bottom = bounds
+    near = []
+    for enemy in enemies:
+        owed = enemy.lod_owed + 1 # Ticks of movement this enemy has not made yet, including this one
+        pos = enemy.pos
+        if left <= pos.x <= right and top <= pos.y <= bottom:
+            near.append(enemy)
+            enemy.update(target_pos, dt * owed)
+            enemy.lod_owed = 0
+        elif (tick + enemy.entity_id) % interval == 0:
+            enemy.update(target_pos, dt * owed)
+            enemy.lod_owed = 0
+        else:
+            enemy.lod_owed = owed
+    return near
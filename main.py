@@ -1,766 +1,203 @@
 # Example file showing a circle moving on screen
-import pygame
-import random
+# Runs the game in a window, or headless from the command line:
+#   python main.py --headless --frames 36000 --seed 1 --archetype standard
+# Sessions can be recorded with --record session.replay and re-simulated with --replay session.replay
+# --profile trace.json writes the phase timings of the last frames as a Chrome trace
+# --startup-report prints how long import, the first frame and the first interactive frame took, then quits
+import os
 import sys # For pygame.quit()
+import time
+STARTUP_START = time.perf_counter() # Startup timings are measured from here, before pygame is imported
+import argparse
+import pygame
 import pygame.mixer
-import math # For hexagon drawing
 import settings # Import your new settings file
+import assets
 import audio
-
-# pygame setup
-pygame.init()
-pygame.mixer.init() # Initialize the mixer for sound effects
-screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
-clock = pygame.time.Clock()
-running = True
-dt = 0
-
-# --- Background Color Cycling ---
-current_bg_color_index = 0
-next_bg_color_index = 1
-bg_color_transition_progress = 0.0
-dynamic_bg_color = settings.BG_CYCLE_COLORS[current_bg_color_index]
+import music
+import simulation
+import replay
+import profiler
+import sprites
+import background
+import trail
+from simulation import PLAYER_ARCHETYPES
+
+# --- Display ---
+screen = None
+clock = None
 
 # --- Player Size ---
 # Define player_radius here so it can be used for scaling the image if needed
 player_radius = settings.PLAYER_RADIUS
 
 # --- Sound Effects --- (Initialize all to None or empty for robust error handling)
-background_music_stage_1 = None
-standard_shot_sound = None
-nova_shot_sound = None
-triple_shot_sound = None
-damaging_aura_sound = None # Assuming this might be added or was from a previous step
-pickup_sound = None
-enemy_hit_sound = []
-player_death_sound = None
 select_archetype_sound = None
+game_sounds = {} # Sounds played by the simulation, see Simulation._play_sound
 standard_player_image = None # For player_1.png
-boomerang_shot_sound = None # For boomerang weapon
 triple_shot_player_image = None # For player_2.png
 nova_burst_player_image = None # For player_3.png
 bouncing_shot_player_image = None # For the new bouncing shot player
-
-try:
-    background_music_stage_1 = pygame.mixer.Sound(audio.BACKGROUND_MUSIC_STAGE_1)
-    if background_music_stage_1:
-        background_music_stage_1.set_volume(0.1) # Set volume to 50%
-    standard_shot_sound = pygame.mixer.Sound(audio.SINGLE_SHOT_SOUND)
-    nova_shot_sound = pygame.mixer.Sound(audio.NOVA_SHOT_SOUND)
-    triple_shot_sound = pygame.mixer.Sound(audio.TRIPLE_SHOT_SOUND)
-    boomerang_shot_sound = pygame.mixer.Sound(audio.BOOMERANG_SHOT_SOUND)
-    bouncing_shot_sound = pygame.mixer.Sound(audio.BOUNCING_SHOT)
-    pickup_sound = pygame.mixer.Sound(audio.PICKUP_SOUND)
-    enemy_hit_sound = [pygame.mixer.Sound(path) for path in audio.ENEMY_HIT_SOUNDS]
-    player_death_sound = pygame.mixer.Sound(audio.PLAYER_DEATH_SOUND)
-    select_archetype_sound = pygame.mixer.Sound(audio.SELECT_ARCHETYPE_SOUND)
-    _original_player_image = pygame.image.load(settings.IMAGE_PLAYER_PATH).convert_alpha()
-    _original_player_triple_image = pygame.image.load(settings.IMAGE_PLAYER_TRIPLE_SHOT_PATH).convert_alpha()
-    _original_player_nova_image = pygame.image.load(settings.IMAGE_PLAYER_NOVA_BURST_PATH).convert_alpha()
-    _original_player_bouncing_image = pygame.image.load(settings.IMAGE_PLAYER_BOUNCING_SHOT_PATH).convert_alpha()
-    if _original_player_image: # Scale it if loaded successfully
-        standard_player_image = pygame.transform.smoothscale(_original_player_image, (player_radius * 2, player_radius * 2))
-    if _original_player_triple_image:
-        triple_shot_player_image = pygame.transform.smoothscale(_original_player_triple_image, (player_radius * 2, player_radius * 2))
-    if _original_player_nova_image:
-        nova_burst_player_image = pygame.transform.smoothscale(_original_player_nova_image, (player_radius * 2, player_radius * 2))
-    if _original_player_bouncing_image:
-        bouncing_shot_player_image = pygame.transform.smoothscale(_original_player_bouncing_image, (player_radius * 2, player_radius * 2))
-except pygame.error as e:
-    print(f"Error loading asset (sound or image): {e}")
-    pass # Variables remain None/empty if loading failed or a general error occurred.
-
-# --- Static Background Image ---
-try:
-    loaded_image = pygame.image.load(settings.IMAGE_BACKGROUND_PATH)
-    if loaded_image.get_alpha() is not None:
-        static_background_image = loaded_image.convert_alpha()
-    else:
-        static_background_image = loaded_image.convert()
-    # If your image doesn't have alpha, you can use .convert() instead
-except pygame.error as e:
-    print(f"Error loading static background image: {e}")
-    static_background_image = None # Fallback if image doesn't load
+static_background_image = None
+enemy_sprites = None # sprites.EnemySpriteCache, created on first draw
+projectile_sprites = None # sprites.ProjectileSpriteCache, created on first draw
+background_cache = None # background.BackgroundCache, rebuilt when the tile image or screen size changes
+text_cache = sprites.TextCache() # Rendered UI text, same arguments as Font.render after the font
+hud_layer = sprites.CachedLayer() # Pickup bar, level, timer and kill counter
+trail_renderer = trail.TrailRenderer(player_radius) # Faded player images, made on first use
+music_player = music.MusicPlayer() # Streams the background music, needs the mixer once something plays
+paused_scene = None # The frozen game under the store window, drawn once when the store opens
+game_over_overlay = None # Full-screen dimming surface for the game over screen
 
 # --- World/Map Definition ---
 WORLD_TILES_X = settings.WORLD_TILES_X
 WORLD_TILES_Y = settings.WORLD_TILES_Y
 TILE_WIDTH = 0
 TILE_HEIGHT = 0
-if static_background_image:
-    TILE_WIDTH = static_background_image.get_width()
-    TILE_HEIGHT = static_background_image.get_height()
-
-camera_offset = pygame.Vector2(0, 0) # Tracks the top-left of the camera in world coordinates
-player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-player_trail_positions = [] # For player trail effect
-
-# --- Particle shoot Setup ---
-class Particle:
-    def __init__(self, start_pos, target_pos, color=settings.WHITE, speed=250, radius=4):
-        # Ensure start_pos is a Vector2. If it's a tuple/list, convert it.
-        self.pos = pygame.Vector2(start_pos)
-        self.radius = radius
-        self.color = color
-        self.speed = speed
-        # Calculate direction towards the target's position at the moment of firing
-        if (target_pos - start_pos).length_squared() > 0:
-            self.direction = (target_pos - start_pos).normalize()
-        else:
-            self.direction = pygame.Vector2(0, -1) # Default upwards if target is at start_pos
-
-    def update(self, dt, screen_width=None, screen_height=None, camera_offset=None, world_bounds=None):
-        self.pos += self.direction * self.speed * dt
-
-    def draw(self, surface, camera_offset):
-        screen_pos = self.pos - camera_offset
-        pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
-
-    def is_alive(self, screen_width, screen_height, camera_offset, world_bounds=None):
-        # For standard particles, alive means on-screen (relative to camera)
-        screen_pos = self.pos - camera_offset
-        on_screen = not (screen_pos.x < -self.radius or screen_pos.x > screen_width + self.radius or
-                         screen_pos.y < -self.radius or screen_pos.y > screen_height + self.radius)
-        return on_screen
-
-# --- Enemy Triangle Setup ---
-class EnemyTriangle:
-    def __init__(self, screen_dims, camera_world_tl_pos):
-        self.height = 20  # Length from tip to middle of base
-        self.base_width = 15  # Full width of the base
-        self.speed = random.uniform(70, 110)  # Pixels per second
-        self.color = settings.OLIVE_DRAB
-        self.collision_radius = self.height * 0.75 # Radius for enemy-enemy collision
-
-        # Spawn on a random edge, with the tip (self.pos) starting off-screen
-        edge = random.choice(["top", "bottom", "left", "right"])
-        margin = self.height # Ensure it spawns fully off-screen
-        world_x, world_y = 0, 0 # Initialize for robustness
-
-        if edge == "top":
-            world_x = camera_world_tl_pos.x + random.uniform(0, screen_dims[0])
-            world_y = camera_world_tl_pos.y - margin
-        elif edge == "bottom":
-            world_x = camera_world_tl_pos.x + random.uniform(0, screen_dims[0])
-            world_y = camera_world_tl_pos.y + screen_dims[1] + margin
-        elif edge == "left":
-            world_x = camera_world_tl_pos.x - margin
-            world_y = camera_world_tl_pos.y + random.uniform(0, screen_dims[1])
-        else:  # right
-            world_x = camera_world_tl_pos.x + screen_dims[0] + margin
-            world_y = camera_world_tl_pos.y + random.uniform(0, screen_dims[1])
-        self.pos = pygame.Vector2(world_x, world_y)
-
-    def update(self, target_pos, dt): # target_pos is player's world_pos
-        # Move towards the target_pos
-        if (target_pos - self.pos).length_squared() > 0:  # Avoid division by zero if already at target
-            direction = (target_pos - self.pos).normalize()
-            self.pos += direction * self.speed * dt
-
-    #def draw(self, surface, target_pos):
-        # Calculate direction vector towards target for orientation
-    def draw(self, surface, target_world_pos, camera_offset): # target_world_pos is player's world_pos
-        direction_to_target = pygame.Vector2(0, -1) # Default if on top of target (e.g., point "up")
-        if (target_world_pos - self.pos).length_squared() > 0:
-            direction_to_target = (target_world_pos - self.pos).normalize()
-
-        # p1 is the tip of the triangle, which is self.pos
-        p1_world = self.pos
-
-        # Calculate center of the base (behind the tip)
-        base_center_world = self.pos - direction_to_target * self.height
-        # Calculate perpendicular vector for the base spread
-        perp_vector = pygame.Vector2(-direction_to_target.y, direction_to_target.x)
-        p2_world = base_center_world + perp_vector * (self.base_width / 2)
-        p3_world = base_center_world - perp_vector * (self.base_width / 2)
-
-        p1_screen = p1_world - camera_offset
-        p2_screen = p2_world - camera_offset
-        p3_screen = p3_world - camera_offset
-
-        pygame.draw.polygon(surface, self.color, [p1_screen, p2_screen, p3_screen])
-
-# --- Enemy Square Setup ---
-class SquareEnemy:
-    def __init__(self, pos, screen_width, screen_height, size=18, speed=None):
-        self.size = size
-        self.pos = pygame.Vector2(pos)
-        if speed is None:
-            self.speed = random.uniform(60, 100)
-        else:
-            self.speed = speed
-        self.initial_color = settings.STEEL_BLUE
-        self.damaged_color = settings.GREY
-        self.color = self.initial_color
-        self.health = 2
-        self.max_health = 2 # Store max health for potential future use (e.g. health bars)
-        self.collision_radius = self.size * 0.75 # Radius for enemy-enemy collision (a bit larger than half diagonal)
-
-    def update(self, target_pos, dt):
-        if (target_pos - self.pos).length_squared() > 0:
-            direction = (target_pos - self.pos).normalize()
-            self.pos += direction * self.speed * dt
-
-    def draw(self, surface, camera_offset):
-        # Change color if damaged
-        if self.health < self.max_health:
-            self.color = self.damaged_color
-        else:
-            self.color = self.initial_color
-        
-        screen_pos_x = self.pos.x - camera_offset.x - self.size / 2
-        screen_pos_y = self.pos.y - camera_offset.y - self.size / 2
-        rect = pygame.Rect(screen_pos_x,
-                           screen_pos_y,
-                           self.size, self.size)
-        pygame.draw.rect(surface, self.color, rect)
-
-
-    def take_damage(self, damage_amount=1): # Add damage_amount parameter
-        self.health -= damage_amount
-        if self.health <= 0:
-            return True # Destroyed
-        return False # Still alive
-
-
-# --- Enemy Hexagon Setup ---
-class HexagonEnemy:
-    def __init__(self, pos, screen_width, screen_height, radius=settings.HEXAGON_ENEMY_RADIUS, speed=None, health=settings.HEXAGON_ENEMY_HEALTH):
-        self.radius_stat = radius # Distance from center to vertex
-        self.pos = pygame.Vector2(pos)
-        if speed is None:
-            self.speed = random.uniform(settings.HEXAGON_ENEMY_SPEED_MIN, settings.HEXAGON_ENEMY_SPEED_MAX)
-        else:
-            self.speed = speed
-        self.initial_color = settings.ORANGE_RED
-        self.damaged_color = settings.GREY # Same damaged color as square for consistency
-        self.color = self.initial_color
-        self.health = health
-        self.max_health = health
-        self.collision_radius = self.radius_stat # For enemy-enemy collision, use full radius
-
-    def update(self, target_pos, dt):
-        if (target_pos - self.pos).length_squared() > 0:
-            direction = (target_pos - self.pos).normalize()
-            self.pos += direction * self.speed * dt
-
-    def draw(self, surface, camera_offset):
-        # Change color if damaged
-        if self.health < self.max_health:
-            self.color = self.damaged_color
-        else:
-            self.color = self.initial_color
-
-        points = []
-        center_screen_x = self.pos.x - camera_offset.x
-        center_screen_y = self.pos.y - camera_offset.y
-
-        for i in range(6):
-            # Angle for a point-up hexagon (first point at top)
-            angle_rad = math.radians(60 * i - 90)
-            x = center_screen_x + self.radius_stat * math.cos(angle_rad)
-            y = center_screen_y + self.radius_stat * math.sin(angle_rad)
-            points.append((x, y))
-        pygame.draw.polygon(surface, self.color, points)
-
-    def take_damage(self, damage_amount=1): # Add damage_amount parameter
-        self.health -= damage_amount
-        if self.health <= 0:
-            return True # Destroyed
-        return False # Still alive
-
-    
-# --- Orbital Weapon Setup ---
-class OrbitalWeapon:
-    def __init__(self, player_pos_ref, orbit_distance=settings.ORBITAL_WEAPON_ORBIT_DISTANCE, 
-                 rotation_speed=settings.ORBITAL_WEAPON_ROTATION_SPEED, 
-                 color=settings.ORBITAL_WEAPON_COLOR, radius=settings.ORBITAL_WEAPON_RADIUS,
-                 damage=settings.ORBITAL_WEAPON_DAMAGE):
-        self.player_pos_ref = player_pos_ref # Reference to the player's position vector
-        self.orbit_distance = orbit_distance
-        self.rotation_speed = rotation_speed  # Degrees per second
-        self.current_angle = 0  # Degrees
-        self.color = color
-        self.radius = radius
-        self.damage = damage
-        self.pos = pygame.Vector2(0, 0) # Will be updated relative to player
-        self.last_hit_times = {} # enemy_id: time_of_last_hit
-        self.hit_cooldown = settings.ORBITAL_WEAPON_HIT_COOLDOWN # Seconds
-
-    def update(self, dt):
-        self.current_angle = (self.current_angle + self.rotation_speed * dt) % 360
-        rad_angle = math.radians(self.current_angle)
-        
-        # Calculate position relative to the player's current position
-        offset_x = self.orbit_distance * math.cos(rad_angle)
-        offset_y = self.orbit_distance * math.sin(rad_angle)
-        self.pos = self.player_pos_ref + pygame.Vector2(offset_x, offset_y)
-
-    def draw(self, surface, camera_offset):
-        screen_pos = self.pos - camera_offset
-        pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
-
-# --- Pickup Particle Setup ---
-class PickupParticle:
-    def __init__(self, pos, color=settings.GOLD, width=settings.PICKUP_PARTICLE_WIDTH, height=settings.PICKUP_PARTICLE_HEIGHT, value=1):
-        self.pos = pygame.Vector2(pos) # Position where it's dropped
-        self.width = width
-        self.height = height
-        self.color = color
-        self.value = value # How much this pickup is worth
-
-    def draw(self, surface, camera_offset):
-        screen_pos = self.pos - camera_offset
-        # For pygame.draw.ellipse, pos is the top-left of the bounding rect
-        ellipse_rect = pygame.Rect(screen_pos.x - self.width / 2,
-                                   screen_pos.y - self.height / 2,
-                                   self.width, self.height)
-        pygame.draw.ellipse(surface, self.color, ellipse_rect)
-
-# --- Bouncing Particle Setup ---
-class BouncingParticle(Particle):
-    def __init__(self, start_pos, target_pos, color=settings.BOUNCING_PARTICLE_COLOR,
-                 speed=settings.BOUNCING_PARTICLE_SPEED, radius=settings.BOUNCING_PARTICLE_RADIUS,
-                 lifetime=settings.BOUNCING_PARTICLE_LIFETIME, max_bounces=settings.BOUNCING_PARTICLE_MAX_BOUNCES):
-        super().__init__(start_pos, target_pos, color, speed, radius) # Uses its own default color
-        self.lifetime = lifetime
-        self.age = 0.0
-        self.bounces_left = max_bounces
-        # self.bounce_sound = pygame.mixer.Sound("audio/bounce_effect.wav") # Optional: specific bounce sound
-
-    def update(self, dt, screen_width, screen_height, camera_offset, world_bounds=None):
-        self.age += dt
-        if not self.is_alive(screen_width, screen_height, camera_offset, world_bounds): # Check before moving
-             return
-
-        self.pos += self.direction * self.speed * dt
-
-        # Determine bounce boundaries
-        bounce_off_world = settings.BOUNCING_PARTICLE_USE_WORLD_BOUNDS and world_bounds is not None
-        
-        min_x_bound, max_x_bound, min_y_bound, max_y_bound = 0,0,0,0
-
-        if bounce_off_world:
-            min_x_bound = 0 # World map starts at 0,0
-            max_x_bound = world_bounds[0]
-            min_y_bound = 0
-            max_y_bound = world_bounds[1]
-        else: # Bounce off visible screen edges (converted to world coordinates)
-            min_x_bound = camera_offset.x
-            max_x_bound = camera_offset.x + screen_width
-            min_y_bound = camera_offset.y
-            max_y_bound = camera_offset.y + screen_height
-        
-        # Effective collision points for the particle's center based on its radius
-        eff_min_x = min_x_bound + self.radius
-        eff_max_x = max_x_bound - self.radius
-        eff_min_y = min_y_bound + self.radius
-        eff_max_y = max_y_bound - self.radius
-
-        bounced_this_frame = False
-        # Horizontal bounce
-        if self.pos.x <= eff_min_x:
-            self.pos.x = eff_min_x + (eff_min_x - self.pos.x) # Reflect position past boundary
-            self.direction.x *= -1
-            bounced_this_frame = True
-        elif self.pos.x >= eff_max_x:
-            self.pos.x = eff_max_x - (self.pos.x - eff_max_x) # Reflect position past boundary
-            self.direction.x *= -1
-            bounced_this_frame = True
-
-        # Vertical bounce
-        if self.pos.y <= eff_min_y:
-            self.pos.y = eff_min_y + (eff_min_y - self.pos.y) # Reflect position past boundary
-            self.direction.y *= -1
-            bounced_this_frame = True
-        elif self.pos.y >= eff_max_y:
-            self.pos.y = eff_max_y - (self.pos.y - eff_max_y) # Reflect position past boundary
-            self.direction.y *= -1
-            bounced_this_frame = True
-        
-        if bounced_this_frame:
-            self.bounces_left -= 1
-            # if self.bounce_sound: self.bounce_sound.play()
-
-    def bounce_off_object(self, object_center_pos, object_radius):
-        """Handles the reflection of the particle's direction off a circular object."""
-        # Normal vector from object center to particle center
-        collision_normal = self.pos - object_center_pos
-        if collision_normal.length_squared() > 0:
-            collision_normal.normalize_ip()
-            
-            # Reflect direction: D_new = D_old - 2 * (D_old.dot(N)) * N
-            reflection_component = 2 * self.direction.dot(collision_normal) * collision_normal
-            self.direction -= reflection_component
-            self.direction.normalize_ip() # Ensure it's still a unit vector
-
-            # Nudge particle slightly away from the object to prevent immediate re-collision
-            # Place it just outside the combined radii plus a small epsilon
-            self.pos = object_center_pos + collision_normal * (object_radius + self.radius + 0.1)
-
-    def is_alive(self, screen_width, screen_height, camera_offset, world_bounds=None):
-        return self.age < self.lifetime and self.bounces_left >= 0
-
-# --- Boomerang Projectile Setup ---
-class BoomerangProjectile(Particle):
-    def __init__(self, start_pos, initial_target_pos,
-                 color=settings.BOOMERANG_PROJECTILE_COLOR, # Uses default from settings
-                 max_speed=settings.BOOMERANG_PROJECTILE_SPEED, # Max speed
-                 radius=settings.BOOMERANG_PROJECTILE_RADIUS, # Uses default from settings
-                 lifetime=settings.BOOMERANG_PROJECTILE_LIFETIME, # Uses default from settings
-                 damage=settings.BOOMERANG_PROJECTILE_DAMAGE): # Uses default from settings
-        # The 'speed' parameter for Particle's __init__ is used to set initial direction correctly.
-        # The actual movement speed will be self.current_speed.
-        super().__init__(start_pos, initial_target_pos, color, max_speed, radius)
-        self.max_speed = max_speed
-        self.current_speed = max_speed # Starts at max speed
-        self.lifetime = lifetime # Overall lifetime
-        self.age = 0.0
-        self.damage = damage
-        self.state = "outbound"  # "outbound", "slowing", "returning"
-        self.hit_enemies_this_pass = set() # Store IDs of enemies hit in current pass
-        # self.initial_target_pos is not needed for turning anymore
-        # self.turn_distance_threshold_sq is not needed
-
-    def update(self, dt, player_pos_not_used_for_simple_return, world_bounds=None): # player_pos might be needed for smarter return
-        self.age += dt
-        if not self.is_alive(0,0,None,None): # Basic lifetime check
-            return
-
-        if self.state == "outbound":
-            if self.age >= settings.BOOMERANG_TURN_DELAY:
-                self.state = "slowing"
-            # If direction was zero (e.g. spawned on target), set a default direction
-            if self.direction.length_squared() == 0:
-                self.direction = pygame.Vector2(0, -1) # Default upwards
-            self.pos += self.direction * self.current_speed * dt
-
-        elif self.state == "slowing":
-            # Decelerate
-            # Calculate deceleration needed to reach 0 speed in SLOWING_DURATION
-            if settings.BOOMERANG_SLOWING_DURATION > 0:
-                deceleration = self.max_speed / settings.BOOMERANG_SLOWING_DURATION
-                self.current_speed -= deceleration * dt
-            
-            if self.current_speed <= 0:
-                self.current_speed = 0
-                self.state = "returning"
-                self.direction *= -1  # Reverse direction
-                self.hit_enemies_this_pass.clear() # Allow hitting enemies again for the return trip
-            self.pos += self.direction * self.current_speed * dt
-
-        elif self.state == "returning":
-            # Accelerate
-            self.current_speed += settings.BOOMERANG_RETURN_ACCELERATION * dt
-            self.current_speed = min(self.current_speed, self.max_speed) # Cap at max speed
-            self.pos += self.direction * self.current_speed * dt
-
-    def draw(self, surface, camera_offset):
-        # Could add a slight rotation or different visual for boomerang
-        super().draw(surface, camera_offset)
-
-    def is_alive(self, screen_width_unused, screen_height_unused, camera_offset_unused, world_bounds_unused):
-        return self.age < self.lifetime
-
-    def on_hit_enemy(self):
-        # Boomerangs are not destroyed on hit, they continue until lifetime ends.
-        # Logic to prevent multi-hits per pass is handled with self.hit_enemies_this_pass
-        pass
-
-# --- Enemy Variables ---
-enemies = []
-enemy_spawn_timer = 0.0
-ENEMY_SPAWN_INTERVAL = settings.ENEMY_SPAWN_INTERVAL
-MAX_ENEMIES = settings.MAX_ENEMIES
-SQUARE_GROUP_SIZE_MIN = settings.SQUARE_GROUP_SIZE_MIN
-SQUARE_GROUP_SIZE_MAX = settings.SQUARE_GROUP_SIZE_MAX
-pickup_particles = [] # List to store pickup particles
-SPECIAL_PICKUP_CHANCE = settings.SPECIAL_PICKUP_CHANCE
-SPECIAL_PICKUP_COLOR = settings.PINK
-SPECIAL_PICKUP_VALUE = settings.SPECIAL_PICKUP_VALUE
-
-# --- Shooting Variables
-particles = []
-# SHOOT_COOLDOWN will be initialized from settings.INITIAL_SHOOT_COOLDOWN
-last_shot_time = 0.0
-
-num_standard_projectiles = 0 # Will be set when standard archetype is chosen
-num_boomerangs_to_fire = 0 # Will be set to BOOMERANG_INITIAL_COUNT when first acquired
-boomerang_projectiles = [] # List to store active boomerang projectiles
-has_boomerang_weapon = False
-last_boomerang_shot_time = 0.0
-
-# --- Player Variables ---
-movement_speed = settings.INITIAL_MOVEMENT_SPEED  # Player movement speed, made global for upgrades
-player_level = settings.INITIAL_PLAYER_LEVEL
-player_pickup_radius_multiplier = 1.0 # For pickup radius upgrade
-max_player_health = settings.INITIAL_PLAYER_HEALTH # Max health can be upgraded
-active_orbital_weapons = [] # List to store active orbital weapons
-current_player_health = settings.INITIAL_PLAYER_HEALTH
 
 # --- Player Health Bar UI ---
 PLAYER_HEALTH_BAR_WIDTH = settings.PLAYER_HEALTH_BAR_WIDTH
 PLAYER_HEALTH_BAR_HEIGHT = settings.PLAYER_HEALTH_BAR_HEIGHT
 PLAYER_HEALTH_BAR_Y_OFFSET = settings.PLAYER_HEALTH_BAR_Y_OFFSET
 
-# --- Player Archetypes ---
-PLAYER_ARCHETYPES = [
-    {
-        "id": "standard",
-        "name": "Standard",
-        "color": settings.CRIMSON,
-        "description": "Single shot",
-        "shoot_cooldown_modifier": 1.0,
-        "shoot_function_name": "shoot_standard"
-    },
-    {
-        "id": "triple_shot",
-        "name": "Spread",
-        "color": settings.MEDIUM_PURPLE,
-        "description": "301",
-        "shoot_cooldown_modifier": 1.15, # Slightly longer base cooldown
-        "shoot_function_name": "shoot_triple"
-    },
-    {
-        "id": "nova_burst",
-        "name": "Burst",
-        "color": settings.TEAL,
-        "description": "Splosion",
-        "shoot_cooldown_modifier": 1.6, # Noticeably longer base cooldown
-        "shoot_function_name": "shoot_nova"
-    },
-    {
-        "id": "bouncing_shot",
-        "name": "Ricochet",
-        "color": settings.FOREST_GREEN,
-        "description": "Bouncing shot",
-        "shoot_cooldown_modifier": 0.8,
-        "shoot_function_name": "shoot_bouncing"
-    }
-]
-selected_player_archetype = None # Will hold the chosen dict from PLAYER_ARCHETYPES
-character_select_active = True # Start with character selection
-
-# --- Shooting Functions ---
-def shoot_standard(player_world_pos, all_enemies, particle_list, particle_color, camera_offset_for_aiming):
-    global num_standard_projectiles # Access the global count
-    if not all_enemies and num_standard_projectiles > 0: # Allow shooting if projectiles > 0 even without enemies for visual feedback
-        base_direction = pygame.Vector2(0, -1) # Default upwards if no enemies
-    elif not all_enemies:
-        return # No enemies and no projectiles to shoot (should not happen if archetype selected)
-    else:
-        nearest_enemy = min(all_enemies, key=lambda e: (e.pos - player_world_pos).length_squared())
-        base_direction = (nearest_enemy.pos - player_world_pos).normalize() if (nearest_enemy.pos - player_world_pos).length_squared() > 0 else pygame.Vector2(0, -1)
-    if standard_shot_sound:
-        standard_shot_sound.play()
-    
-    spread_angle_deg = 10 # Angle between projectiles if multiple
-    total_angle_span = (num_standard_projectiles - 1) * spread_angle_deg
-    start_angle_offset = -total_angle_span / 2
-
-    for i in range(num_standard_projectiles):
-        angle_offset = start_angle_offset + i * spread_angle_deg
-        shot_direction = base_direction.rotate(angle_offset)
-        # Target is a point far in the calculated direction
-        particle_list.append(Particle(player_world_pos, player_world_pos + shot_direction * 100, color=particle_color))
-
-def shoot_triple(player_world_pos, all_enemies, particle_list, particle_color, camera_offset_for_aiming):
-    if not all_enemies: return
-    if triple_shot_sound:
-        triple_shot_sound.play()
-    nearest_enemy = min(all_enemies, key=lambda e: (e.pos - player_world_pos).length_squared())
-    base_direction = (nearest_enemy.pos - player_world_pos).normalize() if (nearest_enemy.pos - player_world_pos).length_squared() > 0 else pygame.Vector2(0, -1)
-    for angle_offset in [-15, 0, 15]:
-        shot_direction = base_direction.rotate(angle_offset)
-        particle_list.append(Particle(player_world_pos, player_world_pos + shot_direction * 100, color=particle_color)) # Target is far point
-
-def shoot_nova(player_world_pos, all_enemies, particle_list, particle_color, camera_offset_for_aiming):
-    if nova_shot_sound:
-        nova_shot_sound.play()
-    for i in range(8): # 8 projectiles
-        shot_direction = pygame.Vector2(1, 0).rotate(i * 45) # 360/8 = 45 degrees
-        particle_list.append(Particle(player_world_pos, player_world_pos + shot_direction * 100, color=particle_color))
-
-def shoot_bouncing(player_world_pos, all_enemies, particle_list, particle_color_unused, camera_offset_for_aiming):
-    if bouncing_shot_sound:
-        bouncing_shot_sound.play()
-
-    # Generate a random direction
-    random_angle = random.uniform(0, 2 * math.pi) # Angle in radians
-    target_direction = pygame.Vector2(math.cos(random_angle), math.sin(random_angle)).normalize()
-    
-    far_target_pos = player_world_pos + target_direction * 100 # For initial direction calculation
-
-    particle_list.append(BouncingParticle(
-        player_world_pos, far_target_pos, # BouncingParticle uses its own color from settings
-        # Other params like speed, radius, lifetime, max_bounces are defaults in BouncingParticle constructor
-    ))
-
-SHOOT_FUNCTIONS = {
-    "shoot_standard": shoot_standard,
-    "shoot_triple": shoot_triple,
-    "shoot_nova": shoot_nova,
-    "shoot_bouncing": shoot_bouncing,
-}
-
 # --- UI Bar Setup ---
-MAX_PICKUPS_FOR_FULL_BAR = settings.INITIAL_MAX_PICKUPS_FOR_FULL_BAR
-
 BAR_HEIGHT = settings.BAR_HEIGHT
 BAR_MAX_WIDTH = settings.BAR_MAX_WIDTH
-BAR_X = screen.get_width() // 2 - BAR_MAX_WIDTH // 2
+BAR_X = settings.SCREEN_WIDTH // 2 - BAR_MAX_WIDTH // 2
 BAR_Y = 20  # Small margin from the top edge
 BAR_BG_COLOR = settings.DARK_SLATE_GRAY
 BAR_FILL_COLOR = settings.GOLD
-current_pickups_count = 0  # How many pickups collected towards the current bar fill
 LEVEL_TEXT_COLOR = settings.WHITE
 LEVEL_TEXT_OFFSET_X = settings.LEVEL_TEXT_OFFSET_X
 
 # --- Store Setup ---
-store_active = False
 STORE_BG_COLOR = settings.STORE_BG_COLOR
 STORE_TEXT_COLOR = settings.STORE_TEXT_COLOR
 STORE_BUTTON_COLOR = settings.STORE_BUTTON_COLOR
-
-SHOOT_COOLDOWN = settings.INITIAL_SHOOT_COOLDOWN # Seconds
 STORE_BUTTON_HOVER_COLOR = settings.LIGHT_SKY_BLUE
-
-# --- Game Timer ---
-total_game_time_seconds = 0.0
-kill_count = 0 # Initialize kill counter
-ui_font = None # Will be initialized with store fonts
-
-# --- Game Over State ---
-game_over_active = False
-game_over_font_large = None # For "GAME OVER" text
-# ui_font (store_font_medium) will be used for smaller game over text like score
-
-try:
-    store_font_large = pygame.font.Font(settings.FONT_DEFAULT_PATH, 48) # For title
-    store_font_medium = pygame.font.Font(settings.FONT_DEFAULT_PATH, 36) # For buttons/text
-    game_over_font_large = pygame.font.Font(None, 96) # Larger font for "GAME OVER"
-except pygame.error as e:
-    print(f"Font loading error: {e}. Using default system font.")
-    store_font_large = pygame.font.SysFont(settings.FONT_DEFAULT_PATH, 48)
-    store_font_medium = pygame.font.SysFont(settings.FONT_DEFAULT_PATH, 36)
-    game_over_font_large = pygame.font.SysFont(None, 96)
-ui_font = store_font_medium # Use the medium font for UI elements like the timer
-
-
-# --- Master Store Items List ---
-MASTER_STORE_ITEMS = [
-    {"id": "faster_shots", "text": "Faster Shots", "cost_text": "(Full Bar)"},
-    {"id": "player_speed", "text": "Player Speed+", "cost_text": "(Full Bar)"},
-    {"id": "max_health", "text": "Max Health+", "cost_text": "(Full Bar)"},
-    {"id": "pickup_radius", "text": "Pickup Radius+", "cost_text": "(Full Bar)"},
-    {"id": "heal_fully", "text": "Heal Fully", "cost_text": "(Full Bar)"},
-    {"id": "standard_shot_upgrade", "text": "Standard Shot+", "cost_text": "(Full Bar)"},
-    {"id": "boomerang_weapon", "text": "Boomerang+", "cost_text": "(Full Bar)"}, # Changed text
-    {"id": "orbital_weapon", "text": "Orbital Guard", "cost_text": "(Full Bar)"},
-    # Add more items here, e.g.:
-    # {"id": "damage_boost", "text": "Damage Boost", "cost_text": "(Full Bar)"},
-    # {"id": "temp_invincibility", "text": "Brief Shield", "cost_text": "(Full Bar)"},
-]
-displayed_store_items = [] # Will hold the 3 items currently shown in the store
-
 continue_button_text = "Continue Game"
 continue_button_rect = None
 
-# --- Reset Game State ---
-def reset_game_state():
-    global player_pos, enemies, particles, pickup_particles, total_game_time_seconds
-    global current_pickups_count, MAX_PICKUPS_FOR_FULL_BAR, SHOOT_COOLDOWN, movement_speed, camera_offset, current_player_health, max_player_health, kill_count, player_trail_positions, player_pickup_radius_multiplier, active_orbital_weapons, MAX_ENEMIES, boomerang_projectiles, has_boomerang_weapon, last_boomerang_shot_time, num_boomerangs_to_fire, num_standard_projectiles
-    global game_over_active, store_active, enemy_spawn_timer, last_shot_time, player_level
-
-    # Stop any currently playing background music first to avoid overlap on restart
-    if background_music_stage_1:
-        background_music_stage_1.stop()
-
-    # Calculate world center if map exists, otherwise screen center
-    if TILE_WIDTH > 0 and TILE_HEIGHT > 0:
-        world_pixel_width = WORLD_TILES_X * TILE_WIDTH
-        world_pixel_height = WORLD_TILES_Y * TILE_HEIGHT
-        player_pos = pygame.Vector2(world_pixel_width / 2, world_pixel_height / 2)
-    else:
-        # Fallback to screen center if no tileable map is defined (e.g., image failed to load)
-        player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-    enemies.clear()
-    particles.clear() # Player shots
-    pickup_particles.clear() # Gold particles
-    player_trail_positions.clear() # For player trail
-    active_orbital_weapons.clear() # Clear any active orbital weapons
-    boomerang_projectiles.clear() # Clear boomerangs
-
-    total_game_time_seconds = 0.0
-    current_pickups_count = 0
-    MAX_PICKUPS_FOR_FULL_BAR = settings.INITIAL_MAX_PICKUPS_FOR_FULL_BAR
-    SHOOT_COOLDOWN = settings.INITIAL_SHOOT_COOLDOWN
-    movement_speed = settings.INITIAL_MOVEMENT_SPEED
-    MAX_ENEMIES = settings.MAX_ENEMIES # Reset MAX_ENEMIES to initial value
-    player_level = settings.INITIAL_PLAYER_LEVEL
-    max_player_health = settings.INITIAL_PLAYER_HEALTH
-    current_player_health = max_player_health
-    player_pickup_radius_multiplier = 1.0
-    num_boomerangs_to_fire = 0 # Reset, will be set to initial when first bought
-    num_standard_projectiles = 0 # Reset, will be set when standard archetype is chosen
-    has_boomerang_weapon = False
-
-    kill_count = 0 # Reset kill count
-    enemy_spawn_timer = 0.0
-    last_shot_time = 0.0
-    last_boomerang_shot_time = 0.0
-
-    game_over_active = False
-    store_active = False # character_select_active is handled separately
-    displayed_store_items.clear() # Clear store offerings
-    
-    # Reset camera based on player's starting position
-    camera_offset.x = player_pos.x - screen.get_width() / 2
-    camera_offset.y = player_pos.y - screen.get_height() / 2
-
-    # Start background music for the stage if loaded
-    if background_music_stage_1:
-        background_music_stage_1.play(loops=-1) # Play indefinitely
-
-# --- Populate Store with Random Items ---
-def populate_store_offerings():
-    global displayed_store_items, has_boomerang_weapon, active_orbital_weapons, num_boomerangs_to_fire, selected_player_archetype, num_standard_projectiles # Make globals accessible
-    displayed_store_items.clear()
-
-    available_master_items = []
-    for item_template in MASTER_STORE_ITEMS:
-        can_add = True
-        if item_template["id"] == "boomerang_weapon":
-            if has_boomerang_weapon and num_boomerangs_to_fire >= settings.BOOMERANG_MAX_COUNT:
-                can_add = False # Don't offer if maxed out
-        elif item_template["id"] == "standard_shot_upgrade":
-            if not selected_player_archetype or selected_player_archetype["id"] != "standard":
-                can_add = False # Only offer if standard archetype is active
-            elif num_standard_projectiles >= settings.STANDARD_SHOT_MAX_PROJECTILES:
-                can_add = False # Don't offer if maxed out
-        # Example for limiting orbital weapons if desired (currently stackable)
-        # MAX_ORBITAL_WEAPONS_ALLOWED = 1 # Define in settings
-        # if item_template["id"] == "orbital_weapon" and len(active_orbital_weapons) >= MAX_ORBITAL_WEAPONS_ALLOWED:
-        #     can_add = False
-        if can_add:
-            available_master_items.append(item_template)
-
-    num_to_display = min(len(available_master_items), 3)
-    displayed_store_items = random.sample(available_master_items, num_to_display) if available_master_items else []
-
-    for item in displayed_store_items: # Ensure rect is reset
-        item["rect"] = None
+# --- Fonts ---
+store_font_large = None
+store_font_medium = None
+game_over_font_large = None # For "GAME OVER" text
+ui_font = None # ui_font (store_font_medium) is used for the timer and smaller game over text
+
+
+def load_assets():
+    """Loads everything in assets.MANIFEST right away. Needs a display and the mixer."""
+    use_assets(assets.AssetLoader().load())
+
+
+def use_assets(loaded):
+    """Takes the {name: asset} dict from an assets.AssetLoader. Failed assets are None and are skipped when drawing."""
+    global select_archetype_sound, standard_player_image, triple_shot_player_image
+    global nova_burst_player_image, bouncing_shot_player_image
+    select_archetype_sound = loaded.get("select_archetype")
+    for name in assets.GAME_SOUNDS:
+        if loaded.get(name) is not None:
+            game_sounds[name] = loaded[name]
+    standard_player_image = loaded.get("standard_player_image")
+    triple_shot_player_image = loaded.get("triple_shot_player_image")
+    nova_burst_player_image = loaded.get("nova_burst_player_image")
+    bouncing_shot_player_image = loaded.get("bouncing_shot_player_image")
+    _set_background(loaded.get("background"))
+
+
+def load_background(convert=True):
+    """Loads the static background tile and sets TILE_WIDTH/TILE_HEIGHT. convert needs a display."""
+    try:
+        loaded_image = assets.load_image(settings.IMAGE_BACKGROUND_PATH)
+        _set_background(assets.convert_image(loaded_image) if convert else loaded_image)
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Error loading static background image: {e}")
+        _set_background(None) # Fallback if image doesn't load
+
+
+def _set_background(image):
+    global static_background_image, TILE_WIDTH, TILE_HEIGHT
+    static_background_image = image
+    TILE_WIDTH = 0
+    TILE_HEIGHT = 0
+    if static_background_image:
+        TILE_WIDTH = static_background_image.get_width()
+        TILE_HEIGHT = static_background_image.get_height()
+
+
+def load_fonts():
+    global store_font_large, store_font_medium, game_over_font_large, ui_font
+    try:
+        store_font_large = pygame.font.Font(settings.FONT_DEFAULT_PATH, 48) # For title
+        store_font_medium = pygame.font.Font(settings.FONT_DEFAULT_PATH, 36) # For buttons/text
+        game_over_font_large = pygame.font.Font(None, 96) # Larger font for "GAME OVER"
+    except pygame.error as e:
+        print(f"Font loading error: {e}. Using default system font.")
+        store_font_large = pygame.font.SysFont(settings.FONT_DEFAULT_PATH, 48)
+        store_font_medium = pygame.font.SysFont(settings.FONT_DEFAULT_PATH, 36)
+        game_over_font_large = pygame.font.SysFont(None, 96)
+    ui_font = store_font_medium # Use the medium font for UI elements like the timer
+
+
+def restart_background_music():
+    # From the start of the track, fading out whatever is playing first
+    music_player.play(audio.BACKGROUND_MUSIC_STAGE_1, restart=True)
+
+
+# --- Startup ---
+startup_marks = {} # Seconds from STARTUP_START to "import", "first_frame" and "interactive"
+
+
+def mark_startup(name):
+    startup_marks.setdefault(name, time.perf_counter() - STARTUP_START) # Only the first time counts
+
+
+def draw_loading_screen(surface, progress):
+    surface.fill(settings.DARK_BLUE)
+    text_surf = text_cache.render(ui_font, "Loading...", True, settings.WHITE)
+    text_rect = text_surf.get_rect(center=(surface.get_width() / 2, surface.get_height() / 2 - 30))
+    surface.blit(text_surf, text_rect)
+    bar_rect = pygame.Rect(0, 0, BAR_MAX_WIDTH, BAR_HEIGHT)
+    bar_rect.center = (surface.get_width() // 2, surface.get_height() // 2 + 20)
+    pygame.draw.rect(surface, BAR_BG_COLOR, bar_rect)
+    pygame.draw.rect(surface, BAR_FILL_COLOR, (bar_rect.x, bar_rect.y, bar_rect.width * progress, bar_rect.height))
+
+
+def wait_for_assets(loader):
+    """Shows the loading screen until loader's worker is done, then uses its assets. False if the window was closed."""
+    loader.start()
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+        draw_loading_screen(screen, loader.progress())
+        pygame.display.flip()
+        mark_startup("first_frame")
+        done = loader.wait(1 / settings.LOADING_SCREEN_FPS) # Returns as soon as the worker finishes
+    use_assets(loader.finish())
+    return True
+
+
+def print_startup_report(loader):
+    marks = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in startup_marks.items())
+    print(f"Startup: {marks}")
+    slowest = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in loader.slowest())
+    print(f"Slowest assets: {slowest}")
+
 
 # --- Draw Game Over Screen ---
 def draw_game_over_screen(surface, final_time_seconds):
-    # Semi-transparent overlay
-    overlay_color = pygame.Color(10, 10, 20, 200) # Dark semi-transparent
-    overlay_surface = pygame.Surface((surface.get_width(), surface.get_height()), pygame.SRCALPHA)
-    overlay_surface.fill(overlay_color)
-    surface.blit(overlay_surface, (0, 0))
+    global game_over_overlay
+    # Semi-transparent overlay, made once per screen size
+    if game_over_overlay is None or game_over_overlay.get_size() != surface.get_size():
+        overlay_color = pygame.Color(10, 10, 20, 200) # Dark semi-transparent
+        game_over_overlay = pygame.Surface(surface.get_size(), pygame.SRCALPHA)
+        game_over_overlay.fill(overlay_color)
+    surface.blit(game_over_overlay, (0, 0))
 
     # "GAME OVER" Text
-    game_over_text_surf = game_over_font_large.render("GAME OVER", True, settings.CRIMSON)
+    game_over_text_surf = text_cache.render(game_over_font_large, "GAME OVER", True, settings.CRIMSON)
     game_over_text_rect = game_over_text_surf.get_rect(center=(surface.get_width() / 2, surface.get_height() / 3))
     surface.blit(game_over_text_surf, game_over_text_rect)
 
@@ -768,7 +205,7 @@ def draw_game_over_screen(surface, final_time_seconds):
     minutes = int(final_time_seconds // 60)
     seconds = int(final_time_seconds % 60)
     time_str = f"Time Survived: {minutes:02}:{seconds:02}"
-    score_surf = ui_font.render(time_str, True, settings.WHITE) # ui_font is store_font_medium
+    score_surf = text_cache.render(ui_font, time_str, True, settings.WHITE) # ui_font is store_font_medium
     score_rect = score_surf.get_rect(center=(surface.get_width() / 2, game_over_text_rect.bottom + 60))
     surface.blit(score_surf, score_rect)
 
@@ -776,14 +213,14 @@ def draw_game_over_screen(surface, final_time_seconds):
     quit_text = "Press 'Q' to Quit"
     restart_text = "Press 'R' to Restart"
 
-    quit_surf = ui_font.render(quit_text, True, settings.GREY)
+    quit_surf = text_cache.render(ui_font, quit_text, True, settings.GREY)
     quit_rect = quit_surf.get_rect(center=(surface.get_width() / 2, score_rect.bottom + 40))
     surface.blit(quit_surf, quit_rect)
-    restart_surf = ui_font.render(restart_text, True, settings.GREY)
+    restart_surf = text_cache.render(ui_font, restart_text, True, settings.GREY)
     restart_rect = restart_surf.get_rect(center=(surface.get_width() / 2, quit_rect.bottom + 30))
     surface.blit(restart_surf, restart_rect)
 
-def draw_store_window(surface):
+def draw_store_window(surface, displayed_store_items):
     global continue_button_rect # Allow modification
     store_width = 500
     store_height = 400
@@ -795,7 +232,7 @@ def draw_store_window(surface):
     pygame.draw.rect(surface, settings.WHITE, (store_x, store_y, store_width, store_height), width=2, border_radius=10) # Border
 
     # Title
-    title_surf = store_font_large.render("UPGRADE STORE", True, STORE_TEXT_COLOR)
+    title_surf = text_cache.render(store_font_large, "UPGRADE STORE", True, STORE_TEXT_COLOR)
     title_rect = title_surf.get_rect(center=(store_x + store_width // 2, store_y + 40))
     surface.blit(title_surf, title_rect)
 
@@ -809,10 +246,10 @@ def draw_store_window(surface):
         item_text = f"{item['text']} {item['cost_text']}"
         button_rect = pygame.Rect(store_x + 50, current_y, store_width - 100, button_height)
         item["rect"] = button_rect # Store rect for click detection
-        
+
         btn_color = STORE_BUTTON_HOVER_COLOR if button_rect.collidepoint(mouse_pos) else STORE_BUTTON_COLOR
         pygame.draw.rect(surface, btn_color, button_rect, border_radius=5)
-        item_surf = store_font_medium.render(item_text, True, STORE_TEXT_COLOR)
+        item_surf = text_cache.render(store_font_medium, item_text, True, STORE_TEXT_COLOR)
         item_surf_rect = item_surf.get_rect(center=button_rect.center)
         surface.blit(item_surf, item_surf_rect)
         current_y += button_height + button_padding
@@ -821,7 +258,7 @@ def draw_store_window(surface):
     continue_button_rect = pygame.Rect(store_x + 50, store_y + store_height - 70, store_width - 100, button_height)
     btn_color = STORE_BUTTON_HOVER_COLOR if continue_button_rect.collidepoint(mouse_pos) else STORE_BUTTON_COLOR
     pygame.draw.rect(surface, btn_color, continue_button_rect, border_radius=5)
-    continue_surf = store_font_medium.render(continue_button_text, True, STORE_TEXT_COLOR)
+    continue_surf = text_cache.render(store_font_medium, continue_button_text, True, STORE_TEXT_COLOR)
     continue_surf_rect = continue_surf.get_rect(center=continue_button_rect.center)
     surface.blit(continue_surf, continue_surf_rect)
 
@@ -858,26 +295,25 @@ def _draw_single_archetype_card(surface, archetype_data, x, y, card_width, card_
         pygame.draw.circle(surface, archetype_data["color"], (visual_center_x, visual_center_y), default_circle_radius)
         visual_element_bottom_y = visual_center_y + default_circle_radius
 
-    name_surf = title_font.render(archetype_data["name"], True, settings.WHITE)
+    name_surf = text_cache.render(title_font, archetype_data["name"], True, settings.WHITE)
     name_rect = name_surf.get_rect(center=(visual_center_x, visual_element_bottom_y + 25))
     surface.blit(name_surf, name_rect)
 
     desc_lines = archetype_data["description"].splitlines()
     line_y_offset = name_rect.bottom + 10
     for line_idx, line_text in enumerate(desc_lines):
-        desc_surf = desc_font.render(line_text, True, settings.LIGHT_SKY_BLUE)
+        desc_surf = text_cache.render(desc_font, line_text, True, settings.LIGHT_SKY_BLUE)
         desc_rect = desc_surf.get_rect(center=(visual_center_x, line_y_offset + line_idx * (desc_font.get_height() + 2)))
         surface.blit(desc_surf, desc_rect)
 
 # --- Draw Character Selection Screen ---
 def draw_character_select_screen(surface):
-    global PLAYER_ARCHETYPES # To store rects for clicking
     surface.fill(settings.DARK_BLUE) # Simple background for this screen
 
     title_font = store_font_large # Reuse store font
     desc_font = ui_font # Reuse UI font
-    
-    title_surf = title_font.render("CHOOSE YOUR VESSEL", True, settings.WHITE)
+
+    title_surf = text_cache.render(title_font, "CHOOSE YOUR VESSEL", True, settings.WHITE)
     title_rect = title_surf.get_rect(center=(surface.get_width() / 2, 80))
     surface.blit(title_surf, title_rect)
 
@@ -887,13 +323,13 @@ def draw_character_select_screen(surface):
     row_padding = 30 # Vertical padding between rows
 
     mouse_pos = pygame.mouse.get_pos()
-    
+
     num_total_archetypes = len(PLAYER_ARCHETYPES)
     archetypes_for_row1 = []
     archetype_for_row2 = None # Will hold the 4th archetype if it exists
 
     y_pos_row1 = 0
-    y_pos_row2 = 0 
+    y_pos_row2 = 0
 
     if num_total_archetypes >= 4: # Two rows needed
         archetypes_for_row1 = PLAYER_ARCHETYPES[:3]
@@ -923,602 +359,470 @@ def draw_character_select_screen(surface):
         # start_x_for_row1 would be the x-coordinate of the first item in row 1.
         # If row 1 was empty, this would need a fallback, but given the logic,
         # if archetype_for_row2 exists, row 1 (archetypes_for_row1) is guaranteed to be populated.
-        option_x_row2 = start_x_for_row1 
-        
+        option_x_row2 = start_x_for_row1
+
         _draw_single_archetype_card(surface, archetype_for_row2, option_x_row2, y_pos_row2,
                                     option_width, option_height, mouse_pos, title_font, desc_font,
                                     standard_player_image, triple_shot_player_image,
                                     nova_burst_player_image, bouncing_shot_player_image)
 
 
-while running:
-    # dt is delta time in seconds since last frame, used for framerate-independent physics.
-    dt = clock.tick(settings.FPS) / 1000
+def _player_image_for(archetype):
+    if not archetype:
+        return None
+    if archetype["id"] == "standard": return standard_player_image
+    if archetype["id"] == "triple_shot": return triple_shot_player_image
+    if archetype["id"] == "nova_burst": return nova_burst_player_image
+    if archetype["id"] == "bouncing_shot": return bouncing_shot_player_image
+    return None
 
-    # --- Event Handling ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        if character_select_active:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_pos = pygame.mouse.get_pos()
-                for archetype in PLAYER_ARCHETYPES:
-                    if archetype.get("rect") and archetype["rect"].collidepoint(mouse_pos):
-                        selected_player_archetype = archetype
-                        if select_archetype_sound:
-                            select_archetype_sound.play()
-                        character_select_active = False
-                        game_over_active = False # Ensure it's false
-                        store_active = False     # Ensure it's false
-                        reset_game_state() # Initialize game with selected character
-                        print(f"Selected: {selected_player_archetype['name']}")
-                        break
-                if selected_player_archetype and selected_player_archetype["id"] == "standard":
-                    num_standard_projectiles = settings.STANDARD_SHOT_INITIAL_PROJECTILES
-                    print(f"Standard archetype selected. Projectiles: {num_standard_projectiles}")
-        elif game_over_active:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_q:
-                    running = False
-                elif event.key == pygame.K_r:
-                    reset_game_state() # Restart with the same character
-                    game_over_active = False # Explicitly set game_over_active to False
-        elif store_active: # Store is active, and game is not over
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1: # Left mouse button
-                mouse_pos = pygame.mouse.get_pos()
-                for item in displayed_store_items: # Check against displayed items
-                    if item["rect"] and item["rect"].collidepoint(mouse_pos):
-                        # Apply upgrade
-                        if item["id"] == "faster_shots":
-                            SHOOT_COOLDOWN = max(0.05, SHOOT_COOLDOWN * 0.85) 
-                            print(f"Faster Shots purchased! New cooldown: {SHOOT_COOLDOWN:.2f}")
-                        elif item["id"] == "pickup_radius":
-                            player_pickup_radius_multiplier *= 1.25
-                            print(f"Pickup Radius+ purchased! New multiplier: {player_pickup_radius_multiplier:.2f}")
-                        elif item["id"] == "player_speed":
-                            movement_speed = int(movement_speed * 1.15)
-                            print(f"Player Speed+ purchased! New speed: {movement_speed:.0f}")
-                        elif item["id"] == "max_health":
-                            max_player_health = int(max_player_health * 1.20)
-                            current_player_health = max_player_health # Heal to new max
-                            print(f"Max Health+ purchased! New max health: {max_player_health}")
-                        elif item["id"] == "heal_fully":
-                            current_player_health = max_player_health
-                            print(f"Healed Fully! Health: {current_player_health}/{max_player_health}")
-                        elif item["id"] == "orbital_weapon":
-                            # For now, let's assume only one can be active or they stack somehow
-                            # This adds a new one each time. You might want to limit this or enhance existing.
-                            new_orbital = OrbitalWeapon(player_pos) # Pass the actual player_pos Vector2 object
-                            active_orbital_weapons.append(new_orbital)
-                            print(f"Orbital Guard activated! Count: {len(active_orbital_weapons)}")
-                        elif item["id"] == "boomerang_weapon":
-                            if not has_boomerang_weapon:
-                                has_boomerang_weapon = True
-                                num_boomerangs_to_fire = settings.BOOMERANG_INITIAL_COUNT
-                                print(f"Boomerang Weapon acquired! Firing {num_boomerangs_to_fire} boomerang(s).")
-                            elif num_boomerangs_to_fire < settings.BOOMERANG_MAX_COUNT:
-                                num_boomerangs_to_fire += 1
-                                print(f"Boomerang Upgraded! Now firing {num_boomerangs_to_fire} boomerang(s).")
-                        elif item["id"] == "standard_shot_upgrade":
-                            if selected_player_archetype and selected_player_archetype["id"] == "standard" and num_standard_projectiles < settings.STANDARD_SHOT_MAX_PROJECTILES:
-                                num_standard_projectiles += 1
-                                print(f"Standard Shot Upgraded! Now firing {num_standard_projectiles} projectile(s).")
-
-                        # Increase the requirement for the next bar fill
-                        MAX_PICKUPS_FOR_FULL_BAR = int(MAX_PICKUPS_FOR_FULL_BAR * 1.2 + 1)
-                        print(f"Next upgrade will require {MAX_PICKUPS_FOR_FULL_BAR} pickups.")
-
-                        store_active = False
-                        current_pickups_count = 0 # Reset bar
-                        displayed_store_items.clear() # Clear offerings for next time
-                        break 
-                # If no item was purchased (due to break), check continue button
-                if store_active and continue_button_rect and continue_button_rect.collidepoint(mouse_pos):
-                    store_active = False
-                    current_pickups_count = 0 # Reset bar
-                    displayed_store_items.clear() # Clear offerings
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                store_active = False
-                current_pickups_count = 0 # Reset bar when escaping store
-                displayed_store_items.clear() # Clear offerings
-        else: # Gameplay is active (not game over, not store)
-            # Handle other gameplay-specific events if any (currently none besides quit handled globally)
-            pass
-
-    # --- Game State Updates ---
-    # Background color transition (always active, even on game over screen for effect)
-    bg_color_transition_progress += settings.BG_COLOR_TRANSITION_SPEED * dt
-    if bg_color_transition_progress >= 1.0:
-        bg_color_transition_progress = 0.0 # Reset progress
-        current_bg_color_index = next_bg_color_index
-        next_bg_color_index = (next_bg_color_index + 1) % len(settings.BG_CYCLE_COLORS)
-
-    # Interpolate between the current and next background color
-    color1 = settings.BG_CYCLE_COLORS[current_bg_color_index]
-    color2 = settings.BG_CYCLE_COLORS[next_bg_color_index]
-    dynamic_bg_color = color1.lerp(color2, bg_color_transition_progress)
-
-    if not game_over_active and not character_select_active: # Only run game logic if not game over and character selected
-        if not store_active:
-            # --- Active Gameplay Logic ---
-            total_game_time_seconds += dt # Increment game timer
-
-            # Player Movement
-            move_direction = pygame.Vector2(0, 0)
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_w]:
-                move_direction.y -= 1
-            if keys[pygame.K_s]:
-                move_direction.y += 1
-            if keys[pygame.K_a]:
-                move_direction.x -= 1
-            if keys[pygame.K_d]:
-                move_direction.x += 1
-            if move_direction.length_squared() > 0:
-                move_direction.normalize_ip()
-                player_pos += move_direction * movement_speed * dt
-
-            # --- Player Trail Update ---
-            # Add current position to the trail history (world coordinates)
-            player_trail_positions.append(player_pos.copy())
-            if len(player_trail_positions) > settings.MAX_TRAIL_LENGTH:
-                player_trail_positions.pop(0) # Remove the oldest position
-
-            # Update camera_offset to keep player centered
-            camera_offset.x = player_pos.x - screen.get_width() / 2
-            camera_offset.y = player_pos.y - screen.get_height() / 2
-
-            # Clamp player_pos to world boundaries (if a background tile exists)
-            if TILE_WIDTH > 0 and TILE_HEIGHT > 0:
-                world_width_px = WORLD_TILES_X * TILE_WIDTH
-                world_height_px = WORLD_TILES_Y * TILE_HEIGHT
-                
-                player_pos.x = max(player_radius, min(player_pos.x, world_width_px - player_radius))
-                player_pos.y = max(player_radius, min(player_pos.y, world_height_px - player_radius))
-                # Re-calculate camera_offset after clamping player_pos to ensure it's also correct at boundaries
-                camera_offset.x = player_pos.x - screen.get_width() / 2
-                camera_offset.y = player_pos.y - screen.get_height() / 2
-
-            # Shooting Logic
-            current_time = pygame.time.get_ticks() / 1000.0
-            if selected_player_archetype: # Ensure an archetype is selected
-                effective_shoot_cooldown = SHOOT_COOLDOWN * selected_player_archetype["shoot_cooldown_modifier"]
-                
-                # Allow shooting even if no enemies for Nova, for others require enemies
-                can_shoot_condition = enemies or selected_player_archetype["id"] in ["nova_burst", "bouncing_shot"]
-
-                if (current_time - last_shot_time > effective_shoot_cooldown) and can_shoot_condition:
-                    last_shot_time = current_time
-                    shoot_func = SHOOT_FUNCTIONS[selected_player_archetype["shoot_function_name"]]
-                    shoot_func(player_pos, enemies, particles, settings.LIGHT_SKY_BLUE, camera_offset)
-
-            # Boomerang Firing Logic (if weapon acquired)
-            if has_boomerang_weapon and enemies and \
-               (current_time - last_boomerang_shot_time > settings.BOOMERANG_WEAPON_SHOOT_COOLDOWN):
-                last_boomerang_shot_time = current_time
-                
-                # Find the single nearest enemy for the central boomerang
-                nearest_enemy = min(enemies, key=lambda e: (e.pos - player_pos).length_squared(), default=None)
-                if nearest_enemy:
-                    base_direction_to_enemy = (nearest_enemy.pos - player_pos).normalize() if (nearest_enemy.pos - player_pos).length_squared() > 0 else pygame.Vector2(0, -1)
-                    
-                    # Spread angle for multiple boomerangs (e.g., 10 degrees between each)
-                    spread_angle_deg = 10 
-                    total_angle_span = (num_boomerangs_to_fire - 1) * spread_angle_deg
-                    start_angle_offset = -total_angle_span / 2
-                    for i in range(num_boomerangs_to_fire):
-                        angle_offset = start_angle_offset + i * spread_angle_deg
-                        shot_direction = base_direction_to_enemy.rotate(angle_offset)
-                        boomerang_projectiles.append(BoomerangProjectile(player_pos.copy(), player_pos + shot_direction * 100)) # Target is a far point in that direction
-                if boomerang_shot_sound:
-                    boomerang_shot_sound.play()
-
-            # Enemy Spawning
-            enemy_spawn_timer += dt
-            if enemy_spawn_timer >= ENEMY_SPAWN_INTERVAL and len(enemies) < MAX_ENEMIES:
-                enemy_spawn_timer = 0.0
-                spawn_type_roll = random.random()
-                screen_w, screen_h = screen.get_width(), screen.get_height() # Used by all spawns
-
-                # Determine spawn edge and base position (world coordinates)
-                edge = random.choice(["top", "bottom", "left", "right"])
-                margin = 30 # General margin for spawning off-screen
-                world_cx, world_cy = 0, 0
-
-                if edge == "top":
-                    world_cx = camera_offset.x + random.uniform(margin * 2, screen_w - margin * 2)
-                    world_cy = camera_offset.y - margin
-                elif edge == "bottom":
-                    world_cx = camera_offset.x + random.uniform(margin * 2, screen_w - margin * 2)
-                    world_cy = camera_offset.y + screen_h + margin
-                elif edge == "left":
-                    world_cx = camera_offset.x - margin
-                    world_cy = camera_offset.y + random.uniform(margin * 2, screen_h - margin * 2)
-                else:  # right
-                    world_cx = camera_offset.x + screen_w + margin
-                    world_cy = camera_offset.y + random.uniform(margin * 2, screen_h - margin * 2)
-
-                if spawn_type_roll < 0.40: # 40% chance for Triangle
-                    enemies.append(EnemyTriangle((screen.get_width(), screen.get_height()), camera_offset))
-                elif spawn_type_roll < 0.75: # 35% chance for Square Group (0.40 + 0.35 = 0.75)
-                    num_squares = random.randint(SQUARE_GROUP_SIZE_MIN, SQUARE_GROUP_SIZE_MAX)
-                    for _ in range(num_squares):
-                        if len(enemies) < MAX_ENEMIES:
-                            offset_world_pos = pygame.Vector2(world_cx + random.uniform(-25, 25), world_cy + random.uniform(-25, 25))
-                            enemies.append(SquareEnemy(offset_world_pos, screen_w, screen_h))
-                else: # 25% chance for Hexagon (remaining)
-                    if len(enemies) < MAX_ENEMIES:
-                        # Spawn a single hexagon at the calculated edge position
-                        enemies.append(HexagonEnemy(pygame.Vector2(world_cx, world_cy), screen_w, screen_h))
-            
-            # Update Projectiles (Player Shots)
-            world_bounds_for_particles = None
-            if TILE_WIDTH > 0 and TILE_HEIGHT > 0: # If world map exists
-                world_bounds_for_particles = (WORLD_TILES_X * TILE_WIDTH, WORLD_TILES_Y * TILE_HEIGHT)
-
-            for particle in particles[:]:
-                particle.update(dt, screen.get_width(), screen.get_height(), camera_offset, world_bounds_for_particles)
-                if not particle.is_alive(screen.get_width(), screen.get_height(), camera_offset, world_bounds_for_particles):
-                    particles.remove(particle)
-            
-            # Update Boomerang Projectiles
-            for bp in boomerang_projectiles[:]:
-                bp.update(dt, player_pos, world_bounds_for_particles) # player_pos for future use, world_bounds for consistency
-                if not bp.is_alive(0,0,None,None): # Simpler is_alive check for boomerang
-                    boomerang_projectiles.remove(bp)
-
-            # Enemy Update
-            for enemy in enemies: # No need to copy if not removing during iteration here
-                enemy.update(player_pos, dt)
-
-            # Update Orbital Weapons
-            for orbital in active_orbital_weapons:
-                orbital.update(dt) # player_pos is already a reference, so it uses the current player_pos
-
-            # Enemy-Enemy Collision Resolution (to prevent stacking)
-            for i, enemy1 in enumerate(enemies):
-                for j in range(i + 1, len(enemies)):
-                    enemy2 = enemies[j]
-                    
-                    dist_vec = enemy1.pos - enemy2.pos
-                    dist_sq = dist_vec.length_squared()
-                    total_radii = enemy1.collision_radius + enemy2.collision_radius
-
-                    if dist_sq < total_radii**2 and dist_sq > 0: # They are overlapping and not at the exact same spot
-                        distance = dist_vec.length()
-                        overlap = total_radii - distance
-                        separation_vector = dist_vec.normalize() * (overlap / 2) # Each moves by half the overlap
-                        
-                        enemy1.pos += separation_vector
-                        enemy2.pos -= separation_vector
-                    elif dist_sq == 0: # Exactly on top, nudge them apart randomly
-                        nudge = pygame.Vector2(random.uniform(-1, 1), random.uniform(-1, 1)).normalize() * 0.1
-                        enemy1.pos += nudge
-                        enemy2.pos -= nudge
-
-            # Collision: Projectile vs Enemy
-            for particle in particles[:]:
-                for enemy in enemies[:]: # Copy for safe removal
-                    enemy_col_radius = 0
-                    if isinstance(enemy, EnemyTriangle):
-                        enemy_col_radius = enemy.height * 0.5 # Approx radius for triangle tip area
-                    elif isinstance(enemy, SquareEnemy):
-                        enemy_col_radius = enemy.size * 0.707 # Approx half diagonal for square
-                    elif isinstance(enemy, HexagonEnemy):
-                        enemy_col_radius = enemy.radius_stat # Hexagon radius (center to vertex)
-
-                    if (particle.pos - enemy.pos).length_squared() < (particle.radius + enemy_col_radius)**2:
-                        should_remove_particle = True
-                        
-                        if isinstance(particle, BouncingParticle):
-                            if particle.bounces_left > 0:
-                                particle.bounce_off_object(enemy.pos, enemy_col_radius)
-                                particle.bounces_left -= 1
-                                # Consider adding a specific sound for enemy bounce if desired
-                                # if particle.bounce_sound: particle.bounce_sound.play()
-                                should_remove_particle = False # Don't remove if it bounced and has bounces left
-                            # If bounces_left is 0 (or becomes <0 after decrement), it will be removed
-
-                        if should_remove_particle and particle in particles:
-                            particles.remove(particle) # Check if still exists before removing
-                        
-                        destroyed = enemy.take_damage() if hasattr(enemy, 'take_damage') else True
-                        if enemy_hit_sound and destroyed: # Play sound if destroyed and sounds are loaded
-                            random.choice(enemy_hit_sound).play()
-                        if destroyed:
-                            # Chance to drop a special pickup
-                            if random.random() < SPECIAL_PICKUP_CHANCE:
-                                pickup_particles.append(PickupParticle(enemy.pos, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH, height=settings.SPECIAL_PICKUP_HEIGHT, value=settings.SPECIAL_PICKUP_VALUE))
-                            else:
-                                pickup_particles.append(PickupParticle(enemy.pos, color=settings.GOLD, width=settings.PICKUP_PARTICLE_WIDTH, height=settings.PICKUP_PARTICLE_HEIGHT, value=1))
-
-                            kill_count += 1 # Increment kill count
-                            if enemy in enemies: enemies.remove(enemy) # Check if still exists
-                        
-                        # Particle interacts with one enemy per collision pass.
-                        # If it was a standard particle, it's removed. If bouncing, it has bounced.
-                        break 
-
-            # Collision: Boomerang Projectile vs Enemy
-            for bp in boomerang_projectiles: # Boomerangs are not removed on hit
-                for enemy in enemies[:]:
-                    enemy_col_radius = 0
-                    if isinstance(enemy, EnemyTriangle): enemy_col_radius = enemy.height * 0.5
-                    elif isinstance(enemy, SquareEnemy): enemy_col_radius = enemy.size * 0.707
-                    elif isinstance(enemy, HexagonEnemy): enemy_col_radius = enemy.radius_stat
-
-                    if (bp.pos - enemy.pos).length_squared() < (bp.radius + enemy_col_radius)**2:
-                        enemy_id = id(enemy)
-                        if enemy_id not in bp.hit_enemies_this_pass:
-                            bp.hit_enemies_this_pass.add(enemy_id)
-                            
-                            destroyed = False
-                            if hasattr(enemy, 'take_damage'):
-                                destroyed = enemy.take_damage(bp.damage)
-                            else: # Simple enemies might be one-hit
-                                destroyed = True 
-
-                            if enemy_hit_sound: random.choice(enemy_hit_sound).play()
-                            
-                            if destroyed:
-                                if random.random() < SPECIAL_PICKUP_CHANCE: pickup_particles.append(PickupParticle(enemy.pos, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH, height=settings.SPECIAL_PICKUP_HEIGHT, value=settings.SPECIAL_PICKUP_VALUE))
-                                else: pickup_particles.append(PickupParticle(enemy.pos, value=1))
-                                kill_count += 1
-                                if enemy in enemies: enemies.remove(enemy)
-                        # Boomerang continues, does not break from inner loop unless you want it to hit only one enemy per frame
-
-            # Collision: Orbital Weapon vs Enemy
-            current_time_seconds = total_game_time_seconds # Use consistent game time
-            for orbital in active_orbital_weapons:
-                for enemy in enemies[:]: # Iterate over a copy for safe removal
-                    enemy_col_radius = 0
-                    if isinstance(enemy, EnemyTriangle):
-                        enemy_col_radius = enemy.height * 0.5
-                    elif isinstance(enemy, SquareEnemy):
-                        enemy_col_radius = enemy.size * 0.707
-                    elif isinstance(enemy, HexagonEnemy):
-                        enemy_col_radius = enemy.radius_stat
-
-                    if (orbital.pos - enemy.pos).length_squared() < (orbital.radius + enemy_col_radius)**2:
-                        # Check cooldown for this specific enemy
-                        enemy_id = id(enemy) # Get a unique ID for the enemy instance
-                        last_hit = orbital.last_hit_times.get(enemy_id, 0)
-                        if current_time_seconds - last_hit > orbital.hit_cooldown:
-                            orbital.last_hit_times[enemy_id] = current_time_seconds
-                            
-                            destroyed = enemy.take_damage(orbital.damage) if hasattr(enemy, 'take_damage') else True # Pass orbital's damage
-                            if enemy_hit_sound: # Play sound regardless of destruction for orbitals
-                                random.choice(enemy_hit_sound).play()
-                            if destroyed:
-                                if random.random() < SPECIAL_PICKUP_CHANCE: pickup_particles.append(PickupParticle(enemy.pos, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH, height=settings.SPECIAL_PICKUP_HEIGHT, value=settings.SPECIAL_PICKUP_VALUE))
-                                else: pickup_particles.append(PickupParticle(enemy.pos, value=1))
-                                kill_count += 1
-                                if enemy in enemies: enemies.remove(enemy)
-            # Collision: Player vs Pickup Particle
-            pickups_to_keep = []
-            for pickup in pickup_particles:
-                # AABB collision check: player (circle approximated as square) vs pickup (ellipse bounding box)
-                effective_player_pickup_radius = player_radius * player_pickup_radius_multiplier
-                player_world_rect = pygame.Rect(player_pos.x - effective_player_pickup_radius,
-                                                player_pos.y - effective_player_pickup_radius,
-                                                effective_player_pickup_radius * 2, effective_player_pickup_radius * 2)
-                pickup_world_rect = pygame.Rect(pickup.pos.x - pickup.width / 2,
-                                                pickup.pos.y - pickup.height / 2,
-                                                pickup.width, pickup.height)
-                if player_world_rect.colliderect(pickup_world_rect):
-                    if pickup_sound:
-                        pickup_sound.play()
-                    if current_pickups_count < MAX_PICKUPS_FOR_FULL_BAR:
-                        current_pickups_count += pickup.value
-                    if current_pickups_count >= MAX_PICKUPS_FOR_FULL_BAR and not store_active: # Check store_active again
-                        # Level up!
-                        player_level += 1 # Increment level when bar is full
-                        populate_store_offerings() # Choose items for the store
-                        MAX_ENEMIES = int(MAX_ENEMIES * 1.25) # Increase max enemies
-                        ENEMY_SPAWN_INTERVAL = max(0.5, ENEMY_SPAWN_INTERVAL * 0.9) # Decrease spawn interval, with a minimum limit
-                        store_active = True
-                        current_pickups_count = MAX_PICKUPS_FOR_FULL_BAR # Cap it
-                else:
-                    pickups_to_keep.append(pickup)
-            pickup_particles = pickups_to_keep
-
-            # --- Collision Detection (Player vs Enemy) ---
-            for enemy in enemies[:]: # Iterate over a copy in case an enemy is removed (though not in this loop)
-                enemy_hitbox_radius_for_player = 0
-                if isinstance(enemy, EnemyTriangle):
-                    # For triangle, pos is the tip. A smaller radius from the tip for player collision.
-                    enemy_hitbox_radius_for_player = enemy.height * 0.4 
-                elif isinstance(enemy, SquareEnemy):
-                    # For square, pos is the center. Radius is approx half diagonal.
-                    enemy_hitbox_radius_for_player = enemy.size * 0.5 
-                elif isinstance(enemy, HexagonEnemy):
-                    # For hexagon, use its radius, perhaps slightly reduced for player collision
-                    enemy_hitbox_radius_for_player = enemy.radius_stat * 0.85
-                if (player_pos - enemy.pos).length_squared() < (player_radius + enemy_hitbox_radius_for_player)**2:
-                    current_player_health -= 1
-                    print(f"Player hit! Health: {current_player_health}/{max_player_health}")
-                    # Knockback the enemy slightly or destroy if it's a one-hit type for player collision
-                    kill_count +=1 # Increment kill count when player collision destroys an enemy
-                    if enemy in enemies: enemies.remove(enemy) # Simple removal on hit, can be more complex
-
-                    if current_player_health <= 0:
-                        if player_death_sound:
-                            player_death_sound.play()
-                        game_over_active = True
-                        store_active = False 
-                        print(f"GAME OVER: Player health depleted by {type(enemy).__name__} at {enemy.pos}")
-                    elif enemy_hit_sound: # Player was hit but not dead
-                        random.choice(enemy_hit_sound).play() # Play a generic hit sound
-                    # Optional: Clear dynamic elements for a cleaner game over screen
-                    # enemies.clear()
-                    # particles.clear() 
-                    # pickup_particles.clear()
-                    break # One collision is enough to end the game
-        # else: store is active, most gameplay logic is paused
-    # else: game is over, all gameplay logic is paused
-
-    # --- Drawing ---
-    screen.fill(dynamic_bg_color) # Always fill screen with current background
 
+def draw_tiled_background(surface, camera_offset):
+    global background_cache
     # Draw Tiled Background (if image loaded)
     if static_background_image and TILE_WIDTH > 0 and TILE_HEIGHT > 0:
-        # Calculate which tiles are visible
-        start_col = int(camera_offset.x // TILE_WIDTH)
-        end_col = int((camera_offset.x + screen.get_width()) // TILE_WIDTH)
-        start_row = int(camera_offset.y // TILE_HEIGHT)
-        end_row = int((camera_offset.y + screen.get_height()) // TILE_HEIGHT)
-
-        for row in range(max(0, start_row), min(WORLD_TILES_Y, end_row + 1)):
-            for col in range(max(0, start_col), min(WORLD_TILES_X, end_col + 1)):
-                tile_world_x = col * TILE_WIDTH
-                tile_world_y = row * TILE_HEIGHT
-                
-                # Convert tile's world position to screen position
-                tile_screen_x = tile_world_x - camera_offset.x
-                tile_screen_y = tile_world_y - camera_offset.y
-                
-                screen.blit(static_background_image, (tile_screen_x, tile_screen_y))
+        # The visible tiles are composited into one cached surface, drawn with a single blit
+        view_size = surface.get_size()
+        if not background_cache or not background_cache.matches(static_background_image, WORLD_TILES_X,
+                                                                 WORLD_TILES_Y, view_size):
+            background_cache = background.BackgroundCache(static_background_image, WORLD_TILES_X,
+                                                          WORLD_TILES_Y, view_size)
+        background_cache.draw(surface, camera_offset)
     elif static_background_image: # Fallback if TILE_WIDTH/HEIGHT somehow 0 but image exists
-        screen.blit(static_background_image, (0,0)) # Original behavior
-
+        surface.blit(static_background_image, (0,0)) # Original behavior
+
+
+def draw_player_trail(surface, sim):
+    """Fading copies of the player at its last few positions."""
+    selected_player_archetype = sim.selected_player_archetype
+    if selected_player_archetype:
+        trail_renderer.draw(surface, sim.player_trail_positions, sim.camera_offset,
+                            image=_player_image_for(selected_player_archetype),
+                            color=selected_player_archetype["color"]) # Circles if there is no image
+
+
+def draw_hud(surface, sim):
+    """Pickup bar, level, timer and kill counter."""
+    # The HUD only changes when one of these does, in between the cached layer is blitted as is
+    hud_state = (sim.player_level, int(sim.total_game_time_seconds), sim.kill_count,
+                 sim.current_pickups_count, sim.max_pickups_for_full_bar, surface.get_width())
+    if hud_layer.needs_redraw(hud_state):
+        _redraw_hud_layer(surface.get_width(), sim, hud_state)
+    hud_layer.draw(surface)
+
+
+def _redraw_hud_layer(surface_width, sim, hud_state):
+    # Pickup bar
+    bar_rect = pygame.Rect(BAR_X, BAR_Y, BAR_MAX_WIDTH, BAR_HEIGHT)
+    fill_ratio = min(sim.current_pickups_count / sim.max_pickups_for_full_bar, 1.0) if sim.max_pickups_for_full_bar > 0 else 0
+    actual_fill_width = fill_ratio * BAR_MAX_WIDTH
+
+    # Player Level
+    level_text_str = f"Level: {sim.player_level}"
+    level_surf = text_cache.render(ui_font, level_text_str, True, LEVEL_TEXT_COLOR)
+    # Position it to the right of the bar, vertically centered with the bar
+    level_rect = level_surf.get_rect(midleft=(BAR_X + BAR_MAX_WIDTH + LEVEL_TEXT_OFFSET_X, BAR_Y + BAR_HEIGHT / 2))
+
+    # Game Timer (top right)
+    minutes = int(sim.total_game_time_seconds // 60)
+    seconds = int(sim.total_game_time_seconds % 60)
+    timer_text = f"{minutes:02}:{seconds:02}"
+    timer_surf = text_cache.render(ui_font, timer_text, True, settings.WHITE)
+    timer_rect = timer_surf.get_rect(topright=(surface_width - 20, 20))
+
+    # Kill Counter (below timer)
+    kill_text_str = f"Kills: {sim.kill_count}"
+    kill_surf = text_cache.render(ui_font, kill_text_str, True, settings.WHITE)
+    kill_rect = kill_surf.get_rect(topright=(surface_width - 20, timer_rect.bottom + 5)) # Position below timer
+
+    # Draw everything into a layer just big enough to hold it, positions relative to its top-left
+    layer_rect = bar_rect.unionall([level_rect, timer_rect, kill_rect])
+    layer = hud_layer.begin(layer_rect, hud_state)
+    offset_x = -layer_rect.x
+    offset_y = -layer_rect.y
+    pygame.draw.rect(layer, BAR_BG_COLOR, bar_rect.move(offset_x, offset_y))
+    pygame.draw.rect(layer, BAR_FILL_COLOR, (BAR_X + offset_x, BAR_Y + offset_y, actual_fill_width, BAR_HEIGHT))
+    layer.blit(level_surf, level_rect.move(offset_x, offset_y))
+    layer.blit(timer_surf, timer_rect.move(offset_x, offset_y))
+    layer.blit(kill_surf, kill_rect.move(offset_x, offset_y))
+
+
+def _projectile_sprites():
+    global projectile_sprites
+    if projectile_sprites is None:
+        projectile_sprites = sprites.ProjectileSpriteCache() # Built on first use, the sprites need a display
+    return projectile_sprites
+
+
+def draw_enemies(surface, sim):
+    global enemy_sprites
+    if enemy_sprites is None:
+        enemy_sprites = sprites.EnemySpriteCache() # Built on first use, the sprites need a display
+    enemy_sprites.draw_enemies(surface, sim.enemies, sim.player_pos, sim.camera_offset) # player_pos is world pos
+
+
+def draw_game(surface, sim, draw_store=True):
+    """Draws the world, player and HUD for an active (or store-paused) run."""
+    camera_offset = sim.camera_offset
+    selected_player_archetype = sim.selected_player_archetype
+
+    # Draw pickup particles (gold)
+    _projectile_sprites().draw_pickups(surface, sim.pickup_particles, camera_offset)
+
+    if not sim.store_active: # Only draw these game elements if not in store
+        draw_player_trail(surface, sim)
+
+        # Draw player projectiles (shots)
+        _projectile_sprites().draw_particles(surface, sim.particles, camera_offset)
+
+        # Draw Boomerang projectiles
+        _projectile_sprites().draw_particles(surface, sim.boomerang_projectiles, camera_offset)
+
+        # Draw enemies (one blit each from the sprite cache)
+        draw_enemies(surface, sim)
+
+    # Draw Orbital Weapons (drawn on top of enemies, under player if desired, or adjust order)
+    for orbital in sim.active_orbital_weapons:
+        orbital.draw(surface, camera_offset)
+
+    # Draw player
+    player_screen_pos = pygame.Vector2(surface.get_width() / 2, surface.get_height() / 2)
+    drawn_player_bottom_y = player_screen_pos.y + player_radius # Default for circle
+
+    player_image = _player_image_for(selected_player_archetype)
+    if player_image:
+        player_image_rect = player_image.get_rect(center=player_screen_pos)
+        surface.blit(player_image, player_image_rect)
+        drawn_player_bottom_y = player_image_rect.bottom
+    elif selected_player_archetype: # Other archetypes or fallback
+        player_draw_color = selected_player_archetype["color"]
+        pygame.draw.circle(surface, player_draw_color, player_screen_pos, player_radius)
+        # drawn_player_bottom_y remains as player_screen_pos.y + player_radius
+    else: # Fallback if no archetype selected (should not happen post-selection)
+        pygame.draw.circle(surface, settings.CRIMSON, player_screen_pos, player_radius)
+        # drawn_player_bottom_y remains as player_screen_pos.y + player_radius
+
+    # Draw Player Health Bar (below player)
+    if sim.current_player_health > 0: # Only draw if alive
+        health_ratio = sim.current_player_health / sim.max_player_health if sim.max_player_health > 0 else 0
+        bar_fill_width = int(PLAYER_HEALTH_BAR_WIDTH * health_ratio)
+        bar_x = player_screen_pos.x - PLAYER_HEALTH_BAR_WIDTH / 2
+        bar_y = drawn_player_bottom_y + PLAYER_HEALTH_BAR_Y_OFFSET - PLAYER_HEALTH_BAR_HEIGHT # Adjusted Y
+
+        # Background of health bar (e.g., dark red or grey)
+        pygame.draw.rect(surface, settings.DARK_SLATE_GRAY, (bar_x, bar_y, PLAYER_HEALTH_BAR_WIDTH, PLAYER_HEALTH_BAR_HEIGHT))
+        # Fill of health bar (e.g., green or red)
+        pygame.draw.rect(surface, settings.DARK_SEA_GREEN, (bar_x, bar_y, bar_fill_width, PLAYER_HEALTH_BAR_HEIGHT))
+
+    draw_hud(surface, sim)
+
+    if sim.store_active and draw_store: # Draw store on top if active (and game not over)
+        draw_store_window(surface, sim.displayed_store_items)
+
+
+# --- Idle Screens ---
+# The select, store and game over screens have nothing moving on them. The game loop sleeps in
+# wait_for_events() while one is up and only redraws it after input or when the hovered button changes.
+def wait_for_events(timeout_ms):
+    """Blocks until an event arrives or timeout_ms passes, then returns every queued event."""
+    event = pygame.event.wait(timeout_ms)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def idle_screen_name(character_select_active, sim):
+    """Which static screen is up, or None while the game is running."""
     if character_select_active:
-        draw_character_select_screen(screen)
-    elif game_over_active:
-        draw_game_over_screen(screen, total_game_time_seconds)
-    else: # Game is active (could be gameplay or store mode)
-        # Draw pickup particles (gold)
-        for pickup in pickup_particles:
-            pickup.draw(screen, camera_offset)
-        
-        if not store_active: # Only draw these game elements if not in store
-            # --- Draw Player Trail ---
-            if selected_player_archetype:
-                trail_image_base = None
-                if selected_player_archetype["id"] == "standard" and standard_player_image:
-                    trail_image_base = standard_player_image
-                elif selected_player_archetype["id"] == "triple_shot" and triple_shot_player_image:
-                    trail_image_base = triple_shot_player_image
-                elif selected_player_archetype["id"] == "nova_burst" and nova_burst_player_image:
-                    trail_image_base = nova_burst_player_image
-                elif selected_player_archetype["id"] == "bouncing_shot" and bouncing_shot_player_image:
-                    trail_image_base = bouncing_shot_player_image
-
-                num_trail_segments = len(player_trail_positions)
-                for i, trail_world_pos in enumerate(player_trail_positions):
-                    # Alpha fades from transparent (oldest) to TRAIL_MAX_ALPHA (newest in trail)
-                    alpha = int(((i + 1) / num_trail_segments) * settings.TRAIL_MAX_ALPHA) if num_trail_segments > 0 else settings.TRAIL_MAX_ALPHA
-                    
-                    trail_screen_pos = trail_world_pos - camera_offset
-
-                    if trail_image_base:
-                        temp_trail_image = trail_image_base.copy()
-                        temp_trail_image.set_alpha(alpha)
-                        trail_image_rect = temp_trail_image.get_rect(center=trail_screen_pos)
-                        screen.blit(temp_trail_image, trail_image_rect)
-                    else: # Fallback to drawing circles for trail if no image
-                        player_draw_color = selected_player_archetype["color"]
-                        # Create a temporary surface for the circle to apply alpha
-                        # Ensure the surface is large enough for the player_radius
-                        trail_circle_surface_size = player_radius * 2
-                        trail_circle_surface = pygame.Surface((trail_circle_surface_size, trail_circle_surface_size), pygame.SRCALPHA)
-                        pygame.draw.circle(trail_circle_surface, (*player_draw_color, alpha), (player_radius, player_radius), player_radius)
-
-                        trail_circle_rect = trail_circle_surface.get_rect(center=trail_screen_pos)
-                        screen.blit(trail_circle_surface, trail_circle_rect)
-
-            # Draw player projectiles (shots)
-            for particle in particles: # Player shots
-                particle.draw(screen, camera_offset)
-
-            # Draw Boomerang projectiles
-            for bp in boomerang_projectiles:
-                bp.draw(screen, camera_offset)
-
-            # Draw enemies
-            for enemy in enemies:
-                if isinstance(enemy, EnemyTriangle):
-                    enemy.draw(screen, player_pos, camera_offset) # player_pos is world pos
-                else: # SquareEnemy
-                    enemy.draw(screen, camera_offset)
-        
-        # Draw Orbital Weapons (drawn on top of enemies, under player if desired, or adjust order)
-        for orbital in active_orbital_weapons:
-            orbital.draw(screen, camera_offset)
-
-        # Draw player
-        player_screen_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-        drawn_player_bottom_y = player_screen_pos.y + player_radius # Default for circle
-
-        if selected_player_archetype and selected_player_archetype["id"] == "standard" and standard_player_image:
-            player_image_rect = standard_player_image.get_rect(center=player_screen_pos)
-            screen.blit(standard_player_image, player_image_rect)
-            drawn_player_bottom_y = player_image_rect.bottom
-        elif selected_player_archetype and selected_player_archetype["id"] == "triple_shot" and triple_shot_player_image:
-            player_image_rect = triple_shot_player_image.get_rect(center=player_screen_pos)
-            screen.blit(triple_shot_player_image, player_image_rect)
-            drawn_player_bottom_y = player_image_rect.bottom
-        elif selected_player_archetype and selected_player_archetype["id"] == "nova_burst" and nova_burst_player_image:
-            player_image_rect = nova_burst_player_image.get_rect(center=player_screen_pos)
-            screen.blit(nova_burst_player_image, player_image_rect)
-            drawn_player_bottom_y = player_image_rect.bottom
-        elif selected_player_archetype and selected_player_archetype["id"] == "bouncing_shot" and bouncing_shot_player_image:
-            player_image_rect = bouncing_shot_player_image.get_rect(center=player_screen_pos)
-            screen.blit(bouncing_shot_player_image, player_image_rect)
-            drawn_player_bottom_y = player_image_rect.bottom
-        elif selected_player_archetype: # Other archetypes or fallback
-            player_draw_color = selected_player_archetype["color"]
-            pygame.draw.circle(screen, player_draw_color, player_screen_pos, player_radius)
-            # drawn_player_bottom_y remains as player_screen_pos.y + player_radius
-        else: # Fallback if no archetype selected (should not happen post-selection)
-            pygame.draw.circle(screen, settings.CRIMSON, player_screen_pos, player_radius)
-            # drawn_player_bottom_y remains as player_screen_pos.y + player_radius
-
-        # Draw Player Health Bar (below player)
-        if current_player_health > 0: # Only draw if alive
-            health_ratio = current_player_health / max_player_health if max_player_health > 0 else 0
-            bar_fill_width = int(PLAYER_HEALTH_BAR_WIDTH * health_ratio)
-            bar_x = player_screen_pos.x - PLAYER_HEALTH_BAR_WIDTH / 2
-            bar_y = drawn_player_bottom_y + PLAYER_HEALTH_BAR_Y_OFFSET - PLAYER_HEALTH_BAR_HEIGHT # Adjusted Y
-
-            # Background of health bar (e.g., dark red or grey)
-            pygame.draw.rect(screen, settings.DARK_SLATE_GRAY, (bar_x, bar_y, PLAYER_HEALTH_BAR_WIDTH, PLAYER_HEALTH_BAR_HEIGHT))
-            # Fill of health bar (e.g., green or red)
-            pygame.draw.rect(screen, settings.DARK_SEA_GREEN, (bar_x, bar_y, bar_fill_width, PLAYER_HEALTH_BAR_HEIGHT))
-
-        # Draw UI Bar for pickups
-        pygame.draw.rect(screen, BAR_BG_COLOR, (BAR_X, BAR_Y, BAR_MAX_WIDTH, BAR_HEIGHT))
-        fill_ratio = min(current_pickups_count / MAX_PICKUPS_FOR_FULL_BAR, 1.0) if MAX_PICKUPS_FOR_FULL_BAR > 0 else 0
-        actual_fill_width = fill_ratio * BAR_MAX_WIDTH
-        pygame.draw.rect(screen, BAR_FILL_COLOR, (BAR_X, BAR_Y, actual_fill_width, BAR_HEIGHT))
-
-        # Draw Player Level
-        level_text_str = f"Level: {player_level}"
-        level_surf = ui_font.render(level_text_str, True, LEVEL_TEXT_COLOR)
-        # Position it to the right of the bar, vertically centered with the bar
-        level_rect = level_surf.get_rect(midleft=(BAR_X + BAR_MAX_WIDTH + LEVEL_TEXT_OFFSET_X, BAR_Y + BAR_HEIGHT / 2))
-        screen.blit(level_surf, level_rect)
-
-        # Draw Game Timer (top right)
-        minutes = int(total_game_time_seconds // 60)
-        seconds = int(total_game_time_seconds % 60)
-        timer_text = f"{minutes:02}:{seconds:02}"
-        timer_surf = ui_font.render(timer_text, True, settings.WHITE)
-        timer_rect = timer_surf.get_rect(topright=(screen.get_width() - 20, 20))
-        screen.blit(timer_surf, timer_rect)
-
-        # Draw Kill Counter (below timer)
-        kill_text_str = f"Kills: {kill_count}"
-        kill_surf = ui_font.render(kill_text_str, True, settings.WHITE)
-        kill_rect = kill_surf.get_rect(topright=(screen.get_width() - 20, timer_rect.bottom + 5)) # Position below timer
-        screen.blit(kill_surf, kill_rect)
-
-        if store_active: # Draw store on top if active (and game not over)
-            draw_store_window(screen)
-
-    # flip() the display to put your work on screen
-    pygame.display.flip()
-
-pygame.display.quit() # Explicitly quit display before pygame.quit()
-pygame.quit()
-sys.exit()
\ No newline at end of file
+        return "select"
+    if sim.game_over_active:
+        return "game_over"
+    if sim.store_active:
+        return "store"
+    return None
+
+
+def _hovered_button(screen_name, sim):
+    # Index of the button under the mouse, using the rects from the last time the screen was drawn
+    if screen_name == "select":
+        rects = [archetype.get("rect") for archetype in PLAYER_ARCHETYPES]
+    elif screen_name == "store":
+        rects = [item["rect"] for item in sim.displayed_store_items] + [continue_button_rect]
+    else:
+        return None
+    mouse_pos = pygame.mouse.get_pos()
+    for i, rect in enumerate(rects):
+        if rect and rect.collidepoint(mouse_pos):
+            return i
+    return None
+
+
+def draw_idle_screen(surface, sim, screen_name, bg_color, screen_changed):
+    global paused_scene
+    if screen_name == "select":
+        draw_character_select_screen(surface) # Covers the whole screen
+    elif screen_name == "game_over":
+        surface.fill(bg_color)
+        draw_tiled_background(surface, sim.camera_offset)
+        draw_game_over_screen(surface, sim.total_game_time_seconds)
+    else:
+        # The game under the store is frozen, draw it once and redraw only the store window on top
+        if screen_changed or paused_scene is None or paused_scene.get_size() != surface.get_size():
+            paused_scene = pygame.Surface(surface.get_size()).convert()
+            paused_scene.fill(bg_color)
+            draw_tiled_background(paused_scene, sim.camera_offset)
+            draw_game(paused_scene, sim, draw_store=False)
+        surface.blit(paused_scene, (0, 0))
+        draw_store_window(surface, sim.displayed_store_items)
+
+
+def run_game(args):
+    global screen, clock
+    # pygame setup
+    pygame.init()
+    pygame.mixer.init() # Initialize the mixer for sound effects
+    screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+    clock = pygame.time.Clock()
+    load_fonts() # The loading screen needs them
+    loader = assets.AssetLoader()
+    running = wait_for_assets(loader) # Decodes sounds and images on a worker while the loading screen is shown
+
+    sim = simulation.Simulation((screen.get_width(), screen.get_height()), (TILE_WIDTH, TILE_HEIGHT),
+                                sounds=game_sounds, seed=args.seed)
+    recorder = replay.InputRecorder(sim) if args.record else None
+    profile_path = profiler.enable_from_env(args.profile)
+    character_select_active = True # Start with character selection
+    if args.archetype:
+        sim.select_archetype(simulation.find_archetype(args.archetype))
+        character_select_active = False
+        restart_background_music()
+
+    # --- Background Color Cycling ---
+    current_bg_color_index = 0
+    next_bg_color_index = 1
+    bg_color_transition_progress = 0.0
+    dynamic_bg_color = settings.BG_CYCLE_COLORS[current_bg_color_index]
+
+    # Simulated time not yet consumed by fixed steps
+    accumulator = 0.0
+    # The static screen on display and its hovered button, None while the game is running
+    shown_idle_screen = None
+    shown_hovered_button = None
+    while running:
+        profiler.begin_frame()
+        idle_screen = idle_screen_name(character_select_active, sim)
+        # dt is delta time in seconds since last frame, used for presentation only.
+        # Gameplay advances in fixed simulation.FIXED_DT steps below.
+        with profiler.span("wait"): # Time clock.tick() sleeps to cap the frame rate, or waiting for input
+            if idle_screen and idle_screen == shown_idle_screen: # Only once the screen has been drawn
+                events = wait_for_events(settings.IDLE_WAIT_TIMEOUT_MS)
+                clock.tick() # Restart frame timing, the time spent waiting is not game time
+                dt = 0.0 # The background colour cycle pauses too
+            else:
+                dt = clock.tick(settings.FPS) / 1000
+                events = pygame.event.get()
+
+        # --- Event Handling ---
+        with profiler.span("events"):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and profile_path:
+                    profiler.dump(profile_path) # Snapshot of the recent frames without quitting
+
+                if character_select_active:
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        mouse_pos = pygame.mouse.get_pos()
+                        for archetype in PLAYER_ARCHETYPES:
+                            if archetype.get("rect") and archetype["rect"].collidepoint(mouse_pos):
+                                if select_archetype_sound:
+                                    select_archetype_sound.play()
+                                character_select_active = False
+                                sim.select_archetype(archetype) # Initialize game with selected character
+                                restart_background_music()
+                                accumulator = 0.0
+                                break
+                elif sim.game_over_active:
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_q:
+                            running = False
+                        elif event.key == pygame.K_r:
+                            sim.reset() # Restart with the same character
+                            restart_background_music()
+                            accumulator = 0.0
+                elif sim.store_active: # Store is active, and game is not over
+                    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1: # Left mouse button
+                        mouse_pos = pygame.mouse.get_pos()
+                        for item in sim.displayed_store_items: # Check against displayed items
+                            if item["rect"] and item["rect"].collidepoint(mouse_pos):
+                                sim.purchase_store_item(item) # Apply upgrade
+                                break
+                        # If no item was purchased (due to break), check continue button
+                        if sim.store_active and continue_button_rect and continue_button_rect.collidepoint(mouse_pos):
+                            sim.close_store()
+                    if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                        sim.close_store() # Reset bar when escaping store
+
+        # --- Game State Updates ---
+        # Background color transition (held still on the static screens, where dt is 0)
+        bg_color_transition_progress += settings.BG_COLOR_TRANSITION_SPEED * dt
+        if bg_color_transition_progress >= 1.0:
+            bg_color_transition_progress = 0.0 # Reset progress
+            current_bg_color_index = next_bg_color_index
+            next_bg_color_index = (next_bg_color_index + 1) % len(settings.BG_CYCLE_COLORS)
+
+        # Interpolate between the current and next background color
+        color1 = settings.BG_CYCLE_COLORS[current_bg_color_index]
+        color2 = settings.BG_CYCLE_COLORS[next_bg_color_index]
+        dynamic_bg_color = color1.lerp(color2, bg_color_transition_progress)
+
+        # Fixed timestep gameplay. Only runs while the game is active (not select, store or game over).
+        if not character_select_active and not sim.game_over_active and not sim.store_active:
+            accumulator += dt
+            move_input = simulation.input_from_keys(pygame.key.get_pressed())
+            steps = 0
+            while accumulator >= sim.dt and steps < settings.MAX_SIMULATION_STEPS_PER_FRAME:
+                with profiler.span("simulation_step"):
+                    sim.step(move_input)
+                accumulator -= sim.dt
+                steps += 1
+                if sim.store_active or sim.game_over_active:
+                    accumulator = 0.0
+                    break
+            if steps == settings.MAX_SIMULATION_STEPS_PER_FRAME:
+                accumulator = min(accumulator, sim.dt) # Drop time we could not catch up on
+
+        # The music stops while the store or the game over screen is up
+        music_player.set_paused(sim.store_active or sim.game_over_active)
+        music_player.update()
+
+        # --- Drawing ---
+        idle_screen = idle_screen_name(character_select_active, sim) # Events may have changed it
+        if idle_screen:
+            # Redraw a static screen when it first comes up, after any input besides mouse motion,
+            # and when the mouse moves onto or off a button
+            screen_changed = idle_screen != shown_idle_screen
+            if (screen_changed or _hovered_button(idle_screen, sim) != shown_hovered_button
+                    or any(event.type != pygame.MOUSEMOTION for event in events)):
+                with profiler.span("draw_scene"):
+                    draw_idle_screen(screen, sim, idle_screen, dynamic_bg_color, screen_changed)
+                with profiler.span("flip"):
+                    pygame.display.flip()
+                shown_idle_screen = idle_screen
+                shown_hovered_button = _hovered_button(idle_screen, sim) # Button rects are set while drawing
+        else:
+            shown_idle_screen = None
+            with profiler.span("draw_background"):
+                screen.fill(dynamic_bg_color) # Always fill screen with current background
+                draw_tiled_background(screen, sim.camera_offset)
+
+            with profiler.span("draw_scene"):
+                draw_game(screen, sim)
+
+            # flip() the display to put your work on screen
+            with profiler.span("flip"):
+                pygame.display.flip()
+        profiler.end_frame()
+        if args.startup_report: # The first frame of the select screen (or the game) is on screen
+            mark_startup("interactive")
+            print_startup_report(loader)
+            running = False
+
+    if recorder:
+        recorder.save(args.record)
+    if profile_path:
+        profiler.dump(profile_path)
+        print(sim.voices)
+    pygame.display.quit() # Explicitly quit display before pygame.quit()
+    pygame.quit()
+
+
+def run_headless(args):
+    """Runs the simulation without a window as fast as the CPU allows and prints a summary."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    load_background(convert=False) # Only the tile size is needed
+
+    archetype = simulation.find_archetype(args.archetype or "standard")
+    sim = simulation.Simulation((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), (TILE_WIDTH, TILE_HEIGHT),
+                                verbose=args.verbose, seed=args.seed)
+    recorder = replay.InputRecorder(sim) if args.record else None
+    profile_path = profiler.enable_from_env(args.profile)
+    sim.select_archetype(archetype)
+
+    start = time.perf_counter()
+    frames_run = 0
+    for _ in range(args.frames):
+        if sim.game_over_active:
+            break
+        if sim.store_active:
+            # No one to click the store, so always take the first offer
+            if sim.displayed_store_items:
+                sim.purchase_store_item(sim.displayed_store_items[0])
+            else:
+                sim.close_store()
+        profiler.begin_frame("tick")
+        sim.step()
+        profiler.end_frame()
+        frames_run += 1
+    elapsed = time.perf_counter() - start
+
+    ticks_per_second = frames_run / elapsed if elapsed > 0 else float("inf")
+    print(f"Simulated {frames_run} ticks ({sim.total_game_time_seconds:.1f} s game time) in {elapsed:.2f} s "
+          f"({ticks_per_second:.0f} ticks/s, {ticks_per_second * sim.dt:.1f}x real time)")
+    print(f"Seed: {sim.seed}  Archetype: {archetype['id']}  Level: {sim.player_level}  Kills: {sim.kill_count}  "
+          f"Health: {sim.current_player_health}/{sim.max_player_health}  Enemies: {len(sim.enemies)}  "
+          f"Game over: {sim.game_over_active}")
+    for object_pool in sim.pools.values():
+        print(f"  {object_pool}")
+    if recorder:
+        recorder.save(args.record)
+    if profile_path:
+        profiler.dump(profile_path)
+    pygame.quit()
+
+
+def run_replay(args):
+    """Re-simulates a recorded session headless and checks the state hash of every tick."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    ticks_run, first_divergence = replay.run_replay(replay.load_replay(args.replay), verbose=args.verbose)
+    pygame.quit()
+    return first_divergence is None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Moving Circle Survivor")
+    parser.add_argument("--headless", action="store_true", help="run the simulation without a window")
+    parser.add_argument("--frames", type=int, default=settings.SIMULATION_TICK_RATE * 60,
+                        help="number of fixed simulation ticks to run in headless mode")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--archetype", choices=[archetype["id"] for archetype in PLAYER_ARCHETYPES], default=None,
+                        help="skip character selection (headless defaults to standard)")
+    parser.add_argument("--verbose", action="store_true", help="print gameplay messages in headless mode")
+    parser.add_argument("--record", metavar="PATH", default=None, help="record inputs and state hashes to a replay file")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="re-simulate a recorded session headless and check it for divergence")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print import, first frame and time-to-interactive times, then quit")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help=f"profile the recent frames and write a Chrome trace on exit (or set {profiler.PROFILE_ENV_VAR}, F9 writes it early)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.replay:
+        return 0 if run_replay(args) else 1
+    if args.headless:
+        run_headless(args)
+    else:
+        run_game(args)
+    return 0
+
+
+mark_startup("import") # Everything above is import time
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# music.py
+# Background music streamed from disk with pygame.mixer.music, instead of being decoded into a Sound
+# (the whole track as PCM in memory) at startup.
+# pygame has a single music stream, so switching tracks fades the old one out and then the new one in.
+# Call update() once per frame so a queued track starts when the old one has faded out.
+import pygame
+import settings
+
+
+class MusicPlayer:
+    def __init__(self, volume=settings.MUSIC_VOLUME, fade_ms=settings.MUSIC_CROSSFADE_MS):
+        self.volume = volume
+        self.fade_ms = fade_ms
+        self.track = None # Path of the track playing (or fading in), None if nothing is
+        self.pending_track = None # Waiting for the current track to fade out
+        self.paused = False
+
+    def _start(self, path):
+        self.pending_track = None
+        self.paused = False
+        try:
+            pygame.mixer.music.load(path) # Opens the file, decoding happens while it plays
+        except pygame.error as e:
+            print(f"Error loading music {path}: {e}")
+            self.track = None
+            return
+        pygame.mixer.music.set_volume(self.volume)
+        pygame.mixer.music.play(loops=-1, fade_ms=self.fade_ms)
+        self.track = path
+
+    def play(self, path, restart=False):
+        """Switches to the track at path (looped). Already playing it does nothing unless restart is set."""
+        if path == self.track and self.pending_track is None and not restart:
+            return
+        if pygame.mixer.music.get_busy(): # Playing and not paused
+            self.pending_track = path
+            pygame.mixer.music.fadeout(self.fade_ms)
+        else:
+            self._start(path)
+
+    def set_paused(self, paused):
+        if paused == self.paused or self.track is None:
+            return
+        self.paused = paused
+        if paused:
+            pygame.mixer.music.pause()
+        else:
+            pygame.mixer.music.unpause()
+
+    def stop(self):
+        pygame.mixer.music.stop()
+        self.track = None
+        self.pending_track = None
+        self.paused = False
+
+    def update(self):
+        if self.pending_track and not self.paused and not pygame.mixer.music.get_busy():
+            self._start(self.pending_track)
@@ -0,0 +1,47 @@
+# pool.py
+# Free lists for short-lived entities (projectiles and pickups). Instead of building new objects and
+# their Vector2s for every shot or kill, released objects are kept and re-initialised with reset(),
+# which takes the same arguments as the class constructor.
+
+
+class ObjectPool:
+    def __init__(self, cls, max_free=1024):
+        self.cls = cls
+        self.max_free = max_free # Released objects beyond this are left to the garbage collector
+        self.free = []
+        # --- Stats ---
+        self.hits = 0 # acquire() calls served from the free list
+        self.misses = 0 # acquire() calls that had to construct a new object
+        self.in_use = 0
+        self.high_water = 0 # Most objects in use at the same time
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args, **kwargs)
+            self.hits += 1
+        else:
+            obj = self.cls(*args, **kwargs)
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        # The caller must drop every other reference to obj, it will come back from a later acquire()
+        self.in_use -= 1
+        if len(self.free) < self.max_free:
+            self.free.append(obj)
+
+    def release_all(self, objs):
+        for obj in objs:
+            self.release(obj)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "in_use": self.in_use,
+                "high_water": self.high_water, "free": len(self.free)}
+
+    def __repr__(self):
+        return (f"{self.cls.__name__} pool: {self.hits} hits, {self.misses} misses, "
+                f"{self.in_use} in use (high water {self.high_water}), {len(self.free)} free")
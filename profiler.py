@@ -0,0 +1,151 @@
+# profiler.py
+# Span profiler for the game loop. Phases are wrapped in "with profiler.span(name):" and the spans
+# of the most recent frames are kept in a ring buffer that can be written out as Chrome trace event
+# JSON (open it in chrome://tracing or https://ui.perfetto.dev).
+# Off by default: enable() with --profile PATH or the MOVING_CIRCLE_PROFILE=PATH environment variable.
+# Frames are delimited by begin_frame()/end_frame(). While disabled, span() hands back one shared
+# no-op object and the frame calls return straight away, so the cost is a function call.
+import os
+import json
+import time
+from collections import deque
+
+PROFILE_ENV_VAR = "MOVING_CIRCLE_PROFILE"
+DEFAULT_MAX_FRAMES = 600 # Ten seconds at 60 FPS
+
+_active = None # The FrameProfiler while profiling is enabled
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start_ns")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.profiler.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        profiler = self.profiler
+        profiler.depth -= 1
+        profiler.current_spans.append((self.name, self.start_ns, end_ns - self.start_ns, profiler.depth))
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, max_frames=DEFAULT_MAX_FRAMES):
+        self.frames = deque(maxlen=max_frames) # Each frame is a list of (name, start_ns, duration_ns, depth)
+        self.current_spans = [] # Spans outside a frame are collected here and dropped
+        self.depth = 0
+        self.frame_name = "frame"
+        self.frame_start_ns = 0
+        self.frame_count = 0 # Frames seen, including the ones pushed out of the ring buffer
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def begin_frame(self, name="frame"):
+        self.current_spans = []
+        self.depth = 1
+        self.frame_name = name
+        self.frame_start_ns = time.perf_counter_ns()
+
+    def end_frame(self):
+        end_ns = time.perf_counter_ns()
+        spans = self.current_spans
+        spans.append((self.frame_name, self.frame_start_ns, end_ns - self.frame_start_ns, 0))
+        self.frames.append(spans)
+        self.frame_count += 1
+        self.current_spans = []
+        self.depth = 0
+
+    def trace_events(self, pid=1, tid=1):
+        """The buffered frames as Chrome trace "complete" events, timestamps in microseconds."""
+        events = []
+        for spans in self.frames:
+            for name, start_ns, duration_ns, depth in spans:
+                events.append({"name": name, "ph": "X", "ts": start_ns / 1000, "dur": duration_ns / 1000,
+                               "pid": pid, "tid": tid, "args": {"depth": depth}})
+        # Viewers nest spans by time, parents must come before their children at the same timestamp
+        events.sort(key=lambda event: (event["ts"], -event["dur"]))
+        return events
+
+    def slowest_frames(self, count=5):
+        """(duration_ms, spans) for the slowest buffered frames, slowest first."""
+        # end_frame() appends the frame itself as the last entry
+        timed = [(spans[-1][2] / 1e6, spans) for spans in self.frames if spans]
+        timed.sort(key=lambda item: item[0], reverse=True)
+        return timed[:count]
+
+    def write_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, trace_file)
+        print(f"Wrote {len(self.frames)} of {self.frame_count} frames to {path}")
+
+
+# --- Module Level API ---
+def enable(max_frames=DEFAULT_MAX_FRAMES):
+    global _active
+    _active = FrameProfiler(max_frames)
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def enabled():
+    return _active is not None
+
+
+def enable_from_env(path=None):
+    """Turns profiling on if path is given or the environment variable is set. Returns the trace path or None."""
+    path = path or os.environ.get(PROFILE_ENV_VAR)
+    if path:
+        enable()
+    return path
+
+
+def span(name):
+    if _active is None:
+        return _NULL_SPAN
+    return _Span(_active, name)
+
+
+def begin_frame(name="frame"):
+    if _active is not None:
+        _active.begin_frame(name)
+
+
+def end_frame():
+    if _active is not None:
+        _active.end_frame()
+
+
+def dump(path):
+    """Writes the ring buffer to path and prints the slowest frames with their most expensive phases."""
+    if _active is None:
+        return
+    _active.write_chrome_trace(path)
+    for duration_ms, spans in _active.slowest_frames(3):
+        phases = sorted((span for span in spans[:-1] if span[3] == 1), key=lambda span: span[2], reverse=True)
+        summary = ", ".join(f"{name} {duration_ns / 1e6:.1f} ms" for name, _, duration_ns, _ in phases[:3])
+        print(f"  slow frame {duration_ms:.1f} ms: {summary}")
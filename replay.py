@@ -0,0 +1,130 @@
+# replay.py
+# Input recording and replay for reproducing a session, e.g. a perf spike from a player's machine.
+# A recording holds the seed, the per-tick movement input (run-length encoded), every player
+# choice (archetype, store purchases, restarts) and a hash of the game state after every tick.
+# Replaying re-simulates the session headless and reports the first tick whose hash differs.
+import gzip
+import json
+import time
+import zlib
+from array import array
+import settings
+import simulation
+
+REPLAY_VERSION = 1
+
+
+def state_hash(sim):
+    """CRC32 over the gameplay state that a divergence would show up in first."""
+    values = array("d", (sim.player_pos.x, sim.player_pos.y, sim.current_player_health, sim.kill_count,
+                         sim.current_pickups_count, sim.player_level, len(sim.enemies), len(sim.particles),
+                         len(sim.boomerang_projectiles), len(sim.pickup_particles)))
+    for enemy in sim.enemies:
+        pos = enemy.pos
+        values.append(pos.x)
+        values.append(pos.y)
+    for particle in sim.particles:
+        values.append(particle.pos.x)
+        values.append(particle.pos.y)
+    for bp in sim.boomerang_projectiles:
+        values.append(bp.pos.x)
+        values.append(bp.pos.y)
+    return zlib.crc32(values.tobytes())
+
+
+class InputRecorder:
+    def __init__(self, sim):
+        self.header = {
+            "version": REPLAY_VERSION,
+            "seed": sim.seed,
+            "screen_size": [sim.screen_width, sim.screen_height],
+            "tile_size": [sim.tile_width, sim.tile_height],
+            "tick_rate": settings.SIMULATION_TICK_RATE,
+            "start_tick": sim.tick,
+        }
+        self.inputs = [] # Run-length encoded [move_input, tick_count] pairs
+        self.events = [] # [tick, action, value]: applied before that tick is simulated
+        self.hashes = array("I") # State hash after every recorded tick
+        sim.recorder = self
+
+    def record_tick(self, sim, move_input):
+        if self.inputs and self.inputs[-1][0] == move_input:
+            self.inputs[-1][1] += 1
+        else:
+            self.inputs.append([move_input, 1])
+        self.hashes.append(state_hash(sim))
+
+    def record_event(self, sim, action, value=None):
+        self.events.append([sim.tick, action, value])
+
+    def save(self, path):
+        data = dict(self.header)
+        data["inputs"] = self.inputs
+        data["events"] = self.events
+        data["hashes"] = self.hashes.tolist()
+        with gzip.open(path, "wt", encoding="utf-8") as replay_file:
+            json.dump(data, replay_file, separators=(",", ":"))
+        print(f"Recorded {len(self.hashes)} ticks to {path}")
+
+
+def load_replay(path):
+    with gzip.open(path, "rt", encoding="utf-8") as replay_file:
+        data = json.load(replay_file)
+    if data.get("version") != REPLAY_VERSION:
+        raise ValueError(f"Unsupported replay version {data.get('version')} in {path}")
+    return data
+
+
+def _apply_event(sim, action, value):
+    if action == "select":
+        sim.select_archetype(simulation.find_archetype(value))
+    elif action == "reset":
+        sim.reset()
+    elif action == "purchase":
+        for item in sim.displayed_store_items:
+            if item["id"] == value:
+                sim.purchase_store_item(item)
+                break
+        else:
+            raise ValueError(f"Store item {value} was not on offer at tick {sim.tick}")
+    elif action == "close_store":
+        sim.close_store()
+    else:
+        raise ValueError(f"Unknown replay event {action}")
+
+
+def run_replay(data, verbose=False, stop_on_divergence=True):
+    """Re-simulates a recording as fast as possible. Returns (ticks_run, first_divergent_tick or None)."""
+    if data["tick_rate"] != settings.SIMULATION_TICK_RATE:
+        print(f"Warning: recorded at {data['tick_rate']} ticks/s, replaying at {settings.SIMULATION_TICK_RATE}")
+    sim = simulation.Simulation(tuple(data["screen_size"]), tuple(data["tile_size"]), verbose=verbose, seed=data["seed"])
+    sim.tick = data["start_tick"]
+    events = data["events"]
+    hashes = data["hashes"]
+    event_index = 0
+    hash_index = 0
+    first_divergence = None
+
+    start = time.perf_counter()
+    for move_input, count in data["inputs"]:
+        for _ in range(count):
+            # Player choices made before this tick
+            while event_index < len(events) and events[event_index][0] <= sim.tick:
+                _, action, value = events[event_index]
+                _apply_event(sim, action, value)
+                event_index += 1
+            sim.step(move_input)
+            if first_divergence is None and state_hash(sim) != hashes[hash_index]:
+                first_divergence = sim.tick
+                print(f"Replay diverged at tick {sim.tick} ({sim.tick * sim.dt:.2f} s)")
+                if stop_on_divergence:
+                    return hash_index + 1, first_divergence
+            hash_index += 1
+    elapsed = time.perf_counter() - start
+
+    recorded_seconds = hash_index * sim.dt
+    speed = recorded_seconds / elapsed if elapsed > 0 else float("inf")
+    print(f"Replayed {hash_index} ticks ({recorded_seconds:.1f} s game time) in {elapsed:.2f} s ({speed:.1f}x real time)")
+    if first_divergence is None:
+        print("State hashes match the recording on every tick.")
+    return hash_index, first_divergence
@@ -6,6 +6,10 @@ import pygame
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 FPS = 60
+SIMULATION_TICK_RATE = 60 # Fixed gameplay updates per second, independent of the frame rate
+MAX_SIMULATION_STEPS_PER_FRAME = 5 # Drop simulated time instead of spiralling after a long hitch
+IDLE_WAIT_TIMEOUT_MS = 250 # Longest sleep between loop turns on the select, store and game over screens
+LOADING_SCREEN_FPS = 30 # The loading screen only animates its progress bar
 
 # --- Colors ---
 BLACK = pygame.Color("#141728")
@@ -85,6 +89,22 @@ HEXAGON_ENEMY_RADIUS = 22 # Distance from center to vertex, square size is 18
 HEXAGON_ENEMY_HEALTH = 3
 HEXAGON_ENEMY_SPEED_MIN = 50
 HEXAGON_ENEMY_SPEED_MAX = 90
+# Keep enemy positions/speeds/health in NumPy arrays and move them all in one vectorized step.
+# Falls back to the per-object update if NumPy is not installed.
+# Moves enemies exactly like the per-object update, so replays match between the two (with USE_ENEMY_LOD off,
+# the store always moves every enemy).
+USE_NUMPY_ENEMY_STORE = False
+# Enemies more than ENEMY_LOD_MARGIN pixels outside the view move every ENEMY_LOD_TICK_INTERVAL ticks
+# (in one larger step) and skip separation, see lod.py. That changes gameplay (and replay state hashes) a
+# little, so like USE_NUMPY_ENEMY_STORE it is off by default; a recording only replays with the same setting.
+USE_ENEMY_LOD = False
+ENEMY_LOD_MARGIN = 200
+ENEMY_LOD_TICK_INTERVAL = 4
+# Enemies are drawn from pre-rendered sprites, triangles facing one of this many directions
+ENEMY_SPRITE_ROTATIONS = 64
+ENEMY_SPRITE_CACHE_SIZE = 256 # Most sprites kept, least recently used ones are dropped first
+PROJECTILE_SPRITE_CACHE_SIZE = 64 # Projectile and pickup sprites, one per colour and size
+TEXT_CACHE_SIZE = 128 # Rendered UI text surfaces, one per font, string and colour
 
 
 # --- Pickups ---
@@ -99,6 +119,13 @@ PICKUP_PARTICLE_HEIGHT = 20
 SPECIAL_PICKUP_WIDTH = 15
 SPECIAL_PICKUP_HEIGHT = 22
 
+# Pickups are kept in a grid, collection only looks at the cells around the player
+PICKUP_GRID_CELL_SIZE = 64
+# Off-screen cells holding this many pickups are merged into one pickup worth all of them (special look),
+# which keeps the pickup count bounded on long runs. Checked every PICKUP_COALESCE_INTERVAL ticks.
+PICKUP_COALESCE_THRESHOLD = 6
+PICKUP_COALESCE_INTERVAL = 30
+
 # --- Standard shot Settings ---
 STANDARD_SHOT_INITIAL_PROJECTILES = 1
 STANDARD_SHOT_MAX_PROJECTILES = 5 # Max projectiles for the standard shot upgrade
@@ -152,6 +179,28 @@ STORE_BUTTON_HOVER_COLOR = LIGHT_SKY_BLUE
 # --- World/Map ---
 WORLD_TILES_X = 5
 WORLD_TILES_Y = 5
+# Extra tiles kept around the visible ones in the background cache. 0 still covers the whole tiles the
+# camera overlaps, which with screen-sized tiles means a rebuild about once per screen travelled.
+BACKGROUND_CACHE_MARGIN_TILES = 0
+
+# --- Sound Effects ---
+SOUND_CHANNELS = 16 # Mixer channels shared by all sound effects (pygame.mixer.set_num_channels)
+# cue: (max_voices, priority). At most max_voices of a cue play at once. When every channel is busy, a voice of
+# the lowest priority not above the new cue's is stopped for it. See voices.py.
+SOUND_CUES = {
+    "player_death": (1, 3),
+    "enemy_hit": (4, 2),
+    "standard_shot": (2, 1),
+    "triple_shot": (2, 1),
+    "nova_shot": (2, 1),
+    "bouncing_shot": (2, 1),
+    "boomerang_shot": (2, 1),
+    "pickup": (3, 0),
+}
+
+# --- Music ---
+MUSIC_VOLUME = 0.1
+MUSIC_CROSSFADE_MS = 1000 # Fade out of the old track, then into the new one (restarts fade in only)
 
 # --- Asset Paths (example) ---
 FONT_DEFAULT_PATH = None # For pygame.font.Font(None, size)
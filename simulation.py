@@ -0,0 +1,788 @@
+# simulation.py
+# Gameplay state and the fixed-timestep update, with no window, drawing or wall-clock time.
+# main.py drives it from the game loop (or headless from the command line) and draws its state.
+import pygame
+import random
+import math
+import settings
+import spatial
+import enemy_store
+import profiler
+import pool
+import trail
+import voices
+import lod
+import targeting
+import damage
+from entities import (Particle, EnemyTriangle, SquareEnemy, HexagonEnemy, OrbitalWeapon,
+                      PickupParticle, BouncingParticle, BoomerangProjectile)
+
+FIXED_DT = 1.0 / settings.SIMULATION_TICK_RATE # Seconds simulated by every step()
+
+# --- Random Number Streams ---
+# Every subsystem draws from its own seeded stream, so e.g. an extra sound or a different store
+# pick never shifts the enemy spawns of a replayed session.
+RNG_STREAMS = ("spawn", "weapons", "drops", "store", "separation", "audio")
+
+# --- Player Input ---
+# One tick of player input is a bitmask of the movement keys held down
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 4
+INPUT_RIGHT = 8
+
+
+def input_from_keys(keys):
+    """Converts pygame.key.get_pressed() into the movement bitmask used by Simulation.step()."""
+    move_input = 0
+    if keys[pygame.K_w]:
+        move_input |= INPUT_UP
+    if keys[pygame.K_s]:
+        move_input |= INPUT_DOWN
+    if keys[pygame.K_a]:
+        move_input |= INPUT_LEFT
+    if keys[pygame.K_d]:
+        move_input |= INPUT_RIGHT
+    return move_input
+
+
+# --- Player Archetypes ---
+PLAYER_ARCHETYPES = [
+    {
+        "id": "standard",
+        "name": "Standard",
+        "color": settings.CRIMSON,
+        "description": "Single shot",
+        "shoot_cooldown_modifier": 1.0,
+        "shoot_function_name": "shoot_standard"
+    },
+    {
+        "id": "triple_shot",
+        "name": "Spread",
+        "color": settings.MEDIUM_PURPLE,
+        "description": "301",
+        "shoot_cooldown_modifier": 1.15, # Slightly longer base cooldown
+        "shoot_function_name": "shoot_triple"
+    },
+    {
+        "id": "nova_burst",
+        "name": "Burst",
+        "color": settings.TEAL,
+        "description": "Splosion",
+        "shoot_cooldown_modifier": 1.6, # Noticeably longer base cooldown
+        "shoot_function_name": "shoot_nova"
+    },
+    {
+        "id": "bouncing_shot",
+        "name": "Ricochet",
+        "color": settings.FOREST_GREEN,
+        "description": "Bouncing shot",
+        "shoot_cooldown_modifier": 0.8,
+        "shoot_function_name": "shoot_bouncing"
+    }
+]
+
+
+def find_archetype(archetype_id):
+    for archetype in PLAYER_ARCHETYPES:
+        if archetype["id"] == archetype_id:
+            return archetype
+    return None
+
+
+# --- Master Store Items List ---
+MASTER_STORE_ITEMS = [
+    # "multiplier" scales the upgraded stat (shoot cooldown, movement speed, max health, pickup radius)
+    {"id": "faster_shots", "text": "Faster Shots", "cost_text": "(Full Bar)", "multiplier": 0.85},
+    {"id": "player_speed", "text": "Player Speed+", "cost_text": "(Full Bar)", "multiplier": 1.15},
+    {"id": "max_health", "text": "Max Health+", "cost_text": "(Full Bar)", "multiplier": 1.20},
+    {"id": "pickup_radius", "text": "Pickup Radius+", "cost_text": "(Full Bar)", "multiplier": 1.25},
+    {"id": "heal_fully", "text": "Heal Fully", "cost_text": "(Full Bar)"},
+    {"id": "standard_shot_upgrade", "text": "Standard Shot+", "cost_text": "(Full Bar)"},
+    {"id": "boomerang_weapon", "text": "Boomerang+", "cost_text": "(Full Bar)"}, # Changed text
+    {"id": "orbital_weapon", "text": "Orbital Guard", "cost_text": "(Full Bar)"},
+    # Add more items here, e.g.:
+    # {"id": "damage_boost", "text": "Damage Boost", "cost_text": "(Full Bar)"},
+    # {"id": "temp_invincibility", "text": "Brief Shield", "cost_text": "(Full Bar)"},
+]
+
+
+class Simulation:
+    def __init__(self, screen_size=(settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), tile_size=(0, 0),
+                 sounds=None, verbose=True, seed=None):
+        self.screen_width, self.screen_height = screen_size
+        self.tile_width, self.tile_height = tile_size
+        self.sounds = sounds or {} # name: pygame.mixer.Sound (or list of Sounds for "enemy_hit")
+        self.verbose = verbose
+        self.dt = FIXED_DT
+        self.tick = 0 # Number of gameplay steps run so far (not reset on restart)
+        self.recorder = None # Optional replay.InputRecorder, told about every tick and player choice
+
+        # Seeded per-subsystem random streams, see RNG_STREAMS
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        # String seeds are hashed with SHA-512, so streams are stable across runs and platforms
+        self.rng = {name: random.Random(f"{self.seed}:{name}") for name in RNG_STREAMS}
+        # Sounds requested during a tick are played once per cue at its end, within a voice budget
+        self.voices = voices.VoiceManager(self.sounds, self.rng["audio"])
+
+        # --- Enemies ---
+        self.enemies = []
+        self.enemy_grid = spatial.SpatialHash() # Rebuilt every tick for enemy-enemy separation
+        self.enemy_hit_grid = spatial.SpatialHash(cell_size=2 * settings.HEXAGON_ENEMY_RADIUS) # Broad phase for projectile/orbital hits
+        self.enemy_hit_grid_current = False # Whether the hit grid still holds exactly the enemies, at their positions
+        self.damage = damage.DamageBuffer() # Weapon hits of the current tick, see _resolve_damage()
+        # Optional NumPy structure-of-arrays backend, enemies become views over its arrays
+        self.enemy_soa_store = None
+        if settings.USE_NUMPY_ENEMY_STORE:
+            if enemy_store.numpy_available():
+                self.enemy_soa_store = enemy_store.EnemyStore()
+            else:
+                self._log("NumPy is not installed, using the per-object enemy update.")
+
+        # --- Projectiles, Pickups and Weapons ---
+        self.particles = []
+        self.boomerang_projectiles = []
+        self.pickup_particles = []
+        self.pickup_grid = spatial.SpatialHash(cell_size=settings.PICKUP_GRID_CELL_SIZE) # The same pickups by position
+        # Pickups whose rect can touch the player's pickup square are within this much of its edge
+        self.pickup_query_margin = max(settings.PICKUP_PARTICLE_WIDTH, settings.PICKUP_PARTICLE_HEIGHT,
+                                       settings.SPECIAL_PICKUP_WIDTH, settings.SPECIAL_PICKUP_HEIGHT) / 2 + 1
+        self.active_orbital_weapons = []
+        # Released projectiles and pickups are re-initialised instead of allocated again, see pool.py
+        self.pools = {cls: pool.ObjectPool(cls) for cls in (Particle, BouncingParticle, BoomerangProjectile, PickupParticle)}
+
+        # --- Player ---
+        self.player_radius = settings.PLAYER_RADIUS
+        self.player_pos = pygame.Vector2(self.screen_width / 2, self.screen_height / 2)
+        self.camera_offset = pygame.Vector2(0, 0) # Tracks the top-left of the camera in world coordinates
+        self.player_trail_positions = trail.TrailBuffer() # Last MAX_TRAIL_LENGTH player positions, oldest first
+        self.selected_player_archetype = None
+
+        # --- Store / Game Over ---
+        self.store_active = False
+        self.game_over_active = False
+        self.displayed_store_items = [] # Will hold the 3 items currently shown in the store
+
+        self._reset()
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _play_sound(self, name):
+        self.voices.request(name) # Played by voices.flush() at the end of the tick
+
+    # --- Pooled Projectiles and Pickups ---
+    def _acquire(self, cls, *args, **kwargs):
+        return self.pools[cls].acquire(*args, **kwargs)
+
+    def _release(self, obj):
+        self.pools[type(obj)].release(obj)
+
+    def _release_all(self, objs):
+        # Empties the list and hands every object back to its pool
+        for obj in objs:
+            self.pools[type(obj)].release(obj)
+        objs.clear()
+
+    def pool_stats(self):
+        return {cls.__name__: pool.stats() for cls, pool in self.pools.items()}
+
+    @property
+    def world_bounds(self):
+        # World size in pixels, or None if there is no tiled map
+        if self.tile_width > 0 and self.tile_height > 0:
+            return (settings.WORLD_TILES_X * self.tile_width, settings.WORLD_TILES_Y * self.tile_height)
+        return None
+
+    # --- Reset Game State ---
+    def reset(self):
+        """Restarts the run with the same archetype."""
+        if self.recorder:
+            self.recorder.record_event(self, "reset")
+        self._reset()
+
+    def _reset(self):
+        # Calculate world center if map exists, otherwise screen center
+        world_bounds = self.world_bounds
+        if world_bounds:
+            self.player_pos = pygame.Vector2(world_bounds[0] / 2, world_bounds[1] / 2)
+        else:
+            # Fallback to screen center if no tileable map is defined (e.g., image failed to load)
+            self.player_pos = pygame.Vector2(self.screen_width / 2, self.screen_height / 2)
+        if self.enemy_soa_store:
+            self.enemy_soa_store.clear()
+        self.enemies.clear()
+        self.enemy_hit_grid_current = False
+        self._release_all(self.particles) # Player shots
+        self._release_all(self.pickup_particles) # Gold particles
+        self.pickup_grid.clear()
+        self.player_trail_positions.clear() # For player trail
+        self.active_orbital_weapons.clear() # Clear any active orbital weapons
+        self._release_all(self.boomerang_projectiles) # Clear boomerangs
+
+        self.total_game_time_seconds = 0.0
+        self.current_pickups_count = 0
+        self.max_pickups_for_full_bar = settings.INITIAL_MAX_PICKUPS_FOR_FULL_BAR
+        self.shoot_cooldown = settings.INITIAL_SHOOT_COOLDOWN
+        self.movement_speed = settings.INITIAL_MOVEMENT_SPEED
+        self.max_enemies = settings.MAX_ENEMIES # Reset MAX_ENEMIES to initial value
+        self.enemy_spawn_interval = settings.ENEMY_SPAWN_INTERVAL
+        self.player_level = settings.INITIAL_PLAYER_LEVEL
+        self.max_player_health = settings.INITIAL_PLAYER_HEALTH
+        self.current_player_health = self.max_player_health
+        self.player_pickup_radius_multiplier = 1.0
+        self.num_boomerangs_to_fire = 0 # Reset, will be set to initial when first bought
+        self.num_standard_projectiles = 0 # Reset, will be set when standard archetype is chosen
+        self.has_boomerang_weapon = False
+
+        self.kill_count = 0 # Reset kill count
+        self.enemy_spawn_timer = 0.0
+        # Cooldowns run on simulated time, so the first shot is ready straight away
+        self.last_shot_time = float("-inf")
+        self.last_boomerang_shot_time = float("-inf")
+
+        self.game_over_active = False
+        self.store_active = False # character selection is handled by the caller
+        self.displayed_store_items.clear() # Clear store offerings
+
+        if self.selected_player_archetype and self.selected_player_archetype["id"] == "standard":
+            self.num_standard_projectiles = settings.STANDARD_SHOT_INITIAL_PROJECTILES
+
+        # Reset camera based on player's starting position
+        self._update_camera()
+
+    def select_archetype(self, archetype):
+        """Starts a new run with the chosen archetype dict from PLAYER_ARCHETYPES."""
+        self.selected_player_archetype = archetype
+        if self.recorder:
+            self.recorder.record_event(self, "select", archetype["id"])
+        self._reset() # Initialize game with selected character
+        self._log(f"Selected: {archetype['name']}")
+        if archetype["id"] == "standard":
+            self._log(f"Standard archetype selected. Projectiles: {self.num_standard_projectiles}")
+
+    def _update_camera(self):
+        # Keep the player centered
+        self.camera_offset.x = self.player_pos.x - self.screen_width / 2
+        self.camera_offset.y = self.player_pos.y - self.screen_height / 2
+
+    # --- Enemy List Helpers ---
+    def add_enemy(self, enemy):
+        self.enemy_hit_grid_current = False
+        self.enemies.append(enemy)
+        if self.enemy_soa_store:
+            self.enemy_soa_store.add(enemy)
+
+    def remove_enemy(self, enemy):
+        if enemy in self.enemies: # Check if still exists
+            self._remove_enemies([enemy])
+
+    def _remove_enemies(self, removed):
+        """Removes a list of distinct enemies with one pass over the enemy list."""
+        removed_set = set(removed)
+        self.enemies[:] = [enemy for enemy in self.enemies if enemy not in removed_set]
+        for enemy in removed:
+            self.enemy_hit_grid.remove(enemy) # Found by position, only matters while the grid is current
+            for orbital in self.active_orbital_weapons:
+                orbital.hit_cooldowns.forget(enemy.entity_id)
+            if self.enemy_soa_store:
+                self.enemy_soa_store.remove(enemy)
+
+    # --- Shooting Functions ---
+    def find_targets(self, pos, k=1, max_range=None, exclude=None, predicate=None):
+        """Up to k enemies nearest to pos that pass the filters, nearest first (see targeting.py)."""
+        # Weapons fire before enemies move, so the hit grid from the last collision pass usually still matches
+        # and every weapon aiming in a tick shares it. It is only rebuilt after enemies were added or moved.
+        if not self.enemy_hit_grid_current:
+            self.enemy_hit_grid.rebuild(self.enemies)
+            self.enemy_hit_grid_current = True
+        return targeting.k_nearest(self.enemy_hit_grid, self.enemies, pos, k, max_range, exclude, predicate)
+
+    def _nearest_enemy_direction(self, player_world_pos):
+        nearest_enemy = self.find_targets(player_world_pos)[0]
+        offset = nearest_enemy.pos - player_world_pos
+        return offset.normalize() if offset.length_squared() > 0 else pygame.Vector2(0, -1)
+
+    def shoot_standard(self, player_world_pos, particle_color):
+        if not self.enemies and self.num_standard_projectiles > 0: # Allow shooting if projectiles > 0 even without enemies for visual feedback
+            base_direction = pygame.Vector2(0, -1) # Default upwards if no enemies
+        elif not self.enemies:
+            return # No enemies and no projectiles to shoot (should not happen if archetype selected)
+        else:
+            base_direction = self._nearest_enemy_direction(player_world_pos)
+        self._play_sound("standard_shot")
+
+        spread_angle_deg = 10 # Angle between projectiles if multiple
+        total_angle_span = (self.num_standard_projectiles - 1) * spread_angle_deg
+        start_angle_offset = -total_angle_span / 2
+
+        for i in range(self.num_standard_projectiles):
+            angle_offset = start_angle_offset + i * spread_angle_deg
+            shot_direction = base_direction.rotate(angle_offset)
+            # Target is a point far in the calculated direction
+            self.particles.append(self._acquire(Particle, player_world_pos, player_world_pos + shot_direction * 100, color=particle_color))
+
+    def shoot_triple(self, player_world_pos, particle_color):
+        if not self.enemies: return
+        self._play_sound("triple_shot")
+        base_direction = self._nearest_enemy_direction(player_world_pos)
+        for angle_offset in [-15, 0, 15]:
+            shot_direction = base_direction.rotate(angle_offset)
+            self.particles.append(self._acquire(Particle, player_world_pos, player_world_pos + shot_direction * 100, color=particle_color)) # Target is far point
+
+    def shoot_nova(self, player_world_pos, particle_color):
+        self._play_sound("nova_shot")
+        for i in range(8): # 8 projectiles
+            shot_direction = pygame.Vector2(1, 0).rotate(i * 45) # 360/8 = 45 degrees
+            self.particles.append(self._acquire(Particle, player_world_pos, player_world_pos + shot_direction * 100, color=particle_color))
+
+    def shoot_bouncing(self, player_world_pos, particle_color_unused):
+        self._play_sound("bouncing_shot")
+
+        # Generate a random direction
+        random_angle = self.rng["weapons"].uniform(0, 2 * math.pi) # Angle in radians
+        target_direction = pygame.Vector2(math.cos(random_angle), math.sin(random_angle)).normalize()
+
+        far_target_pos = player_world_pos + target_direction * 100 # For initial direction calculation
+
+        self.particles.append(self._acquire(
+            BouncingParticle, player_world_pos, far_target_pos, # BouncingParticle uses its own color from settings
+            # Other params like speed, radius, lifetime, max_bounces are defaults in BouncingParticle constructor
+        ))
+
+    # --- Store ---
+    def populate_store_offerings(self):
+        self.displayed_store_items.clear()
+
+        available_master_items = []
+        for item_template in MASTER_STORE_ITEMS:
+            can_add = True
+            if item_template["id"] == "boomerang_weapon":
+                if self.has_boomerang_weapon and self.num_boomerangs_to_fire >= settings.BOOMERANG_MAX_COUNT:
+                    can_add = False # Don't offer if maxed out
+            elif item_template["id"] == "standard_shot_upgrade":
+                if not self.selected_player_archetype or self.selected_player_archetype["id"] != "standard":
+                    can_add = False # Only offer if standard archetype is active
+                elif self.num_standard_projectiles >= settings.STANDARD_SHOT_MAX_PROJECTILES:
+                    can_add = False # Don't offer if maxed out
+            if can_add:
+                available_master_items.append(item_template)
+
+        num_to_display = min(len(available_master_items), 3)
+        self.displayed_store_items[:] = self.rng["store"].sample(available_master_items, num_to_display) if available_master_items else []
+
+        for item in self.displayed_store_items: # Ensure rect is reset
+            item["rect"] = None
+
+    def purchase_store_item(self, item):
+        """Applies an upgrade from displayed_store_items and closes the store."""
+        if self.recorder:
+            self.recorder.record_event(self, "purchase", item["id"])
+        if item["id"] == "faster_shots":
+            self.shoot_cooldown = max(0.05, self.shoot_cooldown * item["multiplier"])
+            self._log(f"Faster Shots purchased! New cooldown: {self.shoot_cooldown:.2f}")
+        elif item["id"] == "pickup_radius":
+            self.player_pickup_radius_multiplier *= item["multiplier"]
+            self._log(f"Pickup Radius+ purchased! New multiplier: {self.player_pickup_radius_multiplier:.2f}")
+        elif item["id"] == "player_speed":
+            self.movement_speed = int(self.movement_speed * item["multiplier"])
+            self._log(f"Player Speed+ purchased! New speed: {self.movement_speed:.0f}")
+        elif item["id"] == "max_health":
+            self.max_player_health = int(self.max_player_health * item["multiplier"])
+            self.current_player_health = self.max_player_health # Heal to new max
+            self._log(f"Max Health+ purchased! New max health: {self.max_player_health}")
+        elif item["id"] == "heal_fully":
+            self.current_player_health = self.max_player_health
+            self._log(f"Healed Fully! Health: {self.current_player_health}/{self.max_player_health}")
+        elif item["id"] == "orbital_weapon":
+            # This adds a new one each time, they stack
+            new_orbital = OrbitalWeapon(self.player_pos) # Pass the actual player_pos Vector2 object
+            self.active_orbital_weapons.append(new_orbital)
+            self._log(f"Orbital Guard activated! Count: {len(self.active_orbital_weapons)}")
+        elif item["id"] == "boomerang_weapon":
+            if not self.has_boomerang_weapon:
+                self.has_boomerang_weapon = True
+                self.num_boomerangs_to_fire = settings.BOOMERANG_INITIAL_COUNT
+                self._log(f"Boomerang Weapon acquired! Firing {self.num_boomerangs_to_fire} boomerang(s).")
+            elif self.num_boomerangs_to_fire < settings.BOOMERANG_MAX_COUNT:
+                self.num_boomerangs_to_fire += 1
+                self._log(f"Boomerang Upgraded! Now firing {self.num_boomerangs_to_fire} boomerang(s).")
+        elif item["id"] == "standard_shot_upgrade":
+            if self.selected_player_archetype and self.selected_player_archetype["id"] == "standard" and self.num_standard_projectiles < settings.STANDARD_SHOT_MAX_PROJECTILES:
+                self.num_standard_projectiles += 1
+                self._log(f"Standard Shot Upgraded! Now firing {self.num_standard_projectiles} projectile(s).")
+
+        # Increase the requirement for the next bar fill
+        self.max_pickups_for_full_bar = int(self.max_pickups_for_full_bar * 1.2 + 1)
+        self._log(f"Next upgrade will require {self.max_pickups_for_full_bar} pickups.")
+        self._close_store()
+
+    def close_store(self):
+        """Leaves the store without buying anything."""
+        if self.recorder:
+            self.recorder.record_event(self, "close_store")
+        self._close_store()
+
+    def _close_store(self):
+        self.store_active = False
+        self.current_pickups_count = 0 # Reset bar
+        self.displayed_store_items.clear() # Clear offerings for next time
+
+    # --- Kills ---
+    def _drop_pickup(self, pos):
+        # Chance to drop a special pickup
+        if self.rng["drops"].random() < settings.SPECIAL_PICKUP_CHANCE:
+            pickup = self._acquire(PickupParticle, pos, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH, height=settings.SPECIAL_PICKUP_HEIGHT, value=settings.SPECIAL_PICKUP_VALUE)
+        else:
+            pickup = self._acquire(PickupParticle, pos, color=settings.GOLD, width=settings.PICKUP_PARTICLE_WIDTH, height=settings.PICKUP_PARTICLE_HEIGHT, value=1)
+        self.pickup_particles.append(pickup)
+        self.pickup_grid.insert(pickup)
+
+    def _damage_enemy(self, enemy, amount, hit_sound=False):
+        # Only recorded here, _resolve_damage() applies it after the collision passes
+        if self.damage.record(enemy, amount, hit_sound):
+            self.enemy_hit_grid.remove(enemy) # Doomed, so later hits this tick pass it by
+
+    def _resolve_damage(self):
+        damage_buffer = self.damage
+        if not damage_buffer:
+            return
+        for enemy, amount in damage_buffer.pending.items():
+            if hasattr(enemy, 'take_damage'):
+                enemy.take_damage(amount)
+        kills = damage_buffer.kills
+        for enemy in kills:
+            self._drop_pickup(enemy.pos)
+        self.kill_count += len(kills)
+        if kills:
+            self._remove_enemies(kills)
+        if damage_buffer.hit_sound:
+            self._play_sound("enemy_hit")
+        damage_buffer.clear()
+
+    # --- Fixed Timestep Update ---
+    def step(self, move_input=0):
+        """Advances active gameplay by one fixed tick. Does nothing while paused (select, store, game over)."""
+        if self.game_over_active or self.store_active or not self.selected_player_archetype:
+            return
+        dt = self.dt
+        self.tick += 1
+        self.total_game_time_seconds += dt # Increment game timer
+        current_time = self.total_game_time_seconds
+
+        with profiler.span("move_player"):
+            self._move_player(move_input, dt)
+        with profiler.span("fire_weapons"):
+            self._fire_weapons(current_time)
+        with profiler.span("spawn_enemies"):
+            self._spawn_enemies(dt)
+        with profiler.span("update_projectiles"):
+            self._update_projectiles(dt)
+
+        # Enemy Update
+        # With USE_ENEMY_LOD, enemies far outside the view move at a reduced rate and skip separation (see lod.py)
+        with profiler.span("update_enemies"):
+            self.enemy_hit_grid_current = False # Enemies move from here until the next hit grid rebuild
+            separated_enemies = self.enemies
+            if settings.USE_ENEMY_LOD:
+                bounds = lod.view_bounds(self.camera_offset, (self.screen_width, self.screen_height))
+            if self.enemy_soa_store:
+                self.enemy_soa_store.seek(self.player_pos, dt) # All enemies in one vectorized step, LOD only skips separation
+                if settings.USE_ENEMY_LOD:
+                    separated_enemies = lod.near_enemies(self.enemies, bounds)
+            elif settings.USE_ENEMY_LOD:
+                separated_enemies = lod.update_enemies(self.enemies, self.player_pos, dt, self.tick, bounds)
+            else:
+                for enemy in self.enemies: # No need to copy if not removing during iteration here
+                    enemy.update(self.player_pos, dt)
+
+            # Update Orbital Weapons
+            for orbital in self.active_orbital_weapons:
+                orbital.update(dt) # player_pos is already a reference, so it uses the current player_pos
+
+        # Enemy-Enemy Collision Resolution (to prevent stacking)
+        # Only enemies in neighbouring cells of the spatial hash are compared
+        with profiler.span("separation"):
+            spatial.resolve_enemy_overlaps(separated_enemies, self.enemy_grid, self.rng["separation"])
+
+        self._collide_weapons_with_enemies(current_time) # Has a span per collision pass
+        with profiler.span("collect_pickups"):
+            self._collect_pickups()
+            if self.tick % settings.PICKUP_COALESCE_INTERVAL == 0:
+                self._coalesce_pickups()
+        with profiler.span("player_collision"):
+            self._collide_player_with_enemies()
+        self.voices.flush()
+
+        if self.recorder:
+            self.recorder.record_tick(self, move_input)
+
+    def _move_player(self, move_input, dt):
+        move_direction = pygame.Vector2(0, 0)
+        if move_input & INPUT_UP:
+            move_direction.y -= 1
+        if move_input & INPUT_DOWN:
+            move_direction.y += 1
+        if move_input & INPUT_LEFT:
+            move_direction.x -= 1
+        if move_input & INPUT_RIGHT:
+            move_direction.x += 1
+        if move_direction.length_squared() > 0:
+            move_direction.normalize_ip()
+            self.player_pos += move_direction * self.movement_speed * dt
+
+        # --- Player Trail Update ---
+        # Add current position to the trail history (world coordinates)
+        self.player_trail_positions.append(self.player_pos) # Copied into the ring buffer, drops the oldest when full
+
+        # Clamp player_pos to world boundaries (if a background tile exists)
+        world_bounds = self.world_bounds
+        if world_bounds:
+            player_radius = self.player_radius
+            self.player_pos.x = max(player_radius, min(self.player_pos.x, world_bounds[0] - player_radius))
+            self.player_pos.y = max(player_radius, min(self.player_pos.y, world_bounds[1] - player_radius))
+        self._update_camera()
+
+    def _fire_weapons(self, current_time):
+        archetype = self.selected_player_archetype
+        effective_shoot_cooldown = self.shoot_cooldown * archetype["shoot_cooldown_modifier"]
+
+        # Allow shooting even if no enemies for Nova, for others require enemies
+        can_shoot_condition = self.enemies or archetype["id"] in ["nova_burst", "bouncing_shot"]
+
+        if (current_time - self.last_shot_time > effective_shoot_cooldown) and can_shoot_condition:
+            self.last_shot_time = current_time
+            shoot_func = getattr(self, archetype["shoot_function_name"])
+            shoot_func(self.player_pos, settings.LIGHT_SKY_BLUE)
+
+        # Boomerang Firing Logic (if weapon acquired)
+        if self.has_boomerang_weapon and self.enemies and \
+           (current_time - self.last_boomerang_shot_time > settings.BOOMERANG_WEAPON_SHOOT_COOLDOWN):
+            self.last_boomerang_shot_time = current_time
+
+            # Find the single nearest enemy for the central boomerang
+            base_direction_to_enemy = self._nearest_enemy_direction(self.player_pos)
+
+            # Spread angle for multiple boomerangs (e.g., 10 degrees between each)
+            spread_angle_deg = 10
+            total_angle_span = (self.num_boomerangs_to_fire - 1) * spread_angle_deg
+            start_angle_offset = -total_angle_span / 2
+            for i in range(self.num_boomerangs_to_fire):
+                angle_offset = start_angle_offset + i * spread_angle_deg
+                shot_direction = base_direction_to_enemy.rotate(angle_offset)
+                self.boomerang_projectiles.append(self._acquire(BoomerangProjectile, self.player_pos, self.player_pos + shot_direction * 100)) # Target is a far point in that direction
+            self._play_sound("boomerang_shot")
+
+    def _spawn_enemies(self, dt):
+        self.enemy_spawn_timer += dt
+        if self.enemy_spawn_timer < self.enemy_spawn_interval or len(self.enemies) >= self.max_enemies:
+            return
+        self.enemy_spawn_timer = 0.0
+        rng = self.rng["spawn"]
+        spawn_type_roll = rng.random()
+        screen_w, screen_h = self.screen_width, self.screen_height # Used by all spawns
+        camera_offset = self.camera_offset
+
+        # Determine spawn edge and base position (world coordinates)
+        edge = rng.choice(["top", "bottom", "left", "right"])
+        margin = 30 # General margin for spawning off-screen
+        world_cx, world_cy = 0, 0
+
+        if edge == "top":
+            world_cx = camera_offset.x + rng.uniform(margin * 2, screen_w - margin * 2)
+            world_cy = camera_offset.y - margin
+        elif edge == "bottom":
+            world_cx = camera_offset.x + rng.uniform(margin * 2, screen_w - margin * 2)
+            world_cy = camera_offset.y + screen_h + margin
+        elif edge == "left":
+            world_cx = camera_offset.x - margin
+            world_cy = camera_offset.y + rng.uniform(margin * 2, screen_h - margin * 2)
+        else:  # right
+            world_cx = camera_offset.x + screen_w + margin
+            world_cy = camera_offset.y + rng.uniform(margin * 2, screen_h - margin * 2)
+
+        if spawn_type_roll < 0.40: # 40% chance for Triangle
+            self.add_enemy(EnemyTriangle((screen_w, screen_h), camera_offset, rng=rng))
+        elif spawn_type_roll < 0.75: # 35% chance for Square Group (0.40 + 0.35 = 0.75)
+            num_squares = rng.randint(settings.SQUARE_GROUP_SIZE_MIN, settings.SQUARE_GROUP_SIZE_MAX)
+            for _ in range(num_squares):
+                if len(self.enemies) < self.max_enemies:
+                    offset_world_pos = pygame.Vector2(world_cx + rng.uniform(-25, 25), world_cy + rng.uniform(-25, 25))
+                    self.add_enemy(SquareEnemy(offset_world_pos, screen_w, screen_h, rng=rng))
+        else: # 25% chance for Hexagon (remaining)
+            if len(self.enemies) < self.max_enemies:
+                # Spawn a single hexagon at the calculated edge position
+                self.add_enemy(HexagonEnemy(pygame.Vector2(world_cx, world_cy), screen_w, screen_h, rng=rng))
+
+    def _update_projectiles(self, dt):
+        screen_w, screen_h = self.screen_width, self.screen_height
+        world_bounds_for_particles = self.world_bounds
+
+        # Update Projectiles (Player Shots)
+        for particle in self.particles[:]:
+            particle.update(dt, screen_w, screen_h, self.camera_offset, world_bounds_for_particles)
+            if not particle.is_alive(screen_w, screen_h, self.camera_offset, world_bounds_for_particles):
+                self.particles.remove(particle)
+                self._release(particle)
+
+        # Update Boomerang Projectiles
+        for bp in self.boomerang_projectiles[:]:
+            bp.update(dt, self.player_pos, world_bounds_for_particles) # player_pos for future use, world_bounds for consistency
+            if not bp.is_alive(0,0,None,None): # Simpler is_alive check for boomerang
+                self.boomerang_projectiles.remove(bp)
+                self._release(bp)
+
+    def _collide_weapons_with_enemies(self, current_time):
+        # --- Broad Phase ---
+        # Enemies are hashed into a grid once per tick, so every projectile, boomerang and orbital
+        # only runs the narrow phase against the enemies in the cells around it.
+        with profiler.span("hit_grid"):
+            enemy_hit_grid = self.enemy_hit_grid
+            enemy_hit_grid.rebuild(self.enemies)
+            self.enemy_hit_grid_current = True
+            enemy_max_hit_radius = spatial.max_hit_radius(self.enemies)
+
+        with profiler.span("projectile_collision"):
+            self._collide_projectiles(enemy_hit_grid, enemy_max_hit_radius)
+        with profiler.span("boomerang_collision"):
+            self._collide_boomerangs(enemy_hit_grid, enemy_max_hit_radius)
+        with profiler.span("orbital_collision"):
+            self._collide_orbitals(enemy_hit_grid, enemy_max_hit_radius, current_time)
+        with profiler.span("resolve_damage"):
+            self._resolve_damage()
+
+    def _collide_projectiles(self, enemy_hit_grid, enemy_max_hit_radius):
+        # Collision: Projectile vs Enemy
+        # Tested over the whole move of the tick (prev_pos to pos), so fast shots and long ticks cannot tunnel
+        for particle, candidates in spatial.swept_broad_phase(self.particles[:], enemy_hit_grid, enemy_max_hit_radius):
+            hits = spatial.swept_hits(particle.prev_pos, particle.pos, particle.radius, candidates)
+            if not hits:
+                continue
+            hit_time, enemy = min(hits, key=lambda hit: hit[0]) # The enemy the particle reaches first along its move
+            enemy_col_radius = enemy.hit_radius
+            should_remove_particle = True
+
+            if isinstance(particle, BouncingParticle):
+                if particle.bounces_left > 0:
+                    particle.pos.update(particle.prev_pos.lerp(particle.pos, hit_time)) # Back to where it touched the enemy
+                    particle.bounce_off_object(enemy.pos, enemy_col_radius)
+                    particle.bounces_left -= 1
+                    should_remove_particle = False # Don't remove if it bounced and has bounces left
+                # If bounces_left is 0 (or becomes <0 after decrement), it will be removed
+
+            if should_remove_particle and particle in self.particles:
+                self.particles.remove(particle) # Check if still exists before removing
+                self._release(particle)
+
+            self._damage_enemy(enemy, 1) # Sound only if it kills
+            # Particle interacts with one enemy per collision pass.
+            # If it was a standard particle, it's removed. If bouncing, it has bounced.
+
+    def _collide_boomerangs(self, enemy_hit_grid, enemy_max_hit_radius):
+        # Collision: Boomerang Projectile vs Enemy
+        # Swept over the tick's move like projectiles, every enemy along it is hit
+        for bp, candidates in spatial.swept_broad_phase(self.boomerang_projectiles, enemy_hit_grid, enemy_max_hit_radius): # Boomerangs are not removed on hit
+            for hit_time, enemy in spatial.swept_hits(bp.prev_pos, bp.pos, bp.radius, candidates):
+                enemy_id = enemy.entity_id
+                if enemy_id not in bp.hit_enemies_this_pass:
+                    bp.hit_enemies_this_pass.add(enemy_id)
+                    self._damage_enemy(enemy, bp.damage, hit_sound=True)
+                # Boomerang continues, does not break from inner loop unless you want it to hit only one enemy per frame
+
+    def _collide_orbitals(self, enemy_hit_grid, enemy_max_hit_radius, current_time):
+        # Collision: Orbital Weapon vs Enemy
+        for orbital in self.active_orbital_weapons:
+            orbital.hit_cooldowns.expire(current_time) # Forget enemies whose cooldown is over
+        for orbital, candidates in spatial.broad_phase(self.active_orbital_weapons, enemy_hit_grid, enemy_max_hit_radius):
+            for enemy in candidates:
+                if (orbital.pos - enemy.pos).length_squared() < (orbital.radius + enemy.hit_radius)**2:
+                    # Check cooldown for this specific enemy
+                    if orbital.hit_cooldowns.ready(enemy.entity_id, current_time):
+                        orbital.hit_cooldowns.hit(enemy.entity_id, current_time)
+                        self._damage_enemy(enemy, orbital.damage, hit_sound=True) # Sound regardless of destruction for orbitals
+
+    def _collect_pickups(self):
+        # Collision: Player vs Pickup Particle
+        player_pos = self.player_pos
+        effective_player_pickup_radius = self.player_radius * self.player_pickup_radius_multiplier
+        player_world_rect = pygame.Rect(player_pos.x - effective_player_pickup_radius,
+                                        player_pos.y - effective_player_pickup_radius,
+                                        effective_player_pickup_radius * 2, effective_player_pickup_radius * 2)
+        collected = []
+        # Only pickups in the grid cells around the player's pickup square can touch it
+        for pickup in self.pickup_grid.query(player_pos, effective_player_pickup_radius + self.pickup_query_margin):
+            # AABB collision check: player (circle approximated as square) vs pickup (ellipse bounding box)
+            pickup_world_rect = pygame.Rect(pickup.pos.x - pickup.width / 2,
+                                            pickup.pos.y - pickup.height / 2,
+                                            pickup.width, pickup.height)
+            if player_world_rect.colliderect(pickup_world_rect):
+                self._play_sound("pickup")
+                if self.current_pickups_count < self.max_pickups_for_full_bar:
+                    self.current_pickups_count += pickup.value
+                if self.current_pickups_count >= self.max_pickups_for_full_bar and not self.store_active: # Check store_active again
+                    # Level up!
+                    self.player_level += 1 # Increment level when bar is full
+                    self.populate_store_offerings() # Choose items for the store
+                    self.max_enemies = int(self.max_enemies * 1.25) # Increase max enemies
+                    self.enemy_spawn_interval = max(0.5, self.enemy_spawn_interval * 0.9) # Decrease spawn interval, with a minimum limit
+                    self.store_active = True
+                    self.current_pickups_count = self.max_pickups_for_full_bar # Cap it
+                self.pickup_grid.remove(pickup)
+                collected.append(pickup)
+        if collected:
+            # One pass over the pickup list however many were collected
+            collected_set = set(collected)
+            self.pickup_particles[:] = [pickup for pickup in self.pickup_particles if pickup not in collected_set]
+            for pickup in collected:
+                self._release(pickup)
+
+    def _coalesce_pickups(self):
+        # Crowded cells the player cannot see become one pickup at the pickups' value-weighted centre.
+        # The merged pickup stays in the same cell, so the grid only needs the cell's list replaced.
+        cell_size = self.pickup_grid.cell_size
+        view_rect = pygame.Rect(self.camera_offset.x - cell_size, self.camera_offset.y - cell_size,
+                                self.screen_width + 2 * cell_size, self.screen_height + 2 * cell_size)
+        merged_away = set()
+        for cell_key, cell in self.pickup_grid.cells.items():
+            if len(cell) < settings.PICKUP_COALESCE_THRESHOLD:
+                continue
+            if view_rect.colliderect((cell_key[0] * cell_size, cell_key[1] * cell_size, cell_size, cell_size)):
+                continue
+            merged = cell[0]
+            total_value = 0
+            center = pygame.Vector2()
+            for pickup in cell:
+                total_value += pickup.value
+                center += pickup.pos * pickup.value
+            center /= total_value
+            if self.pickup_grid.cell_key(center) != cell_key: # Rounding at the cell edge, stay where it was
+                center = merged.pos.copy()
+            merged.reset(center, color=settings.SPECIAL_PICKUP_COLOR, width=settings.SPECIAL_PICKUP_WIDTH,
+                         height=settings.SPECIAL_PICKUP_HEIGHT, value=total_value)
+            for pickup in cell[1:]:
+                merged_away.add(pickup)
+                self._release(pickup)
+            del cell[1:]
+        if merged_away:
+            self.pickup_particles[:] = [pickup for pickup in self.pickup_particles if pickup not in merged_away]
+
+    def _collide_player_with_enemies(self):
+        # --- Collision Detection (Player vs Enemy) ---
+        player_pos = self.player_pos
+        for enemy in self.enemies[:]: # Iterate over a copy in case an enemy is removed
+            if (player_pos - enemy.pos).length_squared() < (self.player_radius + enemy.player_hit_radius)**2:
+                self.current_player_health -= 1
+                self._log(f"Player hit! Health: {self.current_player_health}/{self.max_player_health}")
+                # Destroy the enemy that hit the player
+                self.kill_count +=1 # Increment kill count when player collision destroys an enemy
+                self.remove_enemy(enemy) # Simple removal on hit, can be more complex
+
+                if self.current_player_health <= 0:
+                    self._play_sound("player_death")
+                    self.game_over_active = True
+                    self.store_active = False
+                    self._log(f"GAME OVER: Player health depleted by {type(enemy).__name__} at {enemy.pos}")
+                else: # Player was hit but not dead
+                    self._play_sound("enemy_hit") # Play a generic hit sound
+                break # One collision per tick
@@ -0,0 +1,173 @@
+# spatial.py
+# Uniform spatial hash used to avoid comparing every entity against every other entity.
+import math
+import random
+import pygame
+
+# Cells checked for each cell when resolving pairs. Only "forward" neighbours are listed
+# so that every pair of neighbouring cells is visited exactly once.
+_FORWARD_NEIGHBOURS = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class SpatialHash:
+    def __init__(self, cell_size=32):
+        self.cell_size = cell_size
+        self.cells = {} # (cell_x, cell_y): [items]
+
+    def cell_key(self, pos):
+        return (int(pos.x // self.cell_size), int(pos.y // self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, item):
+        key = self.cell_key(item.pos)
+        cell = self.cells.get(key)
+        if cell is None:
+            self.cells[key] = [item]
+        else:
+            cell.append(item)
+
+    def remove(self, item):
+        # Items are looked up by their current position, so only remove items that
+        # have not moved since they were inserted.
+        cell = self.cells.get(self.cell_key(item.pos))
+        if cell and item in cell:
+            cell.remove(item)
+
+    def query(self, pos, radius):
+        """Returns every item in the cells overlapped by the square around pos with half-size radius."""
+        cell_size = self.cell_size
+        min_x = int((pos.x - radius) // cell_size)
+        max_x = int((pos.x + radius) // cell_size)
+        min_y = int((pos.y - radius) // cell_size)
+        max_y = int((pos.y + radius) // cell_size)
+        cells = self.cells
+        candidates = []
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    candidates.extend(cell)
+        return candidates
+
+    def rebuild(self, items, cell_size=None):
+        """Clears the grid and re-inserts all items, optionally with a new cell size."""
+        if cell_size is not None and cell_size > 0:
+            self.cell_size = cell_size
+        self.cells.clear()
+        for item in items:
+            self.insert(item)
+
+
+def collision_cell_size(enemies, default=32):
+    # Two enemies can only overlap if their centers are closer than the sum of their
+    # collision radii, so a cell of twice the largest radius keeps every overlapping
+    # pair inside the same or a neighbouring cell.
+    max_radius = 0
+    for enemy in enemies:
+        if enemy.collision_radius > max_radius:
+            max_radius = enemy.collision_radius
+    return max_radius * 2 if max_radius > 0 else default
+
+
+def max_hit_radius(enemies):
+    max_radius = 0
+    for enemy in enemies:
+        if enemy.hit_radius > max_radius:
+            max_radius = enemy.hit_radius
+    return max_radius
+
+
+def broad_phase(items, grid, max_other_radius):
+    """Yields (item, candidates) for every item, where candidates are the grid entries close enough to possibly touch it."""
+    for item in items:
+        candidates = grid.query(item.pos, item.radius + max_other_radius)
+        if candidates:
+            yield item, candidates
+
+
+def swept_broad_phase(items, grid, max_other_radius):
+    """Like broad_phase, but the candidates cover each item's whole move from item.prev_pos to item.pos."""
+    for item in items:
+        prev_pos = item.prev_pos
+        pos = item.pos
+        half_move = max(abs(pos.x - prev_pos.x), abs(pos.y - prev_pos.y)) / 2
+        center = pygame.Vector2((pos.x + prev_pos.x) / 2, (pos.y + prev_pos.y) / 2)
+        candidates = grid.query(center, item.radius + max_other_radius + half_move)
+        if candidates:
+            yield item, candidates
+
+
+def swept_hits(start, end, radius, enemies):
+    """(hit time, enemy) for every enemy that a circle of radius moving from start to end touches. The hit time
+    is the fraction of the move (0 to 1) at which it first touches, 0 if it already does at start.
+    Testing the whole move instead of the end position means a fast projectile, or a long tick, cannot carry a
+    projectile through an enemy between two ticks."""
+    move_x = end.x - start.x
+    move_y = end.y - start.y
+    a = move_x * move_x + move_y * move_y
+    hits = []
+    for enemy in enemies:
+        center = enemy.pos
+        start_x = start.x - center.x
+        start_y = start.y - center.y
+        hit_range = radius + enemy.hit_radius
+        c = start_x * start_x + start_y * start_y - hit_range * hit_range
+        if c <= 0: # Already touching at the start
+            hits.append((0.0, enemy))
+            continue
+        half_b = start_x * move_x + start_y * move_y
+        if a == 0 or half_b >= 0: # Not moving, or moving away
+            continue
+        discriminant = half_b * half_b - a * c
+        if discriminant < 0: # The line passes the circle by
+            continue
+        t = (-half_b - math.sqrt(discriminant)) / a # Entry point, the smaller root
+        if t <= 1:
+            hits.append((t, enemy))
+    return hits
+
+
+def _separate_pair(enemy1, enemy2, rng=random):
+    dist_vec = enemy1.pos - enemy2.pos
+    dist_sq = dist_vec.length_squared()
+    total_radii = enemy1.collision_radius + enemy2.collision_radius
+
+    if dist_sq < total_radii**2 and dist_sq > 0: # They are overlapping and not at the exact same spot
+        distance = dist_vec.length()
+        overlap = total_radii - distance
+        separation_vector = dist_vec * (overlap / 2 / distance) # Each moves by half the overlap
+
+        enemy1.pos += separation_vector
+        enemy2.pos -= separation_vector
+    elif dist_sq == 0: # Exactly on top, nudge them apart randomly
+        nudge = pygame.Vector2(rng.uniform(-1, 1), rng.uniform(-1, 1))
+        if nudge.length_squared() == 0:
+            nudge.x = 1
+        nudge.scale_to_length(0.1)
+        enemy1.pos += nudge
+        enemy2.pos -= nudge
+
+
+def resolve_enemy_overlaps(enemies, grid, rng=random):
+    """Pushes overlapping enemies apart, only comparing enemies in neighbouring grid cells."""
+    grid.rebuild(enemies, collision_cell_size(enemies, grid.cell_size))
+    cells = grid.cells
+
+    for (cell_x, cell_y), cell in cells.items():
+        # Pairs inside the same cell
+        count = len(cell)
+        for i in range(count):
+            enemy1 = cell[i]
+            for j in range(i + 1, count):
+                _separate_pair(enemy1, cell[j], rng)
+
+        # Pairs with the forward neighbouring cells
+        for offset_x, offset_y in _FORWARD_NEIGHBOURS:
+            other_cell = cells.get((cell_x + offset_x, cell_y + offset_y))
+            if not other_cell:
+                continue
+            for enemy1 in cell:
+                for enemy2 in other_cell:
+                    _separate_pair(enemy1, enemy2, rng)
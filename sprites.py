@@ -0,0 +1,284 @@
+# sprites.py
+# Pre-rendered sprites for enemies, projectiles and pickups, so drawing one is a blit in a batch
+# instead of building and filling a polygon, circle or ellipse.
+# Sprites are rendered the first time they are needed (enemies in normal and damaged colours, triangles
+# in settings.ENEMY_SPRITE_ROTATIONS directions) and kept in bounded least-recently-used caches.
+# Needs a display, the sprites are created in the display's pixel format.
+# Also home to the UI caches: rendered text and layers that are only redrawn when their state changes.
+import math
+from collections import OrderedDict
+import pygame
+import settings
+from entities import EnemyTriangle, SquareEnemy, HexagonEnemy
+
+# Sprites are opaque surfaces with a colour key, which blit faster than per-pixel alpha
+COLOR_KEY = (255, 0, 255)
+CULL_MARGIN = 32 # Projectiles and pickups further off-screen than this are not drawn
+
+
+def _unit_hexagon():
+    # Point-up hexagon vertices on the unit circle (first point at top), same as HexagonEnemy.draw
+    points = []
+    for i in range(6):
+        angle_rad = math.radians(60 * i - 90)
+        points.append((math.cos(angle_rad), math.sin(angle_rad)))
+    return points
+
+
+_UNIT_HEXAGON = _unit_hexagon()
+
+
+def _new_sprite(size, height=None):
+    sprite = pygame.Surface((size, size if height is None else height)).convert()
+    sprite.fill(COLOR_KEY)
+    sprite.set_colorkey(COLOR_KEY, pygame.RLEACCEL)
+    return sprite
+
+
+def _color_key(color):
+    # pygame.Color is not hashable, its packed 0xRRGGBBAA value is
+    return int(color) if isinstance(color, pygame.Color) else tuple(color)
+
+
+def _blit_batch(surface, blit_sequence):
+    # pygame-ce has fblits() for long runs of the same sprite, pygame has blits()
+    fblits = getattr(surface, "fblits", None)
+    if fblits:
+        fblits(blit_sequence)
+    else:
+        surface.blits(blit_sequence, doreturn=False)
+
+
+class _SpriteCache:
+    def __init__(self, max_sprites):
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict() # key: (sprite, anchor offset), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def clear(self):
+        self.sprites.clear()
+
+    def _get(self, key, render, *render_args):
+        entry = self.sprites.get(key)
+        if entry is not None:
+            self.sprites.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = render(*render_args)
+        self.sprites[key] = entry
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return entry
+
+
+class EnemySpriteCache(_SpriteCache):
+    def __init__(self, rotations=settings.ENEMY_SPRITE_ROTATIONS, max_sprites=settings.ENEMY_SPRITE_CACHE_SIZE):
+        super().__init__(max_sprites)
+        self.rotations = rotations # Triangle directions, the angle is snapped to 360 / rotations degrees
+
+    # --- Rendering ---
+    def _render_triangle(self, color, height, base_width, angle_index):
+        # The sprite is centred on the tip (the triangle's pos), so it can be blitted without knowing the angle
+        angle_rad = angle_index * 2 * math.pi / self.rotations
+        direction = pygame.Vector2(math.cos(angle_rad), math.sin(angle_rad))
+        half_size = math.ceil(math.hypot(height, base_width / 2)) + 1
+        center = pygame.Vector2(half_size, half_size)
+        base_center = center - direction * height
+        perp_vector = pygame.Vector2(-direction.y, direction.x)
+        sprite = _new_sprite(half_size * 2)
+        pygame.draw.polygon(sprite, color, [center, base_center + perp_vector * (base_width / 2),
+                                            base_center - perp_vector * (base_width / 2)])
+        return sprite, (half_size, half_size)
+
+    def _render_square(self, color, size):
+        sprite = _new_sprite(size)
+        sprite.fill(color)
+        return sprite, (size / 2, size / 2)
+
+    def _render_hexagon(self, color, radius):
+        half_size = math.ceil(radius) + 1
+        sprite = _new_sprite(half_size * 2)
+        pygame.draw.polygon(sprite, color, [(half_size + radius * x, half_size + radius * y) for x, y in _UNIT_HEXAGON])
+        return sprite, (half_size, half_size)
+
+    # --- Drawing ---
+    def sprite_for(self, enemy, target_world_pos):
+        """Returns (sprite, anchor offset) for an enemy, triangles face target_world_pos."""
+        # Colours are class constants, so the keys only say whether the enemy is damaged
+        if isinstance(enemy, EnemyTriangle):
+            offset = target_world_pos - enemy.pos
+            if offset.length_squared() > 0:
+                angle_index = round(math.atan2(offset.y, offset.x) * self.rotations / (2 * math.pi)) % self.rotations
+            else:
+                angle_index = (self.rotations * 3) // 4 # Point "up" if on top of the target
+            return self._get(("triangle", angle_index), self._render_triangle,
+                             enemy.color, enemy.height, enemy.base_width, angle_index)
+        if isinstance(enemy, SquareEnemy):
+            damaged = enemy.health < enemy.max_health
+            return self._get(("square", enemy.size, damaged), self._render_square, enemy.color, enemy.size)
+        if isinstance(enemy, HexagonEnemy):
+            damaged = enemy.health < enemy.max_health
+            return self._get(("hexagon", enemy.radius_stat, damaged), self._render_hexagon, enemy.color, enemy.radius_stat)
+        return None
+
+    def draw_enemies(self, surface, enemies, target_world_pos, camera_offset):
+        """Draws every enemy with one Surface.blits() call."""
+        camera_x = camera_offset.x
+        camera_y = camera_offset.y
+        blit_sequence = []
+        for enemy in enemies:
+            entry = self.sprite_for(enemy, target_world_pos)
+            if entry is None:
+                enemy.draw(surface, camera_offset) # Unknown enemy type, draw it the slow way
+                continue
+            sprite, (anchor_x, anchor_y) = entry
+            pos = enemy.pos
+            blit_sequence.append((sprite, (pos.x - camera_x - anchor_x, pos.y - camera_y - anchor_y)))
+        _blit_batch(surface, blit_sequence)
+
+
+class ProjectileSpriteCache(_SpriteCache):
+    # Circles for Particle and its subclasses, ellipses for PickupParticle
+    def __init__(self, max_sprites=settings.PROJECTILE_SPRITE_CACHE_SIZE):
+        super().__init__(max_sprites)
+
+    # --- Rendering ---
+    def _render_circle(self, color, radius):
+        # Drawn around the same integer centre as Particle.draw, so the pixels match
+        half_size = radius + 1
+        sprite = _new_sprite(half_size * 2)
+        pygame.draw.circle(sprite, color, (half_size, half_size), radius)
+        return sprite, (half_size, half_size)
+
+    def _render_ellipse(self, color, width, height):
+        sprite = _new_sprite(width, height)
+        pygame.draw.ellipse(sprite, color, (0, 0, width, height))
+        return sprite, (width / 2, height / 2)
+
+    # --- Drawing ---
+    def circle_sprite(self, color, radius):
+        return self._get(("circle", _color_key(color), radius), self._render_circle, color, radius)
+
+    def ellipse_sprite(self, color, width, height):
+        return self._get(("ellipse", _color_key(color), width, height), self._render_ellipse, color, width, height)
+
+    # Both loops group the on-screen objects into one (sprite, dest) list per sprite. Objects share
+    # their settings colour objects, so the colour's id and the size pick the batch, and the lookup
+    # only runs when an object differs from the one before it.
+    def _particle_batches(self, surface, particles, camera_offset):
+        camera_x = camera_offset.x
+        camera_y = camera_offset.y
+        max_x = surface.get_width() + CULL_MARGIN
+        max_y = surface.get_height() + CULL_MARGIN
+        batches = {} # (color id, radius): (sprite, anchor, blit list)
+        last_color = last_radius = sprite = batch = None
+        anchor = 0
+        for particle in particles:
+            pos = particle.pos
+            # Particle.draw truncates the centre before drawing the circle
+            screen_x = int(pos.x - camera_x)
+            screen_y = int(pos.y - camera_y)
+            if screen_x < -CULL_MARGIN or screen_y < -CULL_MARGIN or screen_x > max_x or screen_y > max_y:
+                continue
+            color = particle.color
+            radius = particle.radius
+            if color is not last_color or radius != last_radius:
+                last_color = color
+                last_radius = radius
+                entry = batches.get((id(color), radius))
+                if entry is None:
+                    sprite, (anchor, _) = self.circle_sprite(color, radius)
+                    entry = batches[(id(color), radius)] = (sprite, anchor, [])
+                sprite, anchor, batch = entry
+            batch.append((sprite, (screen_x - anchor, screen_y - anchor)))
+        return [entry[2] for entry in batches.values()]
+
+    def _pickup_batches(self, surface, pickups, camera_offset):
+        camera_x = camera_offset.x
+        camera_y = camera_offset.y
+        max_x = surface.get_width() + CULL_MARGIN
+        max_y = surface.get_height() + CULL_MARGIN
+        batches = {} # (color id, width, height): (sprite, anchor_x, anchor_y, blit list)
+        last_color = last_width = last_height = sprite = batch = None
+        anchor_x = anchor_y = 0
+        for pickup in pickups:
+            pos = pickup.pos
+            screen_x = pos.x - camera_x
+            screen_y = pos.y - camera_y
+            if screen_x < -CULL_MARGIN or screen_y < -CULL_MARGIN or screen_x > max_x or screen_y > max_y:
+                continue
+            color = pickup.color
+            if color is not last_color or pickup.width != last_width or pickup.height != last_height:
+                last_color = color
+                last_width = pickup.width
+                last_height = pickup.height
+                key = (id(color), last_width, last_height)
+                entry = batches.get(key)
+                if entry is None:
+                    sprite, (anchor_x, anchor_y) = self.ellipse_sprite(color, last_width, last_height)
+                    entry = batches[key] = (sprite, anchor_x, anchor_y, [])
+                sprite, anchor_x, anchor_y, batch = entry
+            batch.append((sprite, (screen_x - anchor_x, screen_y - anchor_y)))
+        return [entry[3] for entry in batches.values()]
+
+    def draw_particles(self, surface, particles, camera_offset):
+        """Particles and their subclasses (circles), one blit batch per sprite."""
+        for blit_sequence in self._particle_batches(surface, particles, camera_offset):
+            _blit_batch(surface, blit_sequence)
+
+    def draw_pickups(self, surface, pickups, camera_offset):
+        """Pickup ellipses, one blit batch per sprite."""
+        for blit_sequence in self._pickup_batches(surface, pickups, camera_offset):
+            _blit_batch(surface, blit_sequence)
+
+
+# --- UI ---
+class TextCache(_SpriteCache):
+    """Rendered text surfaces, keyed by (font, text, colour, antialias)."""
+
+    def __init__(self, max_sprites=settings.TEXT_CACHE_SIZE):
+        super().__init__(max_sprites)
+
+    def render(self, font, text, antialias, color):
+        # Same arguments as Font.render, the returned surface is shared and must not be drawn on
+        return self._get((font, text, _color_key(color), antialias), font.render, text, antialias, color)
+
+
+class CachedLayer:
+    """A transparent surface covering part of the screen, redrawn only when its state changes."""
+
+    def __init__(self):
+        self.surface = None
+        self.rect = None # Screen area the layer covers
+        self.state = None # Whatever the layer was last drawn from
+        self.encoded = False # Whether the surface has been switched to RLE since the last redraw
+        self.redraws = 0
+
+    def needs_redraw(self, state):
+        return self.surface is None or state != self.state
+
+    def begin(self, rect, state):
+        """Returns a new, fully transparent layer covering rect (screen coordinates) to draw into."""
+        rect = pygame.Rect(rect)
+        # A fresh surface each redraw: once it has a surface alpha, pygame blends text onto it the SDL way,
+        # which darkens the antialiased edges
+        self.surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        self.encoded = False
+        self.rect = rect
+        self.state = state
+        self.redraws += 1
+        return self.surface
+
+    def draw(self, surface):
+        if self.surface is None:
+            return
+        if not self.encoded:
+            # Run-length encoded, the blit skips the transparent runs between elements instead of blending them
+            self.surface.set_alpha(255, pygame.RLEACCEL)
+            self.encoded = True
+        surface.blit(self.surface, self.rect)
@@ -0,0 +1,80 @@
+# targeting.py
+# Nearest and k-nearest enemy queries for auto-aiming weapons, answered from a spatial.SpatialHash of the
+# enemies (the simulation's enemy hit grid, see Simulation.find_targets). A query searches rings of cells
+# outward from the query point and stops as soon as no unvisited cell can hold anything closer. If the
+# enemies are so spread out that the rings would visit more cells than there are enemies, it looks at
+# every enemy once instead, so a query never costs more than the old linear scan.
+# Filters: max_range, exclude (a collection of enemies to skip, e.g. already targeted this tick) and
+# predicate (a function of the enemy).
+# Of two enemies at the same distance the one with the lower entity_id ranks nearer. Enemies are appended to
+# the enemy list as they spawn and removals keep the order, so that is the enemy that comes first in the list,
+# as with the old min() over the list, whichever cell the ring search found it in.
+import heapq
+
+
+def nearest(grid, enemies, pos, max_range=None, exclude=None, predicate=None):
+    """The enemy closest to pos that passes the filters, None if there is none."""
+    found = k_nearest(grid, enemies, pos, 1, max_range, exclude, predicate)
+    return found[0] if found else None
+
+
+def k_nearest(grid, enemies, pos, k, max_range=None, exclude=None, predicate=None):
+    """Up to k enemies that pass the filters, nearest first. grid must hold exactly the enemies, at their positions."""
+    if k <= 0 or not enemies:
+        return []
+    cell_size = grid.cell_size
+    center_x, center_y = grid.cell_key(pos)
+    max_distance_sq = max_range * max_range if max_range is not None else float("inf")
+    filters = (pos, max_distance_sq, exclude, predicate)
+    best = [] # Max-heap of (-distance squared, -entity_id, enemy), the k nearest so far
+    cells = grid.cells
+    cells_visited = 0
+    ring = 0
+    while True:
+        if cells_visited >= len(enemies):
+            # Spread out enemies, looking at every enemy once is cheaper than more rings
+            best.clear()
+            _consider(best, k, enemies, filters)
+            break
+        for key in _ring_cells(center_x, center_y, ring):
+            cells_visited += 1
+            cell = cells.get(key)
+            if cell:
+                _consider(best, k, cell, filters)
+        # Anything in the next ring or beyond is at least ring * cell_size away
+        reach_sq = (ring * cell_size) ** 2
+        if (len(best) == k and -best[0][0] <= reach_sq) or reach_sq > max_distance_sq:
+            break
+        ring += 1
+    best.sort(reverse=True)
+    return [enemy for _, _, enemy in best]
+
+
+def _ring_cells(center_x, center_y, ring):
+    # Cells whose Chebyshev distance from the center cell is exactly ring
+    if ring == 0:
+        yield (center_x, center_y)
+        return
+    for cell_x in range(center_x - ring, center_x + ring + 1):
+        yield (cell_x, center_y - ring)
+        yield (cell_x, center_y + ring)
+    for cell_y in range(center_y - ring + 1, center_y + ring):
+        yield (center_x - ring, cell_y)
+        yield (center_x + ring, cell_y)
+
+
+def _consider(best, k, enemies, filters):
+    pos, max_distance_sq, exclude, predicate = filters
+    distance_squared_to = pos.distance_squared_to
+    for enemy in enemies:
+        distance_sq = distance_squared_to(enemy.pos)
+        if distance_sq > max_distance_sq:
+            continue
+        if exclude and enemy in exclude:
+            continue
+        if predicate and not predicate(enemy):
+            continue
+        if len(best) < k:
+            heapq.heappush(best, (-distance_sq, -enemy.entity_id, enemy))
+        elif (-distance_sq, -enemy.entity_id) > best[0][:2]: # Nearer, or as near with a lower entity_id
+            heapq.heapreplace(best, (-distance_sq, -enemy.entity_id, enemy))
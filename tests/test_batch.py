@@ -0,0 +1,75 @@
+# test_batch.py
+import csv
+import pytest
+import pygame
+import batch
+import simulation
+
+TILE_SIZE = (1280, 720) # The background tile's size, without loading it
+
+
+def make_session(policy, movement="kite", seed=0, archetype="triple_shot", ticks=60 * 90):
+    return {"run": 0, "seed": seed, "archetype": archetype, "movement": movement, "policy": policy,
+            "overrides": {}, "ticks": ticks, "tile_size": TILE_SIZE}
+
+
+def outcome(row):
+    return {key: row[key] for key in ("ticks", "survival_seconds", "game_over", "kills", "level")}
+
+
+def test_kiting_player_levels_up():
+    row = batch.run_session(make_session("first"))
+    assert row["level"] > 1
+
+
+def test_store_policies_change_the_outcome():
+    first = batch.run_session(make_session("first"))
+    priority = batch.run_session(make_session("priority"))
+    assert outcome(first) != outcome(priority)
+
+
+def test_sessions_are_reproducible():
+    assert outcome(batch.run_session(make_session("random"))) == outcome(batch.run_session(make_session("random")))
+
+
+def test_input_from_direction():
+    assert batch.input_from_direction(pygame.Vector2(0, -1)) == simulation.INPUT_UP
+    assert batch.input_from_direction(pygame.Vector2(1, 1)) == simulation.INPUT_DOWN | simulation.INPUT_RIGHT
+    assert batch.input_from_direction(pygame.Vector2()) == 0
+
+
+ROWS = [{"run": 0, "seed": 1, "kills": 10, "game_over": True}, {"run": 1, "seed": 2, "kills": 12, "game_over": False}]
+COLUMNS = ["run", "seed", "kills", "game_over"]
+
+
+def write_rows(path):
+    results = batch.open_results(str(path), COLUMNS)
+    for row in ROWS:
+        results.write(row)
+    results.close()
+    return results
+
+
+def test_csv_results(tmp_path):
+    results = write_rows(tmp_path / "results.csv")
+    with open(results.path, newline="") as results_file:
+        rows = list(csv.DictReader(results_file))
+    assert [int(row["kills"]) for row in rows] == [10, 12]
+
+
+def test_parquet_without_pyarrow_falls_back_to_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "pyarrow", None)
+    results = write_rows(tmp_path / "results.parquet")
+    assert isinstance(results, batch.CsvResultsWriter)
+    assert results.path == str(tmp_path / "results.csv")
+    with open(results.path, newline="") as results_file:
+        assert [row["seed"] for row in csv.DictReader(results_file)] == ["1", "2"]
+
+
+def test_parquet_results(tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    results = write_rows(tmp_path / "results.parquet")
+    assert isinstance(results, batch.ParquetResultsWriter)
+    table = pyarrow_parquet.read_table(results.path)
+    assert table.column_names == COLUMNS
+    assert table.column("kills").to_pylist() == [10, 12]
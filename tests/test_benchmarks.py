@@ -0,0 +1,23 @@
+# test_benchmarks.py
+# Benchmark hordes come from their own seeded stream and leave the global random module alone
+import random
+import pygame
+from benchmarks import bench_enemy_store, suite
+
+
+def positions(horde):
+    return [(type(enemy).__name__, tuple(enemy.pos), enemy.speed) for enemy in horde]
+
+
+def test_enemy_store_horde_is_seeded_and_leaves_random_alone():
+    state = random.getstate()
+    first = bench_enemy_store.make_horde(60, random.Random(7))
+    assert random.getstate() == state
+    assert positions(first) == positions(bench_enemy_store.make_horde(60, random.Random(7)))
+
+
+def test_suite_horde_is_seeded_and_leaves_random_alone():
+    state = random.getstate()
+    first = suite.make_horde(60, pygame.Vector2(0, 0), random.Random(7))
+    assert random.getstate() == state
+    assert positions(first) == positions(suite.make_horde(60, pygame.Vector2(0, 0), random.Random(7)))
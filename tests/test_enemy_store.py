@@ -0,0 +1,57 @@
+# test_enemy_store.py
+import random
+import pytest
+import pygame
+import settings
+import simulation
+import replay
+import enemy_store
+from entities import EnemyTriangle, SquareEnemy, HexagonEnemy
+
+pytestmark = pytest.mark.skipif(not enemy_store.numpy_available(), reason="needs NumPy")
+
+
+def make_horde(rng):
+    screen_dims = (settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT)
+    horde = []
+    for i in range(90):
+        pos = (rng.uniform(0, settings.SCREEN_WIDTH), rng.uniform(0, settings.SCREEN_HEIGHT))
+        if i % 3 == 0:
+            horde.append(EnemyTriangle(screen_dims, pygame.Vector2(), rng=rng))
+        elif i % 3 == 1:
+            horde.append(SquareEnemy(pos, *screen_dims, rng=rng))
+        else:
+            horde.append(HexagonEnemy(pos, *screen_dims, rng=rng))
+    return horde
+
+
+def test_seek_matches_object_update_exactly():
+    objects = make_horde(random.Random(5))
+    stored = make_horde(random.Random(5))
+    store = enemy_store.EnemyStore()
+    for enemy in stored:
+        store.add(enemy)
+    target = pygame.Vector2(640, 360)
+    for _ in range(500):
+        for enemy in objects:
+            enemy.update(target, 1 / 60)
+        store.seek(target, 1 / 60)
+    assert [tuple(enemy.pos) for enemy in objects] == [tuple(enemy.pos) for enemy in stored]
+
+
+def test_replay_hashes_match_with_and_without_store(monkeypatch):
+    monkeypatch.setattr(settings, "USE_ENEMY_LOD", False)
+    monkeypatch.setattr(settings, "INITIAL_PLAYER_HEALTH", 10**9)
+    hashes = []
+    for use_store in (False, True):
+        monkeypatch.setattr(settings, "USE_NUMPY_ENEMY_STORE", use_store)
+        sim = simulation.Simulation(tile_size=(1280, 720), verbose=False, seed=11)
+        sim.select_archetype(simulation.find_archetype("nova_burst"))
+        run = []
+        for tick in range(1500):
+            if sim.store_active:
+                sim.purchase_store_item(sim.displayed_store_items[0])
+            sim.step(tick // 40 % 16)
+            run.append(replay.state_hash(sim))
+        hashes.append(run)
+    assert hashes[0] == hashes[1]
@@ -0,0 +1,31 @@
+# test_entities.py
+import pygame
+from entities import BouncingParticle, BoomerangProjectile, OrbitalWeapon
+
+
+def test_bounce_off_object_moves_pos_in_place():
+    particle = BouncingParticle((0, 0), (1, 0), radius=2)
+    pos = particle.pos
+    pos.update(8, 0)
+    particle.bounce_off_object(pygame.Vector2(15, 0), 5)
+    assert particle.pos is pos
+    assert pos.distance_to((15 - 5 - 2 - 0.1, 0)) < 1e-6 # Just outside the enemy
+
+
+def test_boomerang_default_direction_in_place():
+    boomerang = BoomerangProjectile((0, 0), (0, 0))
+    direction = boomerang.direction
+    direction.update(0, 0)
+    boomerang.update(1 / 60, None)
+    assert boomerang.direction is direction
+    assert direction == pygame.Vector2(0, -1)
+
+
+def test_orbital_follows_player_in_place():
+    player_pos = pygame.Vector2(100, 100)
+    orbital = OrbitalWeapon(player_pos)
+    pos = orbital.pos
+    player_pos.update(300, 200)
+    orbital.update(1 / 60)
+    assert orbital.pos is pos
+    assert abs(pos.distance_to(player_pos) - orbital.orbit_distance) < 1e-6
@@ -0,0 +1,33 @@
+# test_lod.py
+import pygame
+import settings
+import lod
+
+
+class Walker:
+    # Moves straight right at 60 px/s, only what lod.update_enemies needs
+    def __init__(self, entity_id, x):
+        self.entity_id = entity_id
+        self.pos = pygame.Vector2(x, 0)
+        self.lod_owed = 0
+
+    def update(self, target_pos, dt):
+        self.pos.x += 60 * dt
+
+
+def test_lod_is_off_by_default():
+    assert settings.USE_ENEMY_LOD is False
+
+
+def test_far_enemies_move_every_interval_and_keep_up():
+    bounds = (-100, -100, 100, 100)
+    near = Walker(1, 0)
+    far = Walker(2, 5000)
+    dt = 1 / 60
+    for tick in range(1, 11): # The far enemy moves on ticks 2, 6 and 10
+        near_x, far_x = near.pos.x, far.pos.x
+        assert lod.update_enemies([near, far], None, dt, tick, bounds, interval=4) == [near]
+        assert near.pos.x > near_x # Every tick
+        assert (far.pos.x > far_x) == ((tick + far.entity_id) % 4 == 0)
+    # Caught up on its last move, both have moved the same distance
+    assert abs((near.pos.x - 0) - (far.pos.x - 5000)) < 1e-9
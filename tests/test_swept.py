@@ -0,0 +1,81 @@
+# test_swept.py
+import pytest
+import pygame
+import settings
+import spatial
+from entities import Particle, BouncingParticle, EnemyTriangle
+
+DT = 1 / settings.SIMULATION_TICK_RATE
+
+
+class Target:
+    # Only what the hit grid and swept_hits read
+    def __init__(self, pos, hit_radius):
+        self.pos = pygame.Vector2(pos)
+        self.hit_radius = hit_radius
+
+
+def test_fast_move_through_enemy_hits():
+    enemy = Target((100, 0), 5)
+    start = pygame.Vector2(80, 1)
+    end = pygame.Vector2(130, 1) # A 50 px move, five times the enemy's diameter, jumping clean over it
+    assert (end - enemy.pos).length() > 5 + 2 and (start - enemy.pos).length() > 5 + 2
+    hits = spatial.swept_hits(start, end, 2, [enemy])
+    assert [hit_enemy for _, hit_enemy in hits] == [enemy]
+    hit_time = hits[0][0]
+    assert 0 < hit_time < 1
+    assert start.lerp(end, hit_time).distance_to(enemy.pos) == pytest.approx(7)
+
+
+def test_miss_and_moving_away():
+    enemy = Target((100, 0), 5)
+    assert not spatial.swept_hits(pygame.Vector2(80, 20), pygame.Vector2(130, 20), 2, [enemy]) # Passes by
+    assert not spatial.swept_hits(pygame.Vector2(110, 0), pygame.Vector2(160, 0), 2, [enemy]) # Leaving it
+    assert not spatial.swept_hits(pygame.Vector2(0, 0), pygame.Vector2(50, 0), 2, [enemy]) # Stops short
+
+
+def test_fast_projectile_does_not_tunnel():
+    # A real projectile whose move in one tick is more than twice the enemy's radius
+    enemy = EnemyTriangle((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT), pygame.Vector2())
+    enemy.pos = pygame.Vector2(0, 0)
+    speed = 6 * enemy.hit_radius / DT
+    particle = Particle((-3 * enemy.hit_radius, 0), (0, 0), speed=speed)
+    particle.update(DT)
+    assert particle.pos.distance_to(particle.prev_pos) > 2 * enemy.hit_radius
+    assert particle.pos.distance_to(enemy.pos) > particle.radius + enemy.hit_radius # The end position misses
+    assert spatial.swept_hits(particle.prev_pos, particle.pos, particle.radius, [enemy])
+
+
+def test_swept_broad_phase_covers_the_whole_move():
+    grid = spatial.SpatialHash(cell_size=20)
+    enemy = Target((100, 0), 5)
+    grid.rebuild([enemy])
+    particle = Particle((40, 0), (41, 0), speed=120 / DT, radius=2) # Moves 120 px, from x=40 to x=160
+    particle.update(DT)
+    # Neither end of the move is near the enemy, only the middle of it
+    assert not grid.query(particle.pos, particle.radius + enemy.hit_radius)
+    assert not grid.query(particle.prev_pos, particle.radius + enemy.hit_radius)
+    found = list(spatial.swept_broad_phase([particle], grid, enemy.hit_radius))
+    assert found and enemy in found[0][1]
+    assert spatial.swept_hits(particle.prev_pos, particle.pos, particle.radius, found[0][1])
+
+
+def test_wall_bounce_sweeps_from_the_wall():
+    # A diagonal shot bouncing off the right screen edge: the swept segment starts where it met the wall
+    particle = BouncingParticle((90, 10), (91, 11), speed=40 * 2 ** 0.5 / DT, radius=2)
+    particle.update(DT, 100, 100, pygame.Vector2(0, 0))
+    assert particle.direction.x < 0 and particle.direction.y > 0
+    assert particle.prev_pos.distance_to((98, 18)) < 1e-6 # The edge, less the radius
+    assert particle.pos.distance_to((66, 50)) < 1e-6 # 32 px past the edge, reflected
+    # Off the shot's path, but the straight line from where it started to where it ended passes it
+    inside_corner = Target((78, 19), 5)
+    assert spatial.swept_hits(pygame.Vector2(90, 10), particle.pos, particle.radius, [inside_corner])
+    assert not spatial.swept_hits(particle.prev_pos, particle.pos, particle.radius, [inside_corner])
+
+
+def test_object_bounce_resets_prev_pos():
+    particle = BouncingParticle((0, 0), (1, 0), radius=2)
+    particle.pos.update(8, 0)
+    particle.bounce_off_object(pygame.Vector2(15, 0), 5)
+    assert particle.direction.x < 0
+    assert particle.prev_pos == particle.pos
@@ -0,0 +1,55 @@
+# test_targeting.py
+import random
+import pygame
+import spatial
+import targeting
+
+
+class Target:
+    def __init__(self, entity_id, pos):
+        self.entity_id = entity_id
+        self.pos = pygame.Vector2(pos)
+
+
+def make_grid(enemies, cell_size=44):
+    grid = spatial.SpatialHash(cell_size=cell_size)
+    grid.rebuild(enemies)
+    return grid
+
+
+def test_equidistant_enemies_tie_break_like_min():
+    # The second enemy is in the query's own cell and is visited first, the first one only in the next ring
+    enemies = [Target(1, (-30, 10)), Target(2, (30, 10))]
+    pos = pygame.Vector2(0, 10)
+    want = min(enemies, key=lambda enemy: (enemy.pos - pos).length_squared())
+    assert want is enemies[0]
+    assert targeting.nearest(make_grid(enemies), enemies, pos) is want
+    assert targeting.k_nearest(make_grid(enemies), enemies, pos, 2) == enemies
+
+
+def test_ring_search_matches_linear_scan():
+    rng = random.Random(3)
+    # Whole-pixel positions on a small area, so many enemies are exactly as far from a query as another
+    enemies = [Target(i, (rng.randrange(-200, 200), rng.randrange(-200, 200))) for i in range(400)]
+    grid = make_grid(enemies)
+    for _ in range(200):
+        pos = pygame.Vector2(rng.randrange(-250, 250), rng.randrange(-250, 250))
+        by_distance = sorted(enemies, key=lambda enemy: (enemy.pos - pos).length_squared()) # Stable, list order on ties
+        assert targeting.nearest(grid, enemies, pos) is by_distance[0]
+        assert targeting.k_nearest(grid, enemies, pos, 5) == by_distance[:5]
+
+
+def test_spread_out_enemies_use_the_linear_fallback():
+    enemies = [Target(1, (5000, 0)), Target(2, (-5000, 0)), Target(3, (0, 9000))]
+    pos = pygame.Vector2(0, 0)
+    assert targeting.nearest(make_grid(enemies), enemies, pos) is enemies[0] # Tied with the second, lower id
+    assert targeting.nearest(make_grid(enemies), enemies, pos, max_range=100) is None
+
+
+def test_filters():
+    enemies = [Target(1, (10, 0)), Target(2, (20, 0)), Target(3, (30, 0))]
+    grid = make_grid(enemies)
+    pos = pygame.Vector2(0, 0)
+    assert targeting.nearest(grid, enemies, pos, exclude={enemies[0]}) is enemies[1]
+    assert targeting.nearest(grid, enemies, pos, predicate=lambda enemy: enemy.entity_id == 3) is enemies[2]
+    assert targeting.k_nearest(grid, enemies, pos, 3, max_range=25) == enemies[:2]
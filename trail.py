@@ -0,0 +1,89 @@
+# trail.py
+# The player trail: a fixed ring buffer of recent positions (used by the simulation) and a renderer
+# that draws them from alpha-faded copies of the player image made once, not every frame.
+import math
+import pygame
+import settings
+
+
+class TrailBuffer:
+    """Fixed-size ring buffer of positions. Iterates oldest first, appending never allocates."""
+
+    def __init__(self, capacity=settings.MAX_TRAIL_LENGTH):
+        self.slots = [pygame.Vector2() for _ in range(capacity)]
+        self.start = 0 # Index of the oldest position
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        slots = self.slots
+        capacity = len(slots)
+        for i in range(self.count):
+            yield slots[(self.start + i) % capacity]
+
+    def append(self, pos):
+        # Copies pos into the next slot, overwriting the oldest position once the buffer is full
+        capacity = len(self.slots)
+        if capacity == 0:
+            return
+        if self.count < capacity:
+            self.slots[(self.start + self.count) % capacity].update(pos)
+            self.count += 1
+        else:
+            self.slots[self.start].update(pos)
+            self.start = (self.start + 1) % capacity
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+
+def segment_alpha(index, segment_count):
+    # Alpha fades from transparent (oldest) to TRAIL_MAX_ALPHA (newest in trail)
+    return int(((index + 1) / segment_count) * settings.TRAIL_MAX_ALPHA)
+
+
+class TrailRenderer:
+    def __init__(self, player_radius=settings.PLAYER_RADIUS):
+        self.player_radius = player_radius
+        # (image or colour, alpha): faded surface. Alphas only range over 0..TRAIL_MAX_ALPHA, so this stays
+        # small even for long trails.
+        self.faded = {}
+
+    def _faded_image(self, image, alpha):
+        key = (image, alpha)
+        faded = self.faded.get(key)
+        if faded is None:
+            faded = image.copy()
+            faded.set_alpha(alpha)
+            self.faded[key] = faded
+        return faded
+
+    def _faded_circle(self, color, alpha):
+        # Fallback when no player image is loaded
+        key = (tuple(color), alpha)
+        faded = self.faded.get(key)
+        if faded is None:
+            radius = self.player_radius
+            faded = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(faded, (*color[:3], alpha), (radius, radius), radius)
+            self.faded[key] = faded
+        return faded
+
+    def draw(self, surface, positions, camera_offset, image=None, color=settings.CRIMSON):
+        """Draws the trail positions (oldest first) with one blits() call."""
+        segment_count = len(positions)
+        if segment_count == 0:
+            return
+        camera_x = camera_offset.x
+        camera_y = camera_offset.y
+        blit_sequence = []
+        for i, trail_world_pos in enumerate(positions):
+            alpha = segment_alpha(i, segment_count)
+            faded = self._faded_image(image, alpha) if image else self._faded_circle(color, alpha)
+            # Centred on the trail position, rounded the same way as get_rect(center=...)
+            blit_sequence.append((faded, (math.floor(trail_world_pos.x - camera_x + 0.5) - faded.get_width() // 2,
+                                          math.floor(trail_world_pos.y - camera_y + 0.5) - faded.get_height() // 2)))
+        surface.blits(blit_sequence, doreturn=False)
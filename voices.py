@@ -0,0 +1,99 @@
+# voices.py
+# Sound effect playback with a voice budget. The simulation requests cues by name during a tick and
+# flush() plays them at the end of it:
+# - a cue requested several times in one tick plays once (a nova burst killing a dozen enemies is one hit sound)
+# - each cue has at most max_voices playing at the same time, further plays are dropped
+# - when every mixer channel is busy, the oldest voice of the lowest priority (not above the new cue's) is stopped
+#   to make room, otherwise the new play is dropped
+# Works without a mixer too: cues without a loaded sound are ignored.
+import pygame
+import settings
+
+DEFAULT_CUE = (2, 1) # (max_voices, priority) for cues missing from settings.SOUND_CUES
+
+
+class _Voice:
+    __slots__ = ("channel", "sound", "cue", "priority")
+
+    def __init__(self, channel, sound, cue, priority):
+        self.channel = channel
+        self.sound = sound
+        self.cue = cue
+        self.priority = priority
+
+    def playing(self):
+        # The channel may have finished, or been handed to another sound since
+        return self.channel.get_busy() and self.channel.get_sound() is self.sound
+
+
+class VoiceManager:
+    def __init__(self, sounds, rng, cues=settings.SOUND_CUES, num_channels=settings.SOUND_CHANNELS):
+        self.sounds = sounds # name: pygame.mixer.Sound, or a list of variants picked from at random
+        self.rng = rng # Picks the variant, the simulation's "audio" stream
+        self.cues = cues # name: (max_voices, priority)
+        self.requested = {} # name: requests this tick, in request order
+        self.voices = [] # _Voice per play that may still be sounding, oldest first
+        if pygame.mixer.get_init():
+            pygame.mixer.set_num_channels(num_channels)
+        # --- Stats ---
+        self.requests = 0
+        self.played = 0
+        self.merged = 0 # Requests folded into another request of the same cue in the same tick
+        self.dropped = 0 # Plays skipped because the cue was at its voice cap or no channel could be freed
+        self.stolen = 0 # Voices stopped early to free a channel for a play of at least the same priority
+
+    def request(self, name):
+        if name not in self.sounds:
+            return
+        self.requests += 1
+        self.requested[name] = self.requested.get(name, 0) + 1
+
+    def flush(self):
+        """Plays this tick's requested cues, once each."""
+        if not self.requested:
+            return
+        self.voices = [voice for voice in self.voices if voice.playing()]
+        for name, count in self.requested.items():
+            self.merged += count - 1
+            sound = self.sounds.get(name)
+            if isinstance(sound, list):
+                sound = self.rng.choice(sound) if sound else None
+            if sound:
+                self._play(name, sound)
+        self.requested.clear()
+
+    def _play(self, name, sound):
+        max_voices, priority = self.cues.get(name, DEFAULT_CUE)
+        if sum(1 for voice in self.voices if voice.cue == name) >= max_voices:
+            self.dropped += 1
+            return
+        channel = pygame.mixer.find_channel()
+        if channel is None:
+            channel = self._steal(priority)
+            if channel is None:
+                self.dropped += 1
+                return
+        channel.play(sound)
+        self.voices.append(_Voice(channel, sound, name, priority))
+        self.played += 1
+
+    def _steal(self, priority):
+        # Oldest voice with the lowest priority, if that priority is not above the new cue's
+        victim = None
+        for voice in self.voices:
+            if voice.priority <= priority and (victim is None or voice.priority < victim.priority):
+                victim = voice
+        if victim is None:
+            return None
+        self.voices.remove(victim)
+        victim.channel.stop()
+        self.stolen += 1
+        return victim.channel
+
+    def stats(self):
+        return {"requests": self.requests, "played": self.played, "merged": self.merged,
+                "dropped": self.dropped, "stolen": self.stolen, "voices": len(self.voices)}
+
+    def __repr__(self):
+        return (f"Sound voices: {self.requests} requests, {self.played} played, {self.merged} merged, "
+                f"{self.dropped} dropped, {self.stolen} stolen")